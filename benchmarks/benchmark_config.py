@@ -0,0 +1,92 @@
+"""Times the parsing and deserialization of a large generated training config.
+
+A training config with many data paths is generated and loaded repeatedly, reporting
+the time spent parsing yaml, with the pure python and, where available, C loaders, and
+deserializing the parsed config, with apischema directly and with the memoized
+deserialization method::
+
+    python benchmarks/benchmark_config.py --paths 5000 --repeats 5
+"""
+
+from argparse import ArgumentParser
+from pathlib import Path
+from statistics import median
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Any, Callable
+
+import yaml
+from apischema import deserialize
+
+from ad_denoise.train import TrainConfig
+from ad_denoise.utils import config_deserializer
+
+
+def generate_config(paths: int) -> dict[str, Any]:
+    """Generates a training config for a scan split over many files."""
+    data_paths = [f"/data/scan/frames_{idx:06d}.h5" for idx in range(paths)]
+    dataset = {
+        "Hdf5ADImagesDataset": {
+            "data_paths": data_paths,
+            "frame_key": "entry/data/data",
+            "count_times_key": "entry/instrument/detector/count_time",
+            "mask_path": "/data/scan/mask.h5",
+            "mask_key": "mask",
+        }
+    }
+    return {
+        "name": "benchmark",
+        "max_epochs": 1,
+        "model": {
+            "Noise2Self": {
+                "network": {"Gaussian": {"kernel_half_width": 3}},
+                "train_dataset": dataset,
+                "val_dataset": {
+                    "InputTargetDataset": {"input": dataset, "target": dataset}
+                },
+            }
+        },
+    }
+
+
+def time_median(function: Callable[[], Any], repeats: int) -> float:
+    """Computes the median wall time, in seconds, of repeated calls to a function."""
+    times = []
+    for _ in range(repeats):
+        start = perf_counter()
+        function()
+        times.append(perf_counter() - start)
+    return median(times)
+
+
+def main() -> None:  # noqa: D103
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--paths", type=int, default=5000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir).joinpath("config.yaml")
+        path.write_text(yaml.safe_dump(generate_config(args.paths)))
+        loaders: dict[str, Any] = {"SafeLoader": yaml.SafeLoader}
+        if yaml.__with_libyaml__:
+            loaders["CSafeLoader"] = yaml.CSafeLoader
+        for name, loader in loaders.items():
+            seconds = time_median(
+                lambda: yaml.load(path.read_text(), Loader=loader), args.repeats
+            )
+            print(f"{'parse ' + name:>20}: {seconds * 1e3:9.1f} ms")
+        parsed = yaml.load(path.read_text(), Loader=yaml.SafeLoader)
+        start = perf_counter()
+        deserialize(TrainConfig, parsed)
+        print(f"{'first deserialize':>20}: {(perf_counter() - start) * 1e3:9.1f} ms")
+        seconds = time_median(lambda: deserialize(TrainConfig, parsed), args.repeats)
+        print(f"{'deserialize':>20}: {seconds * 1e3:9.1f} ms")
+        seconds = time_median(
+            lambda: config_deserializer(TrainConfig)(parsed), args.repeats
+        )
+        print(f"{'memoized deserialize':>20}: {seconds * 1e3:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Compares the throughput and memory use of the process and threaded data loaders.
+
+Each loader is run in a fresh interpreter over a synthetic compressed scan, reporting
+frames per second and the peak resident set size summed over the loader process and
+any worker processes::
+
+    python benchmarks/benchmark_loaders.py --frames 512 --size 512 --workers 8
+"""
+
+import json
+import subprocess
+import sys
+from argparse import ArgumentParser
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from h5py import File
+from numpy.random import default_rng
+
+from ad_denoise.bench import PeakRssSampler
+from ad_denoise.datasets.hdf5 import H5Key, SimpleHdf5
+from ad_denoise.datasets.utils import Dim
+from ad_denoise.loaders import ProcessDataLoaderConfig, ThreadedDataLoaderConfig
+
+
+def run_loader(path: Path, loader: str, workers: int, batch_size: int) -> dict:
+    """Iterates a loader over one epoch, sampling the peak memory use."""
+    config = (
+        ProcessDataLoaderConfig(batch_size=batch_size, num_workers=workers)
+        if loader == "process"
+        else ThreadedDataLoaderConfig(batch_size=batch_size, num_threads=workers)
+    )
+    dataset = SimpleHdf5([path], H5Key("data"), Dim(2))
+    with PeakRssSampler(0.02) as sampler:
+        start = perf_counter()
+        for _ in config(dataset, shuffle=True):
+            pass
+        elapsed = perf_counter() - start
+    return {
+        "loader": loader,
+        "frames_per_second": len(dataset) / elapsed,
+        "peak_rss_mib": sampler.peak / 2**20,
+    }
+
+
+def main() -> None:  # noqa: D103
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=512)
+    parser.add_argument("--size", type=int, default=512)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--child", choices=("process", "threaded"))
+    parser.add_argument("--path", type=Path)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        print(
+            json.dumps(run_loader(args.path, args.child, args.workers, args.batch_size))
+        )
+        return
+
+    with TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir).joinpath("scan.h5")
+        rng = default_rng(0)
+        with File(path, "w") as file:
+            file.create_dataset(
+                "data",
+                data=rng.poisson(4, (args.frames, args.size, args.size)).astype("u4"),
+                chunks=(1, args.size, args.size),
+                compression="gzip",
+            )
+        for loader in ("process", "threaded"):
+            output = subprocess.check_output(
+                [
+                    sys.executable,
+                    __file__,
+                    f"--child={loader}",
+                    f"--path={path}",
+                    f"--workers={args.workers}",
+                    f"--batch-size={args.batch_size}",
+                ]
+            )
+            result = json.loads(output.decode().strip().splitlines()[-1])
+            print(
+                f"{result['loader']:>9}: {result['frames_per_second']:9.1f} frames/s,"
+                f" peak rss {result['peak_rss_mib']:8.1f} MiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+from dataclasses import replace
+from pathlib import Path
+from typing import Callable
+
+import pytest
+from synthetic import ScanSpec, generate_scan
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("synthetic scan")
+    group.addoption("--scan-files", type=int, default=ScanSpec.files)
+    group.addoption("--scan-frames", type=int, default=ScanSpec.frames)
+    group.addoption("--scan-frame-size", type=int, default=ScanSpec.frame_size)
+    group.addoption("--scan-dtype", default=ScanSpec.dtype)
+    group.addoption("--scan-chunk-frames", type=int, default=ScanSpec.chunk_frames)
+
+
+@pytest.fixture(scope="session")
+def scan_spec(pytestconfig: pytest.Config) -> ScanSpec:
+    return ScanSpec(
+        files=pytestconfig.getoption("scan_files"),
+        frames=pytestconfig.getoption("scan_frames"),
+        frame_size=pytestconfig.getoption("scan_frame_size"),
+        dtype=pytestconfig.getoption("scan_dtype"),
+        chunk_frames=pytestconfig.getoption("scan_chunk_frames"),
+    )
+
+
+@pytest.fixture(scope="session")
+def make_scan(
+    scan_spec: ScanSpec, tmp_path_factory: pytest.TempPathFactory
+) -> Callable[[str], list[Path]]:
+    scans: dict[str, list[Path]] = {}
+
+    def make(compression: str) -> list[Path]:
+        if compression not in scans:
+            scans[compression] = generate_scan(
+                tmp_path_factory.mktemp(compression),
+                replace(scan_spec, compression=compression),
+            )
+        return scans[compression]
+
+    return make
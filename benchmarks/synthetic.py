@@ -0,0 +1,81 @@
+"""A generator of synthetic area detector scans for benchmarking."""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import hdf5plugin
+from h5py import File
+from numpy import dtype, float64, uint8
+from numpy.random import default_rng
+
+#: The hdf5 filter options of each benchmarked compression, by name.
+COMPRESSIONS: dict[str, dict[str, Any]] = {
+    "none": {},
+    "gzip": {"compression": "gzip", "shuffle": True},
+    "bitshuffle": dict(hdf5plugin.Bitshuffle()),
+    "blosc": dict(hdf5plugin.Blosc()),
+    "lz4": dict(hdf5plugin.LZ4()),
+    "zstd": dict(hdf5plugin.Zstd()),
+}
+
+#: The keys of the frames, count times and mask within each synthetic scan file.
+FRAME_KEY, COUNT_TIME_KEY, MASK_KEY = (
+    "entry/data/data",
+    "entry/instrument/detector/count_time",
+    "entry/instrument/detector/pixel_mask",
+)
+
+
+@dataclass(frozen=True)
+class ScanSpec:
+    """The layout of a synthetic area detector scan."""
+
+    files: int = 2
+    frames: int = 64
+    frame_size: int = 256
+    dtype: str = "uint32"
+    chunk_frames: int = 1
+    compression: str = "bitshuffle"
+
+    @property
+    def frame_bytes(self) -> int:
+        """The number of bytes in a single uncompressed frame."""
+        return self.frame_size**2 * dtype(self.dtype).itemsize
+
+
+def generate_scan(directory: Path, spec: ScanSpec, seed: int = 0) -> list[Path]:
+    """Writes a synthetic scan of poisson distributed frames split across files.
+
+    Each file contains a stack of frames, the count time of each frame and a sparse
+    pixel mask, at the keys used by the nexus files written by area detectors.
+
+    Args:
+        directory: The directory in which the scan files are written.
+        spec: The layout of the scan.
+        seed: The seed of the random number generator. Defaults to 0.
+
+    Returns:
+        list[Path]: The paths of the written scan files, in order.
+    """
+    rng = default_rng(seed)
+    shape = (spec.frames, spec.frame_size, spec.frame_size)
+    paths = []
+    for file_idx in range(spec.files):
+        path = directory.joinpath(f"{spec.compression}_{file_idx:05d}.h5")
+        with File(path, "w") as file:
+            file.create_dataset(
+                FRAME_KEY,
+                data=rng.poisson(4.0, shape).astype(spec.dtype),
+                chunks=(spec.chunk_frames, spec.frame_size, spec.frame_size),
+                **COMPRESSIONS[spec.compression],
+            )
+            file.create_dataset(
+                COUNT_TIME_KEY, data=rng.uniform(0.5, 1.5, spec.frames).astype(float64)
+            )
+            file.create_dataset(
+                MASK_KEY,
+                data=(rng.uniform(size=shape[1:]) < 0.01).astype(uint8),
+            )
+        paths.append(path)
+    return paths
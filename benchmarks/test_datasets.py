@@ -0,0 +1,142 @@
+from pathlib import Path
+from typing import Any, Callable
+
+import pytest
+from numpy.random import default_rng
+from pytest_benchmark.fixture import BenchmarkFixture
+from synthetic import COMPRESSIONS, COUNT_TIME_KEY, FRAME_KEY, MASK_KEY, ScanSpec
+
+from ad_denoise.datasets import CrossedDatasets, SimpleHdf5, ZippedDatasets
+from ad_denoise.datasets.area_detector import Hdf5ADImagesDataset
+from ad_denoise.datasets.chunks import DirectChunkReader
+from ad_denoise.datasets.hdf5 import H5Key, H5Path, open_file
+from ad_denoise.datasets.utils import Dim, SizedDataset, get_items
+
+
+def read_epoch(dataset: SizedDataset[Any], batch_size: int) -> None:
+    """Reads every item of a dataset in a shuffled order, in batches."""
+    order = default_rng(0).permutation(len(dataset)).tolist()
+    for start in range(0, len(order), batch_size):
+        get_items(dataset, order[start : start + batch_size])
+
+
+def benchmark_epoch(
+    benchmark: BenchmarkFixture,
+    make_dataset: Callable[[], SizedDataset[Any]],
+    item_bytes: int,
+    batch_size: int = 1,
+) -> None:
+    """Benchmarks an epoch over a freshly created dataset, recording throughput.
+
+    Throughput is not recorded if benchmarking is disabled, as no timings are kept.
+    """
+    items = [0]
+
+    def setup() -> tuple[tuple[SizedDataset[Any], int], dict[str, Any]]:
+        SimpleHdf5._shared.clear()
+        dataset = make_dataset()
+        items[0] = len(dataset)
+        return (dataset, batch_size), {}
+
+    benchmark.pedantic(read_epoch, setup=setup, rounds=3)
+    if benchmark.disabled:
+        return
+    seconds = benchmark.stats.stats.mean
+    benchmark.extra_info["frames_per_second"] = items[0] / seconds
+    benchmark.extra_info["bytes_per_second"] = items[0] * item_bytes / seconds
+    benchmark.extra_info["seconds_per_item"] = seconds / items[0]
+
+
+def frames(paths: list[Path], direct: bool = False) -> SimpleHdf5:
+    return SimpleHdf5(
+        [H5Path(path) for path in paths], H5Key(FRAME_KEY), Dim(2), direct=direct
+    )
+
+
+def require_direct(paths: list[Path]) -> None:
+    if not DirectChunkReader.supports(open_file(H5Path(paths[0]))[FRAME_KEY]):
+        pytest.skip("Codec not installed")
+
+
+@pytest.mark.parametrize("compression", COMPRESSIONS)
+@pytest.mark.parametrize("batch_size", [1, 16])
+def test_simple_hdf5(
+    benchmark: BenchmarkFixture,
+    make_scan: Callable[[str], list[Path]],
+    scan_spec: ScanSpec,
+    compression: str,
+    batch_size: int,
+):
+    paths = make_scan(compression)
+    benchmark_epoch(benchmark, lambda: frames(paths), scan_spec.frame_bytes, batch_size)
+
+
+@pytest.mark.parametrize("compression", COMPRESSIONS)
+def test_simple_hdf5_direct(
+    benchmark: BenchmarkFixture,
+    make_scan: Callable[[str], list[Path]],
+    scan_spec: ScanSpec,
+    compression: str,
+):
+    paths = make_scan(compression)
+    require_direct(paths)
+    benchmark_epoch(
+        benchmark, lambda: frames(paths, direct=True), scan_spec.frame_bytes, 16
+    )
+
+
+def test_zipped_datasets(
+    benchmark: BenchmarkFixture,
+    make_scan: Callable[[str], list[Path]],
+    scan_spec: ScanSpec,
+):
+    paths = make_scan("bitshuffle")
+    benchmark_epoch(
+        benchmark,
+        lambda: ZippedDatasets(
+            frames(paths),
+            SimpleHdf5([H5Path(path) for path in paths], H5Key(COUNT_TIME_KEY), Dim(0)),
+        ),
+        scan_spec.frame_bytes,
+    )
+
+
+def test_crossed_datasets(
+    benchmark: BenchmarkFixture,
+    make_scan: Callable[[str], list[Path]],
+    scan_spec: ScanSpec,
+):
+    paths = make_scan("bitshuffle")
+    benchmark_epoch(
+        benchmark,
+        lambda: CrossedDatasets(
+            frames(paths[:1]),
+            SimpleHdf5([H5Path(paths[0])], H5Key(MASK_KEY), Dim(2), cache_size=1),
+        ),
+        2 * scan_spec.frame_bytes,
+    )
+
+
+@pytest.mark.parametrize("direct", [False, True])
+def test_hdf5_ad_images_dataset(
+    benchmark: BenchmarkFixture,
+    make_scan: Callable[[str], list[Path]],
+    scan_spec: ScanSpec,
+    direct: bool,
+):
+    paths = make_scan("bitshuffle")
+    if direct:
+        require_direct(paths)
+    benchmark_epoch(
+        benchmark,
+        lambda: Hdf5ADImagesDataset(
+            [H5Path(path) for path in paths],
+            H5Key(FRAME_KEY),
+            H5Key(COUNT_TIME_KEY),
+            H5Path(paths[0]),
+            H5Key(MASK_KEY),
+            direct=direct,
+        ),
+        scan_spec.frame_bytes,
+        16,
+    )
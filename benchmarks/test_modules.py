@@ -0,0 +1,80 @@
+from typing import Callable
+
+import pytest
+from pytest_benchmark.fixture import BenchmarkFixture
+from synthetic import ScanSpec
+from torch import Tensor, inference_mode, rand
+from torch.nn import Module, Sequential, ZeroPad2d
+
+from ad_denoise.modules import GaussianKernel2D, ScalarMultiply
+from ad_denoise.modules.blind_conv import BlindConv2D
+from ad_denoise.modules.blind_spot import ShiftedBlindSpotNetwork
+from ad_denoise.modules.gaussian import BlindGaussianKernel2D
+from ad_denoise.modules.shift import MultiShift, Shift
+from ad_denoise.quantize import quantize_network
+
+BATCH_SIZE = 16
+
+MODULES: dict[str, Callable[[], Module]] = {
+    "GaussianKernel2D": lambda: GaussianKernel2D(5, 1.5),
+    "TruncatedGaussianKernel2D": lambda: GaussianKernel2D(5, 0.8, tolerance=1e-3),
+    "BlindGaussianKernel2D": lambda: BlindGaussianKernel2D(5, 1.5),
+    "BlindConv2D": lambda: BlindConv2D(1, 1, 5),
+    "ShiftedBlindSpotNetwork": lambda: ShiftedBlindSpotNetwork(channels=16, depth=3),
+    "ScalarMultiply": lambda: ScalarMultiply(2.0),
+    "Shift": lambda: Shift([(2, 3), (3, -2)]),
+    "MultiShift": lambda: MultiShift([[(2, 1)], [(2, -1)], [(3, 1)], [(3, -1)]]),
+}
+
+
+def record_throughput(benchmark: BenchmarkFixture, input: Tensor) -> None:
+    seconds = benchmark.stats.stats.mean
+    benchmark.extra_info["frames_per_second"] = input.shape[0] / seconds
+    benchmark.extra_info["pixels_per_second"] = input.numel() / seconds
+
+
+@pytest.fixture
+def frames(scan_spec: ScanSpec) -> Tensor:
+    return rand((BATCH_SIZE, 1, scan_spec.frame_size, scan_spec.frame_size))
+
+
+@pytest.mark.parametrize("module", MODULES)
+def test_forward(benchmark: BenchmarkFixture, frames: Tensor, module: str):
+    network = MODULES[module]()
+    benchmark(network, frames)
+    record_throughput(benchmark, frames)
+
+
+@pytest.mark.parametrize("module", MODULES)
+def test_forward_backward(benchmark: BenchmarkFixture, frames: Tensor, module: str):
+    network = MODULES[module]()
+    if not any(parameter.requires_grad for parameter in network.parameters()):
+        frames.requires_grad_()
+
+    def step() -> None:
+        network.zero_grad()
+        network(frames).sum().backward()
+
+    benchmark(step)
+    record_throughput(benchmark, frames)
+
+
+@pytest.mark.filterwarnings(
+    "ignore::DeprecationWarning", "ignore::FutureWarning", "ignore::UserWarning"
+)
+@pytest.mark.parametrize("quantized", [False, True], ids=["float32", "int8"])
+def test_quantized_inference(
+    benchmark: BenchmarkFixture, frames: Tensor, quantized: bool
+):
+    network: Module = Sequential(
+        ZeroPad2d(5), GaussianKernel2D(5, 1.5), ScalarMultiply(2.0)
+    )
+    if quantized:
+        network = quantize_network(network, [frames])
+
+    def step() -> None:
+        with inference_mode():
+            network(frames)
+
+    benchmark(step)
+    record_throughput(benchmark, frames)
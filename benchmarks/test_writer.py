@@ -0,0 +1,87 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+from h5py import File
+from numpy import float32, ndarray
+from numpy.random import default_rng
+from pytest_benchmark.fixture import BenchmarkFixture
+from synthetic import ScanSpec
+
+from ad_denoise.datasets.hdf5 import H5Key
+from ad_denoise.writer import COMPRESSIONS, ENCODERS, DirectChunkWriter
+
+BATCH_SIZE = 16
+
+
+@pytest.fixture
+def denoised(scan_spec: ScanSpec) -> ndarray:
+    shape = (scan_spec.frames, scan_spec.frame_size, scan_spec.frame_size)
+    return default_rng(0).gamma(4.0, size=shape).astype(float32)
+
+
+def record_throughput(benchmark: BenchmarkFixture, frames: ndarray) -> None:
+    if benchmark.disabled:
+        return
+    seconds = benchmark.stats.stats.mean
+    benchmark.extra_info["frames_per_second"] = len(frames) / seconds
+    benchmark.extra_info["bytes_per_second"] = frames.nbytes / seconds
+
+
+@pytest.mark.parametrize("compression", COMPRESSIONS)
+@pytest.mark.parametrize("scale", [None, 1e-3], ids=["float32", "scaled"])
+def test_direct_chunk_writer(
+    benchmark: BenchmarkFixture,
+    tmp_path: Path,
+    denoised: ndarray,
+    compression: str,
+    scale: float,
+):
+    if COMPRESSIONS[compression] not in ENCODERS:
+        pytest.skip("Codec not installed")
+    executor = ThreadPoolExecutor(4)
+
+    def write() -> None:
+        with File(tmp_path.joinpath("out.h5"), "w") as file:
+            writer = DirectChunkWriter(
+                file,
+                H5Key("data"),
+                denoised.shape,
+                float32 if scale is None else "uint16",
+                executor,
+                compression,
+                scale=scale,
+            )
+            for start in range(0, len(denoised), BATCH_SIZE):
+                writer.write(denoised[start : start + BATCH_SIZE])
+            writer.close()
+
+    benchmark.pedantic(write, rounds=3)
+    executor.shutdown()
+    record_throughput(benchmark, denoised)
+
+
+@pytest.mark.parametrize("compression", COMPRESSIONS)
+def test_h5py_writer(
+    benchmark: BenchmarkFixture, tmp_path: Path, denoised: ndarray, compression: str
+):
+    if COMPRESSIONS[compression] not in ENCODERS:
+        pytest.skip("Codec not installed")
+    options = ENCODERS[COMPRESSIONS[compression]][0]
+
+    def write() -> None:
+        with File(tmp_path.joinpath("out.h5"), "w") as file:
+            dataset = file.create_dataset(
+                "data",
+                denoised.shape,
+                float32,
+                chunks=(1, *denoised.shape[1:]),
+                **options,
+            )
+            for start in range(0, len(denoised), BATCH_SIZE):
+                dataset[start : start + BATCH_SIZE] = denoised[
+                    start : start + BATCH_SIZE
+                ]
+
+    benchmark.pedantic(write, rounds=3)
+    record_throughput(benchmark, denoised)
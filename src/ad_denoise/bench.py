@@ -0,0 +1,257 @@
+from dataclasses import dataclass, replace
+from os import getpid
+from threading import Event, Thread
+from time import perf_counter
+from types import TracebackType
+from typing import Any, Optional, Sequence
+
+from pytorch_lightning import Callback, LightningModule, Trainer
+from torch import Tensor, cuda
+
+from ad_denoise.loaders import DataLoaderConfig
+from ad_denoise.memory import tree_rss
+from ad_denoise.train import TrainConfig
+
+#: The fields of data loader configs which set the number of parallel workers.
+WORKER_FIELDS = ("num_workers", "num_threads")
+
+
+@dataclass
+class BenchResult:
+    """The throughput of a number of timed training steps."""
+
+    batch_size: Optional[int]
+    workers: Optional[int]
+    steps: int
+    samples: int
+    pixels: int
+    data_seconds: float
+    compute_seconds: float
+    peak_rss_bytes: int
+
+    @property
+    def samples_per_second(self) -> float:
+        """The number of samples trained on per second of wall time."""
+        return self.samples / (self.data_seconds + self.compute_seconds)
+
+    @property
+    def pixels_per_second(self) -> float:
+        """The number of pixels trained on per second of wall time."""
+        return self.pixels / (self.data_seconds + self.compute_seconds)
+
+
+class PeakRssSampler:
+    """A context manager which samples the peak resident set size of this process tree.
+
+    A context manager which periodically samples the resident set size of this process
+    and its descendants, such as data loader workers, in a background thread.
+    """
+
+    def __init__(self, interval: float = 0.05) -> None:
+        """Creates a context manager which samples the peak resident set size.
+
+        Args:
+            interval: The period between samples, in seconds. Defaults to 0.05.
+        """
+        self.interval = interval
+        self.peak = 0
+        self._done = Event()
+        self._thread = Thread(target=self._sample, daemon=True)
+
+    def _sample(self) -> None:
+        while True:
+            self.peak = max(self.peak, tree_rss(getpid()))
+            if self._done.wait(self.interval):
+                return
+
+    def __enter__(self) -> "PeakRssSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self._done.set()
+        self._thread.join()
+
+
+def _leading_tensor(batch: Any) -> Tensor:
+    while not isinstance(batch, Tensor):
+        batch = batch[0]
+    return batch
+
+
+class ThroughputCallback(Callback):
+    """A lightning callback which times the wait for data and the training steps.
+
+    A lightning callback which accumulates the time spent waiting for each batch, from
+    the end of the previous step, and the time spent in each step, from the arrival of
+    its batch, along with the number of samples and pixels trained on. The first
+    warmup steps are excluded.
+    """
+
+    def __init__(self, warmup: int = 0) -> None:
+        """Creates a lightning callback which times data waits and training steps.
+
+        Args:
+            warmup: The number of initial steps excluded from timing. Defaults to 0.
+        """
+        self.warmup = warmup
+        self.steps = 0
+        self.samples = 0
+        self.pixels = 0
+        self.data_seconds = 0.0
+        self.compute_seconds = 0.0
+        self._mark = 0.0
+
+    def _synchronize(self) -> float:
+        if cuda.is_available():
+            cuda.synchronize()
+        return perf_counter()
+
+    def on_train_epoch_start(
+        self, trainer: Trainer, pl_module: LightningModule
+    ) -> None:
+        """Marks the start of the wait for the first batch of the epoch."""
+        self._mark = self._synchronize()
+
+    def on_train_batch_start(
+        self, trainer: Trainer, pl_module: LightningModule, batch: Any, batch_idx: int
+    ) -> None:
+        """Accumulates the wait for the batch, once past the warmup steps."""
+        now = self._synchronize()
+        if trainer.global_step >= self.warmup:
+            self.data_seconds += now - self._mark
+        self._mark = now
+
+    def on_train_batch_end(
+        self,
+        trainer: Trainer,
+        pl_module: LightningModule,
+        outputs: Any,
+        batch: Any,
+        batch_idx: int,
+    ) -> None:
+        """Accumulates the compute of the batch and its size, once past the warmup."""
+        now = self._synchronize()
+        if trainer.global_step > self.warmup:
+            tensor = _leading_tensor(batch)
+            self.steps += 1
+            self.samples += tensor.shape[0]
+            self.pixels += tensor.numel()
+            self.compute_seconds += now - self._mark
+        self._mark = now
+
+
+def with_loader(
+    config: TrainConfig, batch_size: Optional[int], workers: Optional[int]
+) -> TrainConfig:
+    """Copies a training config, replacing the batch size and workers of its loader.
+
+    Args:
+        config: The training configuration, of a model with a train_loader.
+        batch_size: The number of samples in each batch, if None it is unchanged.
+        workers: The number of parallel loader workers, if None it is unchanged.
+
+    Returns:
+        TrainConfig: A copy of the training configuration.
+
+    Raises:
+        ValueError: If the model does not have a configurable train_loader.
+    """
+    loader = getattr(config.model, "train_loader", None)
+    if not isinstance(loader, DataLoaderConfig):
+        raise ValueError(f"{type(config.model).__name__} has no train_loader.")
+    changes: dict[str, int] = {}
+    if batch_size is not None:
+        changes["batch_size"] = batch_size
+    if workers is not None:
+        changes.update(
+            {name: workers for name in WORKER_FIELDS if hasattr(loader, name)}
+        )
+    train_loader = replace(loader, **changes)
+    model = replace(config.model, train_loader=train_loader)  # type: ignore
+    return replace(config, model=model)
+
+
+def bench(
+    config: TrainConfig,
+    steps: int,
+    warmup: int = 2,
+    batch_size: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> BenchResult:
+    """Times a number of training steps of the configured model.
+
+    Times a number of training steps of the configured model, without validation,
+    logging or checkpointing, separating the time spent waiting for data from the time
+    spent in the training step and sampling the peak memory of the process tree.
+
+    Args:
+        config: The training configuration.
+        steps: The number of timed training steps.
+        warmup: The number of initial steps excluded from timing. Defaults to 2.
+        batch_size: The number of samples in each batch, if None the configured batch
+            size is used. Defaults to None.
+        workers: The number of parallel loader workers, if None the configured number
+            is used. Defaults to None.
+
+    Returns:
+        BenchResult: The throughput of the timed training steps.
+    """
+    if batch_size is not None or workers is not None:
+        config = with_loader(config, batch_size, workers)
+    throughput = ThroughputCallback(warmup)
+    trainer = Trainer(
+        max_steps=warmup + steps,
+        limit_val_batches=0,
+        accelerator=config.accelerator,
+        logger=False,
+        enable_checkpointing=False,
+        enable_progress_bar=False,
+        enable_model_summary=False,
+        callbacks=[throughput],
+    )
+    with PeakRssSampler() as rss:
+        trainer.fit(config.model())
+    return BenchResult(
+        batch_size,
+        workers,
+        throughput.steps,
+        throughput.samples,
+        throughput.pixels,
+        throughput.data_seconds,
+        throughput.compute_seconds,
+        rss.peak,
+    )
+
+
+def sweep(
+    config: TrainConfig,
+    steps: int,
+    warmup: int = 2,
+    batch_sizes: Sequence[Optional[int]] = (None,),
+    workers: Sequence[Optional[int]] = (None,),
+) -> list[BenchResult]:
+    """Times training steps of the configured model for each loader setting.
+
+    Args:
+        config: The training configuration.
+        steps: The number of timed training steps for each setting.
+        warmup: The number of initial steps excluded from timing. Defaults to 2.
+        batch_sizes: The batch sizes to be swept, where None is the configured batch
+            size. Defaults to (None,).
+        workers: The numbers of parallel loader workers to be swept, where None is the
+            configured number. Defaults to (None,).
+
+    Returns:
+        list[BenchResult]: The throughput for each pair of batch size and workers.
+    """
+    return [
+        bench(config, steps, warmup, batch_size, worker_count)
+        for batch_size in batch_sizes
+        for worker_count in workers
+    ]
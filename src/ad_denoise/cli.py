@@ -1,16 +1,21 @@
-from dataclasses import dataclass
-from os import getcwd
 from pathlib import Path
+from typing import Any, Optional, Sequence
 
 import click
-from pytorch_lightning import Trainer
-from pytorch_lightning.loggers import TensorBoardLogger
-
-from ad_denoise.lightning_modules import LightningModuleConfig
-from ad_denoise.utils import load_config
 
 from . import __version__
 
+# Subcommands import their dependencies on invocation, such that the heavy imports of
+# torch, pytorch lightning and h5py are not paid by --help, --version or other commands
+
+
+def __getattr__(name: str) -> Any:
+    if name == "TrainConfig":
+        from ad_denoise.train import TrainConfig
+
+        return TrainConfig
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 @click.group(invoke_without_command=True)
 @click.version_option(version=__version__, message="%(version)s")
@@ -25,24 +30,244 @@ def main(ctx: click.Context) -> None:
         click.echo(main.get_help(ctx))
 
 
-@dataclass
-class TrainConfig:
-    """A configuration schema for network training."""
+@main.command(help="Train a model on the given datasets")
+@click.argument("config_file", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--checkpoint",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="The path of a checkpoint, by default last.ckpt if checkpointing by steps.",
+)
+def train(config_file: Path, checkpoint: Optional[Path]) -> None:  # noqa: D103
+    from ad_denoise.train import TrainConfig
+    from ad_denoise.train import train as train_model
+    from ad_denoise.utils import load_config
 
-    name: str
-    model: LightningModuleConfig
-    max_epochs: int
+    train_model(
+        load_config(config_file, TrainConfig),
+        None if checkpoint is None else Path(checkpoint),
+    )
 
 
-@main.command(help="Train a model on the given datasets")
+@main.command(help="Fit a Gaussian network in a single pass of its training data")
 @click.argument("config_file", type=click.Path(exists=True, dir_okay=False))
-def train(config_file: Path) -> None:  # noqa: D103
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False),
+    help="The path of the checkpoint, by default fit.ckpt in the logs of the model.",
+)
+def fit(config_file: Path, output: Optional[Path]) -> None:  # noqa: D103
+    from os import getcwd
+
+    from ad_denoise.fit import fit as fit_model
+    from ad_denoise.train import TrainConfig
+    from ad_denoise.utils import load_config
+
     config = load_config(config_file, TrainConfig)
-    logger = TensorBoardLogger(str(Path(getcwd()).joinpath("logs")), config.name)
-    trainer = Trainer(
-        max_epochs=config.max_epochs,
-        log_every_n_steps=1,
-        accelerator="auto",
-        logger=logger,
+    output = output or Path(getcwd()).joinpath("logs", config.name, "fit.ckpt")
+    result = fit_model(config, output)
+    click.echo(f"stdev: {result.stdev:.6g}, scalar: {result.scalar:.6g}")
+    click.echo(f"loss: {result.loss:.6g}, saved to {output}")
+
+
+@main.command(help="Quantize a trained network to int8 for cpu inference")
+@click.argument("config_file", type=click.Path(exists=True, dir_okay=False))
+@click.argument("checkpoint", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False),
+    help="The path of the quantized network, by default beside the checkpoint.",
+)
+@click.option(
+    "--frames",
+    default=64,
+    show_default=True,
+    help="The number of frames sampled for calibration and for comparison.",
+)
+@click.option(
+    "--backend", default="x86", show_default=True, help="The quantized engine."
+)
+def quantize(
+    config_file: Path,
+    checkpoint: Path,
+    output: Optional[Path],
+    frames: int,
+    backend: str,
+) -> None:  # noqa: D103
+    from ad_denoise.quantize import quantize as quantize_network
+    from ad_denoise.train import TrainConfig
+    from ad_denoise.utils import load_config
+
+    output = output or Path(checkpoint).with_suffix(".int8.pt")
+    report = quantize_network(
+        load_config(config_file, TrainConfig),
+        checkpoint,
+        output,
+        frames,
+        backend=backend,
+    )
+    click.echo(f"float loss: {report.float_loss:.6g}")
+    click.echo(f"quantized loss: {report.quantized_loss:.6g}")
+    click.echo(
+        f"output mse: {report.output_mse:.6g}, max error: {report.max_error:.6g}"
+    )
+    click.echo(f"psnr: {report.psnr:.2f} dB, saved to {output}")
+
+
+def _int_list(
+    ctx: click.Context, param: click.Parameter, value: Optional[str]
+) -> Sequence[Optional[int]]:
+    if value is None:
+        return (None,)
+    try:
+        return [int(item) for item in value.split(",")]
+    except ValueError:
+        raise click.BadParameter("Must be a comma separated list of integers.")
+
+
+@main.command(help="Benchmark the training throughput of a configured model")
+@click.argument("config_file", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--steps", default=50, show_default=True, help="The number of timed steps."
+)
+@click.option(
+    "--warmup",
+    default=2,
+    show_default=True,
+    help="The number of initial steps excluded from timing.",
+)
+@click.option(
+    "--batch-size",
+    "batch_sizes",
+    callback=_int_list,
+    help="A comma separated list of batch sizes to sweep.",
+)
+@click.option(
+    "--workers",
+    callback=_int_list,
+    help="A comma separated list of numbers of loader workers to sweep.",
+)
+def bench(
+    config_file: Path,
+    steps: int,
+    warmup: int,
+    batch_sizes: Sequence[Optional[int]],
+    workers: Sequence[Optional[int]],
+) -> None:  # noqa: D103
+    from ad_denoise.bench import sweep
+    from ad_denoise.train import TrainConfig
+    from ad_denoise.utils import load_config
+
+    results = sweep(
+        load_config(config_file, TrainConfig), steps, warmup, batch_sizes, workers
     )
-    trainer.fit(config.model())
+    click.echo(
+        f"{'batch':>6} {'workers':>8} {'data s':>9} {'compute s':>10}"
+        f" {'samples/s':>10} {'pixels/s':>11} {'peak rss MiB':>13}"
+    )
+    for result in results:
+        click.echo(
+            f"{result.batch_size or '-':>6} {result.workers or '-':>8}"
+            f" {result.data_seconds:9.3f} {result.compute_seconds:10.3f}"
+            f" {result.samples_per_second:10.1f} {result.pixels_per_second:11.3e}"
+            f" {result.peak_rss_bytes / 2**20:13.1f}"
+        )
+
+
+@main.command(help="Estimate the peak memory of training a configured model")
+@click.argument("config_file", type=click.Path(exists=True, dir_okay=False))
+def memory(config_file: Path) -> None:  # noqa: D103
+    from ad_denoise.preflight import estimate_memory
+    from ad_denoise.train import TrainConfig
+    from ad_denoise.utils import load_config
+
+    estimate = estimate_memory(load_config(config_file, TrainConfig))
+    click.echo(f"Processes: {estimate.processes}")
+    for component, size in estimate.components.items():
+        click.echo(f"{component:>20}: {size / 2**20:10.1f} MiB")
+    click.echo(f"{'total':>20}: {estimate.total / 2**20:10.1f} MiB")
+
+
+@main.command(help="Denoise frames with a trained network across processes")
+@click.argument("config_file", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--processes",
+    type=int,
+    help="The number of worker processes, overriding the configuration.",
+)
+def denoise(config_file: Path, processes: Optional[int]) -> None:  # noqa: D103
+    from ad_denoise.denoise import DenoiseConfig
+    from ad_denoise.denoise import denoise as denoise_frames
+    from ad_denoise.utils import load_config
+
+    config = load_config(config_file, DenoiseConfig)
+    paths = denoise_frames(
+        config, processes, lambda path: click.echo(f"Denoised {path.name}")
+    )
+    click.echo(f"Stitched {len(paths)} shards into {config.output}")
+
+
+@main.command(help="Compute the statistics of a dataset across processes")
+@click.argument("config_file", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--processes",
+    type=int,
+    help="The number of worker processes, overriding the configuration.",
+)
+def stats(config_file: Path, processes: Optional[int]) -> None:  # noqa: D103
+    from ad_denoise.stats import StatsConfig, compute_statistics
+    from ad_denoise.utils import load_config
+
+    config = load_config(config_file, StatsConfig)
+    statistics = compute_statistics(config, processes)
+    click.echo(f"Frames: {statistics.frames}")
+    click.echo(f"Range: {statistics.minimum:.6g} to {statistics.maximum:.6g}")
+    click.echo(
+        f"Beyond histogram: {statistics.underflow} below, {statistics.overflow} above"
+    )
+    click.echo(f"Wrote statistics to {config.output}")
+
+
+@main.command(help="Serve a trained network, batching concurrent requests")
+@click.argument("config_file", type=click.Path(exists=True, dir_okay=False))
+@click.option("--host", help="The address to listen on, overriding the configuration.")
+@click.option(
+    "--port", type=int, help="The port to listen on, overriding the configuration."
+)
+def serve(
+    config_file: Path, host: Optional[str], port: Optional[int]
+) -> None:  # noqa: D103
+    from ad_denoise.serve import ServeConfig, create_server
+    from ad_denoise.utils import load_config
+
+    server = create_server(load_config(config_file, ServeConfig), host, port)
+    click.echo("Serving on {}:{}".format(*server.server_address))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.batcher.close()
+    for name, value in server.batcher.metrics.snapshot().items():
+        click.echo(f"{name:>20}: {value:.3f}")
+
+
+@main.command(help="Build a virtual dataset concatenating frames from many files")
+@click.argument("output", type=click.Path(dir_okay=False))
+@click.argument("key")
+@click.argument(
+    "paths", nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False)
+)
+@click.option(
+    "--dimensions",
+    default=2,
+    show_default=True,
+    help="The trailing dimensionality of each frame.",
+)
+def vds(
+    output: Path, key: str, paths: tuple[Path, ...], dimensions: int
+) -> None:  # noqa: D103
+    from ad_denoise.datasets.virtual import build_virtual_dataset
+
+    build_virtual_dataset(paths, key, output, dimensions)
@@ -10,7 +10,11 @@ from .collated import (
 from .computed import ComputedFramesDataset
 from .config import SizedDatasetConfig
 from .hdf5 import SimpleHdf5, SizedDatasetConfig
+from .index import Hdf5Index
+from .read_ahead import ReadAheadDataset, ReadAheadSampler
 from .repeating import RepeatingDataset
+from .resumable import ResumableSampler, resumable_sampler
+from .sharded import ShardedSampler, dataset_edges, sharded_sampler, split_shards
 from .utils import Dim, SizedDataset
 
 __all__ = [
@@ -25,7 +29,16 @@ __all__ = [
     "SizedDatasetConfig",
     "SimpleHdf5",
     "SizedDatasetConfig",
+    "Hdf5Index",
+    "ReadAheadDataset",
+    "ReadAheadSampler",
     "RepeatingDataset",
+    "ResumableSampler",
+    "resumable_sampler",
+    "ShardedSampler",
+    "dataset_edges",
+    "sharded_sampler",
+    "split_shards",
     "Dim",
     "SizedDataset",
 ]
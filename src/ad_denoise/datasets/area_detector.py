@@ -1,5 +1,6 @@
 from dataclasses import dataclass
-from typing import cast
+from pathlib import Path
+from typing import Optional, Sequence, cast
 
 from torch import Tensor
 
@@ -22,9 +23,14 @@ class Hdf5ADImagesDataset(SizedDataset[Tensor]):
         count_times_key: H5Key,
         mask_path: H5Path,
         mask_key: H5Key,
+        index: Optional[Path] = None,
+        direct: bool = False,
     ) -> None:
         """Creates a high level dataset of masked, normalized frames from hdf5.
 
+        Sources are shared with all other datasets reading the same paths and keys, such
+        that files are opened and the mask is read only once per dataset tree.
+
         Args:
             data_paths: A sequence of paths to hdf5 files containing frames and count
                 times.
@@ -33,11 +39,20 @@ class Hdf5ADImagesDataset(SizedDataset[Tensor]):
                 files.
             mask_path (H5Path): The path to a file containing the frame mask.
             mask_key (H5Key): The key which locates the frame mask within the hdf5 file.
+            index: The path to a metadata index sidecar file for the data paths, which
+                is created if it does not exist. Defaults to None.
+            direct: If True, frames are read by parallel direct chunk decompression.
+                Defaults to False.
         """
-        frames_dataset = SimpleHdf5(data_paths, frame_key, Dim(2))
-        frame_times_dataset = SimpleHdf5(data_paths, count_times_key, Dim(0))
+        frames_dataset = SimpleHdf5.shared(
+            data_paths, frame_key, Dim(2), index=index, direct=direct
+        )
+        frame_times_dataset = SimpleHdf5.shared(
+            data_paths, count_times_key, Dim(0), index=index
+        )
         mask_dataset = RepeatingDataset(
-            SimpleHdf5((mask_path,), mask_key, Dim(2)), len(frames_dataset)
+            SimpleHdf5.shared((mask_path,), mask_key, Dim(2), cache_size=1),
+            len(frames_dataset),
         )
         self.dataset = ComputedFramesDataset(
             cast(
@@ -61,6 +76,9 @@ class Hdf5ADImagesDataset(SizedDataset[Tensor]):
     def __getitem__(self, index: int) -> Tensor:
         return self.dataset[index]
 
+    def __getitems__(self, indices: Sequence[int]) -> list[Tensor]:
+        return self.dataset.__getitems__(indices)
+
 
 @dataclass
 class Hdf5ADImagesDatasetConfig(SizedDatasetConfig[Tensor]):
@@ -72,6 +90,8 @@ class Hdf5ADImagesDatasetConfig(SizedDatasetConfig[Tensor]):
     count_times_key: H5Key
     mask_path: H5Path
     mask_key: H5Key
+    index: Optional[Path] = None
+    direct: bool = False
 
     def __call__(self) -> SizedDataset[Tensor]:  # noqa: D102
         return Hdf5ADImagesDataset(
@@ -80,4 +100,6 @@ class Hdf5ADImagesDatasetConfig(SizedDatasetConfig[Tensor]):
             self.count_times_key,
             self.mask_path,
             self.mask_key,
+            self.index,
+            self.direct,
         )
@@ -0,0 +1,279 @@
+import zlib
+from concurrent.futures import Executor
+from itertools import product
+from math import prod
+from typing import Callable, Sequence, cast
+
+from h5py import Dataset
+from numpy import dtype, empty, frombuffer, ndarray, uint8, unravel_index
+
+from ad_denoise.timing import Stage, timed
+
+from .utils import LruCache
+
+try:
+    import bitshuffle
+except ImportError:  # pragma: no cover
+    bitshuffle = None  # type: ignore
+try:
+    import blosc2
+except ImportError:  # pragma: no cover
+    blosc2 = None  # type: ignore
+try:
+    import lz4.block
+except ImportError:  # pragma: no cover
+    lz4 = None  # type: ignore
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None  # type: ignore
+
+#: A function which reverses a hdf5 filter, given the filtered bytes, the filter
+#: client data values and the size of the unfiltered chunk in bytes.
+ChunkDecoder = Callable[[bytes, tuple[int, ...], int], bytes]
+
+#: The hdf5 filter ids of the standard deflate, shuffle and fletcher32 filters.
+DEFLATE_ID, SHUFFLE_ID, FLETCHER32_ID = 1, 2, 3
+#: The hdf5 filter ids of the hdf5plugin blosc, lz4, bitshuffle and zstd filters.
+BLOSC_ID, LZ4_ID, BSHUF_ID, ZSTD_ID = 32001, 32004, 32008, 32015
+#: The compressions of the bitshuffle filter, as its fifth client data value.
+BSHUF_NONE, BSHUF_LZ4, BSHUF_ZSTD = 0, 2, 3
+
+
+def _inflate(data: bytes, cd_values: tuple[int, ...], nbytes: int) -> bytes:
+    return zlib.decompress(data)
+
+
+def _unshuffle(data: bytes, cd_values: tuple[int, ...], nbytes: int) -> bytes:
+    itemsize = cd_values[0] if cd_values else 1
+    shuffled = len(data) - len(data) % itemsize
+    unshuffled = frombuffer(data, uint8, shuffled).reshape(itemsize, -1).T.tobytes()
+    return unshuffled + data[shuffled:]
+
+
+def _strip_checksum(data: bytes, cd_values: tuple[int, ...], nbytes: int) -> bytes:
+    return data[:-4]
+
+
+def _bitunshuffle(data: bytes, cd_values: tuple[int, ...], nbytes: int) -> bytes:
+    itemsize = cd_values[2]
+    compression = cd_values[4] if len(cd_values) > 4 else BSHUF_NONE
+    if compression == BSHUF_NONE:
+        block_size = cd_values[3] if len(cd_values) > 3 else 0
+        return bitshuffle.bitunshuffle(
+            frombuffer(data, dtype(f"V{itemsize}")), block_size
+        ).tobytes()
+    if compression == BSHUF_LZ4:
+        decompress = bitshuffle.decompress_lz4
+    elif compression == BSHUF_ZSTD:
+        decompress = bitshuffle.decompress_zstd
+    else:
+        raise ValueError(f"Unknown bitshuffle compression {compression}.")
+    return decompress(
+        frombuffer(data, uint8, offset=12),
+        (nbytes // itemsize,),
+        dtype(f"V{itemsize}"),
+        int.from_bytes(data[8:12], "big") // itemsize,
+    ).tobytes()
+
+
+def _blosc(data: bytes, cd_values: tuple[int, ...], nbytes: int) -> bytes:
+    return blosc2.decompress(data)
+
+
+def _lz4(data: bytes, cd_values: tuple[int, ...], nbytes: int) -> bytes:
+    total = int.from_bytes(data[:8], "big")
+    block_size = int.from_bytes(data[8:12], "big")
+    blocks: list[bytes] = []
+    offset = 12
+    while offset < len(data):
+        expected = min(block_size, total - block_size * len(blocks))
+        length = int.from_bytes(data[offset : offset + 4], "big")
+        block = data[offset + 4 : offset + 4 + length]
+        blocks.append(
+            block
+            if length == expected
+            else lz4.block.decompress(block, uncompressed_size=expected)
+        )
+        offset += 4 + length
+    return b"".join(blocks)
+
+
+def _zstd(data: bytes, cd_values: tuple[int, ...], nbytes: int) -> bytes:
+    return zstandard.ZstdDecompressor().decompress(data, max_output_size=nbytes)
+
+
+#: Decoders for hdf5 filters, by filter id, extended by any installed codecs.
+DECODERS: dict[int, ChunkDecoder] = {
+    DEFLATE_ID: _inflate,
+    SHUFFLE_ID: _unshuffle,
+    FLETCHER32_ID: _strip_checksum,
+}
+if bitshuffle is not None:
+    DECODERS[BSHUF_ID] = _bitunshuffle
+if blosc2 is not None:
+    DECODERS[BLOSC_ID] = _blosc
+if lz4 is not None:
+    DECODERS[LZ4_ID] = _lz4
+if zstandard is not None:
+    DECODERS[ZSTD_ID] = _zstd
+
+
+class DirectChunkReader:
+    """A reader which decompresses raw hdf5 chunks in parallel across threads.
+
+    A reader which fetches raw compressed chunks from a hdf5 dataset, bypassing the
+    hdf5 filter pipeline, and reverses the filters in a thread pool, such that
+    decompression, which releases the global interpreter lock, scales across cores.
+    Decompressed chunks are retained in a least recently used cache.
+    """
+
+    def __init__(
+        self,
+        dataset: Dataset,
+        frame_dims: int,
+        executor: Executor,
+        cache_size: int = 16,
+    ) -> None:
+        """Creates a reader which decompresses raw hdf5 chunks in parallel.
+
+        Args:
+            dataset: A readable, chunked hdf5 dataset object, with only filters
+                supported by the installed decoders.
+            frame_dims: The trailing dimensionality of the frame.
+            executor: The thread pool in which chunks are decompressed, which may be
+                shared between readers.
+            cache_size: The number of decompressed chunks to retain. Defaults to 16.
+        """
+        self.dataset = dataset
+        self.frame_dims = frame_dims
+        self.chunks: tuple[int, ...] = dataset.chunks
+        self.filters = DirectChunkReader.get_filters(dataset)
+        self.executor = executor
+        self.cache: LruCache[tuple[int, ...], ndarray] = LruCache(cache_size)
+
+    @staticmethod
+    def get_filters(dataset: Dataset) -> list[tuple[int, tuple[int, ...]]]:
+        """Gets the filter pipeline of a dataset.
+
+        Args:
+            dataset: A readable hdf5 dataset object.
+
+        Returns:
+            list[tuple[int, tuple[int, ...]]]: The id and client data values of each
+                filter, in the order in which they are applied when writing.
+        """
+        plist = dataset.id.get_create_plist()
+        return [
+            (plist.get_filter(idx)[0], tuple(plist.get_filter(idx)[2]))
+            for idx in range(plist.get_nfilters())
+        ]
+
+    @staticmethod
+    def supports(dataset: Dataset) -> bool:
+        """Checks whether a dataset can be read by direct chunk decompression.
+
+        Args:
+            dataset: A readable hdf5 dataset object.
+
+        Returns:
+            bool: True if the dataset is chunked and all of its filters are supported.
+        """
+        return (
+            dataset.chunks is not None
+            and not dataset.is_virtual
+            and all(
+                filter_id in DECODERS
+                for filter_id, _ in DirectChunkReader.get_filters(dataset)
+            )
+        )
+
+    def _decode(
+        self, offset: tuple[int, ...], filter_mask: int, data: bytes
+    ) -> ndarray:
+        nbytes = prod(self.chunks) * self.dataset.dtype.itemsize
+        with timed(Stage.DECOMPRESS):
+            for idx, (filter_id, cd_values) in reversed(list(enumerate(self.filters))):
+                if not filter_mask & (1 << idx):
+                    data = DECODERS[filter_id](data, cd_values, nbytes)
+        return frombuffer(data, self.dataset.dtype, prod(self.chunks)).reshape(
+            self.chunks
+        )
+
+    def read_chunks(self, offsets: Sequence[tuple[int, ...]]) -> list[ndarray]:
+        """Reads and decompresses chunks, in parallel, by their offsets.
+
+        Args:
+            offsets: The offsets of the first element of each chunk in the dataset.
+
+        Returns:
+            list[ndarray]: The decompressed chunks, each of the dataset chunk shape.
+        """
+        chunks = {offset: self.cache.get(offset) for offset in offsets}
+        missing = [offset for offset, chunk in chunks.items() if chunk is None]
+        with timed(Stage.CHUNK_READ):
+            raw = [self.dataset.id.read_direct_chunk(offset) for offset in missing]
+        decoded = self.executor.map(
+            lambda args: self._decode(*args),
+            ((offset, *chunk) for offset, chunk in zip(missing, raw)),
+        )
+        for offset, chunk in zip(missing, decoded):
+            chunks[offset] = chunk
+            self.cache.put(offset, chunk)
+        return [cast(ndarray, chunks[offset]) for offset in offsets]
+
+    def read_frames(self, idxs: Sequence[int]) -> ndarray:
+        """Reads frames of dimensionality frame_dims by their linearised indices.
+
+        Args:
+            idxs: The linearised indices of frames in the dataset.
+
+        Returns:
+            ndarray: An array of the frames stacked along a leading axis.
+        """
+        shape = self.dataset.shape
+        leading_dims = len(shape) - self.frame_dims
+        frame_shape = shape[leading_dims:]
+        tiles = list(
+            product(
+                *(
+                    range(0, length, size)
+                    for length, size in zip(frame_shape, self.chunks[leading_dims:])
+                )
+            )
+        )
+        positions = [
+            tuple(int(coord) for coord in unravel_index(idx, shape[:leading_dims]))
+            for idx in idxs
+        ]
+        offsets = [
+            (
+                *(
+                    coord - coord % size
+                    for coord, size in zip(position, self.chunks[:leading_dims])
+                ),
+                *tile,
+            )
+            for position in positions
+            for tile in tiles
+        ]
+        chunks = iter(self.read_chunks(offsets))
+        frames = empty((len(idxs), *frame_shape), self.dataset.dtype)
+        for frame_idx, position in enumerate(positions):
+            for tile in tiles:
+                chunk = next(chunks)[
+                    tuple(
+                        coord % size
+                        for coord, size in zip(position, self.chunks[:leading_dims])
+                    )
+                ]
+                region = tuple(
+                    slice(start, min(start + size, length))
+                    for start, size, length in zip(
+                        tile, self.chunks[leading_dims:], frame_shape
+                    )
+                )
+                frames[(frame_idx, *region)] = chunk[  # type: ignore
+                    tuple(slice(0, part.stop - part.start) for part in region)
+                ]
+        return frames
@@ -2,12 +2,12 @@ import operator
 from dataclasses import dataclass
 from itertools import accumulate, chain
 from math import prod
-from typing import Any, TypeVar, cast
+from typing import Any, Sequence, TypeVar, cast
 
 from more_itertools import take
 
 from .config import SizedDatasetConfig
-from .utils import SizedDataset
+from .utils import SizedDataset, get_items
 
 
 class ZippedDatasets(SizedDataset[tuple[Any, ...]]):
@@ -43,6 +43,11 @@ class ZippedDatasets(SizedDataset[tuple[Any, ...]]):
             raise IndexError
         return tuple(dataset[idx] for dataset in self.datasets)
 
+    def __getitems__(self, indices: Sequence[int]) -> list[tuple[Any, ...]]:
+        if any(idx >= len(self) for idx in indices):
+            raise IndexError
+        return list(zip(*(get_items(dataset, indices) for dataset in self.datasets)))
+
 
 @dataclass
 class ZippedDatasetsConfig(SizedDatasetConfig[tuple[Any, ...]]):
@@ -87,6 +92,9 @@ class InputTargetDataset(SizedDataset[tuple[T1, T2]]):
     def __getitem__(self, idx: int) -> tuple[T1, T2]:
         return cast(tuple[T1, T2], self.dataset[idx])
 
+    def __getitems__(self, indices: Sequence[int]) -> list[tuple[T1, T2]]:
+        return cast(list[tuple[T1, T2]], get_items(self.dataset, indices))
+
 
 @dataclass
 class InputTargetDatasetConfig(SizedDatasetConfig[tuple[T1, T2]]):
@@ -140,6 +148,20 @@ class CrossedDatasets(SizedDataset[tuple[Any, ...]]):
             for dataset, edge in zip(self.datasets, self.edges)
         )
 
+    def __getitems__(self, indices: Sequence[int]) -> list[tuple[Any, ...]]:
+        if any(idx >= len(self) for idx in indices):
+            raise IndexError
+        return list(
+            zip(
+                *(
+                    get_items(
+                        dataset, [(idx // edge) % len(dataset) for idx in indices]
+                    )
+                    for dataset, edge in zip(self.datasets, self.edges)
+                )
+            )
+        )
+
 
 @dataclass
 class CrossedDatasetsConfig(SizedDatasetConfig[tuple[Any, ...]]):
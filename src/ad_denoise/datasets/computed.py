@@ -1,6 +1,8 @@
-from typing import Callable, Generic, TypeVar
+from typing import Callable, Generic, Sequence, TypeVar
 
-from .utils import SizedDataset
+from ad_denoise.timing import Stage, timed
+
+from .utils import SizedDataset, get_items
 
 FrameInT = TypeVar("FrameInT")
 FrameOutT = TypeVar("FrameOutT")
@@ -27,5 +29,12 @@ class ComputedFramesDataset(Generic[FrameInT, FrameOutT], SizedDataset[FrameOutT
     def __len__(self) -> int:
         return len(self.dataset)
 
+    def _compute(self, item: FrameInT) -> FrameOutT:
+        with timed(Stage.COMPUTE):
+            return self.computation(item)
+
     def __getitem__(self, idx: int) -> FrameOutT:
-        return self.computation(self.dataset[idx])
+        return self._compute(self.dataset[idx])
+
+    def __getitems__(self, indices: Sequence[int]) -> list[FrameOutT]:
+        return [self._compute(item) for item in get_items(self.dataset, indices)]
@@ -1,7 +1,7 @@
 from dataclasses import dataclass
 from typing import Generic, TypeVar
 
-from ad_denoise.utils import as_tagged_union
+from ad_denoise.utils import TaggedUnionBase, as_tagged_union
 
 from .utils import SizedDataset
 
@@ -10,7 +10,7 @@ T = TypeVar("T")
 
 @dataclass
 @as_tagged_union
-class SizedDatasetConfig(Generic[T]):
+class SizedDatasetConfig(TaggedUnionBase, Generic[T]):
     """A configuration schema for sized datasets."""
 
     def __call__(self) -> SizedDataset[T]:  # noqa: D102
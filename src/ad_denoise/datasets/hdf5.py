@@ -1,16 +1,31 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from itertools import accumulate
+from itertools import accumulate, groupby
 from math import prod
 from pathlib import Path
-from typing import Iterable, NewType, Optional, Sequence
+from typing import (
+    ClassVar,
+    Hashable,
+    Iterable,
+    NewType,
+    Optional,
+    Sequence,
+)
+from weakref import WeakValueDictionary
 
 import hdf5plugin  # noqa: F401
 from h5py import Dataset, File
-from numpy import atleast_1d, ndarray, unravel_index
+from numpy import atleast_1d, concatenate, ndarray, stack, unravel_index
 from torch import Tensor, float32, from_numpy
 
+from ad_denoise.timing import Stage, timed
+
+from .chunks import DirectChunkReader
 from .config import SizedDatasetConfig
-from .utils import Dim, SizedDataset
+from .index import Hdf5Index
+from .utils import Dim, LruCache, SizedDataset
+from .virtual import build_virtual_dataset
 
 #: The path to an hdf5 file.
 H5Path = NewType("H5Path", Path)
@@ -20,33 +35,219 @@ H5Paths = Sequence[H5Path]
 H5Key = NewType("H5Key", str)
 #: A sequence of keys within an hdf5 file.
 H5Keys = Sequence[H5Key]
+#: The identity of a hdf5 file, as its resolved path, modification time and size.
+H5Signature = tuple[Path, int, int]
+
+#: Open hdf5 files by signature, held only while referenced by a caller.
+_files: "WeakValueDictionary[H5Signature, File]" = WeakValueDictionary()
+
+
+def file_signature(path: H5Path) -> H5Signature:
+    """Identifies a hdf5 file by its resolved path, modification time and size.
+
+    Args:
+        path: The path to a hdf5 file.
+
+    Returns:
+        H5Signature: The identity of the file as it currently exists.
+    """
+    resolved = Path(path).resolve()
+    stat = resolved.stat()
+    return resolved, stat.st_mtime_ns, stat.st_size
+
+
+def open_file(path: H5Path) -> File:
+    """Opens a hdf5 file by its path, sharing a single handle per file.
+
+    Opens a hdf5 file, returning the handle already held by another caller if the file
+    is unchanged since it was opened. Handles are not retained once no caller holds
+    them, and a file which has grown or been replaced is opened afresh.
+
+    Args:
+        path: The path to a hdf5 file.
+
+    Returns:
+        File: The opened hdf5 file, shared with all other callers for this file.
+    """
+    signature = file_signature(path)
+    file = _files.get(signature)
+    if file is None or not file.id.valid:
+        with timed(Stage.HDF5_OPEN):
+            file = File(signature[0], "r")
+        _files[signature] = file
+    return file
 
 
 class SimpleHdf5(SizedDataset[Tensor]):
     """A pytorch dataset which loads frames at keys from multiple hdf5 paths."""
 
+    #: Readers shared between all datasets created through SimpleHdf5.shared, held
+    #: only while referenced by a dataset.
+    _shared: ClassVar["WeakValueDictionary[Hashable, SimpleHdf5]"] = (
+        WeakValueDictionary()
+    )
+
     def __init__(
         self,
         paths: H5Paths,
         key: H5Key,
         dimensions: Dim,
+        cache_size: int = 0,
+        index: Optional[Path] = None,
+        direct: bool = False,
+        max_workers: Optional[int] = None,
     ) -> None:
         """Creates a dataset which reads frames at keys from multiple hdf5 paths.
 
+        Creates a dataset which reads frames at keys from multiple hdf5 paths. Files are
+        only held open once a frame is read from them. If an index is given, dataset
+        shapes are taken from it, with stale entries refreshed, otherwise each file is
+        briefly opened to read its shape. If direct reading is enabled, raw chunks are
+        decompressed in a thread pool, falling back to the hdf5 filter pipeline for
+        datasets with unsupported filters.
+
         Args:
             paths: A sequence of hdf5 file paths, from which data can be read.
             key: A hdf5 key, pointing to dataset in each file, from which frames can be
                 read.
             dimensions: The data dimensionality, assumed to be trailing axis in the
                 dataset.
+            cache_size: The number of most recently read frames to retain, such that
+                repeat reads return the same tensor. Defaults to 0.
+            index: The path to a metadata index sidecar file, which is created if it
+                does not exist. Defaults to None.
+            direct: If True, frames are read by direct chunk decompression. Defaults
+                to False.
+            max_workers: The maximum number of decompression threads, if None the
+                thread pool default is used. Defaults to None.
         """
+        self.paths = list(paths)
+        self.key = key
         self.dimensions = dimensions
-        self.datasets = SimpleHdf5.open_datasets(paths, key)
-        self.edges = SimpleHdf5.get_dataset_edges(self.datasets, self.dimensions)
+        if index is not None:
+            entries = Hdf5Index(index).scan(self.paths, key)
+            self.edges = [
+                0,
+                *accumulate(entry.frame_count(self.dimensions) for entry in entries),
+            ]
+        else:
+            self.edges = SimpleHdf5.get_dataset_edges(
+                SimpleHdf5.open_datasets(self.paths, key), self.dimensions
+            )
+        self._datasets: list[Optional[Dataset]] = [None] * len(self.paths)
+        self._files: list[Optional[File]] = [None] * len(self.paths)
+        self.cache: LruCache[int, Tensor] = LruCache(cache_size)
+        self.direct = direct
+        self.max_workers = max_workers
+        self._readers: dict[int, Optional[DirectChunkReader]] = {}
+        self._executor: Optional[tuple[int, ThreadPoolExecutor]] = None
+
+    @classmethod
+    def shared(
+        cls,
+        paths: H5Paths,
+        key: H5Key,
+        dimensions: Dim,
+        cache_size: int = 0,
+        index: Optional[Path] = None,
+        direct: bool = False,
+        max_workers: Optional[int] = None,
+    ) -> "SimpleHdf5":
+        """Gets a dataset reading from a source, shared by all identical requests.
+
+        Gets a dataset which reads frames at keys from multiple hdf5 paths, returning
+        the same instance for every request for the same unchanged files with identical
+        options, while any requester holds it. Requests which differ in any option, or
+        for files which have since changed, are given a separate dataset.
+
+        Args:
+            paths: A sequence of hdf5 file paths, from which data can be read.
+            key: A hdf5 key, pointing to dataset in each file, from which frames can be
+                read.
+            dimensions: The data dimensionality, assumed to be trailing axis in the
+                dataset.
+            cache_size: The minimum number of most recently read frames to retain.
+                Defaults to 0.
+            index: The path to a metadata index sidecar file, used if the dataset is
+                created. Defaults to None.
+            direct: If True, frames are read by direct chunk decompression. Defaults
+                to False.
+            max_workers: The maximum number of decompression threads, if None the
+                thread pool default is used. Defaults to None.
+
+        Returns:
+            SimpleHdf5: The dataset shared by all identical requests.
+        """
+        source = (
+            tuple(file_signature(path) for path in paths),
+            key,
+            dimensions,
+            cache_size,
+            None if index is None else Path(index).resolve(),
+            direct,
+            max_workers,
+        )
+        dataset = cls._shared.get(source)
+        if dataset is None:
+            dataset = cls(
+                paths, key, dimensions, cache_size, index, direct, max_workers
+            )
+            cls._shared[source] = dataset
+        return dataset
+
+    def _dataset(self, dataset_idx: int) -> Dataset:
+        dataset = self._datasets[dataset_idx]
+        if dataset is None:
+            file = open_file(H5Path(Path(self.paths[dataset_idx])))
+            dataset = SimpleHdf5._get_dataset(file, self.key)
+            self._files[dataset_idx] = file
+            self._datasets[dataset_idx] = dataset
+        return dataset
+
+    def close(self) -> None:
+        """Releases the files, readers and threads held by the dataset.
+
+        Releases the handles held by the dataset, such that files are closed once no
+        other dataset holds them. Files are reopened if further frames are read.
+        """
+        self._datasets = [None] * len(self.paths)
+        self._files = [None] * len(self.paths)
+        self._readers.clear()
+        if self._executor is not None:
+            self._executor[1].shutdown(wait=False)
+            self._executor = None
+
+    def _reader(self, dataset_idx: int) -> Optional[DirectChunkReader]:
+        if dataset_idx not in self._readers:
+            dataset = self._dataset(dataset_idx)
+            self._readers[dataset_idx] = (
+                DirectChunkReader(dataset, self.dimensions, self._thread_pool())
+                if DirectChunkReader.supports(dataset)
+                else None
+            )
+        return self._readers[dataset_idx]
+
+    def _thread_pool(self) -> ThreadPoolExecutor:
+        # Threads do not survive a fork, so each DataLoader worker creates its own pool
+        if self._executor is None or self._executor[0] != os.getpid():
+            self._readers.clear()
+            self._executor = (os.getpid(), ThreadPoolExecutor(self.max_workers))
+        return self._executor[1]
+
+    def _read_frames(self, dataset_idx: int, idxs: Sequence[int]) -> ndarray:
+        reader = self._reader(dataset_idx) if self.direct else None
+        if reader is not None:
+            return reader.read_frames(idxs)
+        return SimpleHdf5.read_frames(self._dataset(dataset_idx), idxs, self.dimensions)
+
+    @property
+    def datasets(self) -> list[Dataset]:
+        """The hdf5 datasets from which frames are read, opening any not yet opened."""
+        return [self._dataset(idx) for idx in range(len(self._datasets))]
 
     @staticmethod
     def _open_files(paths: H5Paths) -> list[File]:
-        """Opens hdf5 files by their paths.
+        """Opens hdf5 files by their paths, sharing handles to the same path.
 
         Args:
             paths: A sequence of paths to hdf5 files.
@@ -54,7 +255,7 @@ class SimpleHdf5(SizedDataset[Tensor]):
         Returns:
             list[File]: A list of opened hdf5 files.
         """
-        return [File(path) for path in paths]
+        return [open_file(H5Path(Path(path))) for path in paths]
 
     @staticmethod
     def _get_dataset(file: File, key: H5Key) -> Dataset:
@@ -150,6 +351,34 @@ class SimpleHdf5(SizedDataset[Tensor]):
             ]
         )
 
+    @staticmethod
+    def read_frames(dataset: Dataset, idxs: Sequence[int], frame_dims: int) -> ndarray:
+        """Reads many frames of dimensionality frame_dims from a dataset.
+
+        Reads many frames of dimensionality frame_dims from a dataset, using a hyperslab
+        selection for each run of consecutive frames where the dataset has a single
+        leading axis, as point selections are far slower for hdf5 to resolve.
+
+        Args:
+            dataset: A readable hdf5 dataset object.
+            idxs: The strictly increasing linearised indices of frames in the dataset.
+            frame_dims: The trailing dimensionality of the frame.
+
+        Returns:
+            ndarray: An array of the frames stacked along a leading axis.
+        """
+        if len(dataset.shape) - frame_dims != 1:
+            return stack(
+                [SimpleHdf5.read_frame(dataset, idx, frame_dims) for idx in idxs]
+            )
+        runs = [
+            [idx for _, idx in run]
+            for _, run in groupby(enumerate(idxs), lambda pair: pair[1] - pair[0])
+        ]
+        if len(runs) == 1:
+            return dataset[idxs[0] : idxs[-1] + 1]
+        return concatenate([dataset[run[0] : run[-1] + 1] for run in runs])
+
     @staticmethod
     def read_frame_datasets(
         datasets: list[Dataset],
@@ -185,16 +414,41 @@ class SimpleHdf5(SizedDataset[Tensor]):
     def __len__(self) -> int:
         return self.edges[-1]
 
+    def _store(self, idx: int, frame: ndarray) -> Tensor:
+        tensor = from_numpy(atleast_1d(frame)).unsqueeze(0).type(float32)
+        self.cache.put(idx, tensor)
+        return tensor
+
     def __getitem__(self, idx: int) -> Tensor:
-        return (
-            from_numpy(
-                SimpleHdf5.read_frame_datasets(
-                    self.datasets, idx, self.dimensions, self.edges
+        cached = self.cache.get(idx)
+        if cached is not None:
+            return cached
+        dataset_idx = SimpleHdf5.get_dataset_index(idx, self.edges)
+        local_idx = idx - self.edges[dataset_idx]
+        with timed(Stage.HDF5_READ):
+            frame = (
+                self._read_frames(dataset_idx, [local_idx])[0]
+                if self.direct
+                else SimpleHdf5.read_frame(
+                    self._dataset(dataset_idx), local_idx, self.dimensions
                 )
             )
-            .unsqueeze(0)
-            .type(float32)
-        )
+        return self._store(idx, frame)
+
+    def __getitems__(self, indices: Sequence[int]) -> list[Tensor]:
+        cached = {idx: self.cache.get(idx) for idx in indices}
+        frames = {idx: frame for idx, frame in cached.items() if frame is not None}
+        missing = sorted(set(indices).difference(frames))
+        for dataset_idx, group in groupby(
+            missing, lambda idx: SimpleHdf5.get_dataset_index(idx, self.edges)
+        ):
+            idxs = list(group)
+            start_idx = self.edges[dataset_idx]
+            with timed(Stage.HDF5_READ):
+                data = self._read_frames(dataset_idx, [idx - start_idx for idx in idxs])
+            for idx, frame in zip(idxs, data):
+                frames[idx] = self._store(idx, frame)
+        return [frames[idx] for idx in indices]
 
 
 @dataclass
@@ -205,6 +459,20 @@ class SimpleHdf5DatasetConfig(SizedDatasetConfig):
     paths: list[H5Path]
     key: H5Key
     dimensions: Dim
+    index: Optional[Path] = None
+    #: The path of a virtual dataset combining all paths, built if it does not exist.
+    virtual: Optional[H5Path] = None
+    #: Whether frames are read by parallel direct chunk decompression.
+    direct: bool = False
 
     def __call__(self) -> SizedDataset[Tensor]:  # noqa: D102
-        return SimpleHdf5(self.paths, self.key, self.dimensions)
+        paths = self.paths
+        if self.virtual is not None:
+            if not Path(self.virtual).exists():
+                build_virtual_dataset(
+                    self.paths, self.key, self.virtual, self.dimensions
+                )
+            paths = [self.virtual]
+        return SimpleHdf5.shared(
+            paths, self.key, self.dimensions, index=self.index, direct=self.direct
+        )
@@ -0,0 +1,147 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from math import prod
+from pathlib import Path
+from typing import Optional, Sequence, Union
+
+from apischema import deserialize, serialize
+from h5py import Dataset, File
+
+
+@dataclass
+class Hdf5IndexEntry:
+    """The metadata of a dataset within a hdf5 file, as of a modification time."""
+
+    path: str
+    key: str
+    mtime_ns: int
+    size: int
+    shape: tuple[int, ...]
+    dtype: str
+    chunks: Optional[tuple[int, ...]] = None
+
+    def frame_count(self, frame_dims: int) -> int:
+        """Computes the number of frames in the dataset.
+
+        Args:
+            frame_dims: The trailing dimensionality of the frame.
+
+        Returns:
+            int: The number of frames in the dataset.
+        """
+        return prod(self.shape[: len(self.shape) - frame_dims])
+
+    def is_current(self, stat: os.stat_result) -> bool:
+        """Checks whether the entry describes the file as it currently exists.
+
+        Args:
+            stat: The current status of the file.
+
+        Returns:
+            bool: True if the file has not been modified since it was indexed.
+        """
+        return self.mtime_ns == stat.st_mtime_ns and self.size == stat.st_size
+
+
+@dataclass
+class _Hdf5IndexContents:
+    entries: list[Hdf5IndexEntry] = field(default_factory=list)
+
+
+class Hdf5Index:
+    """A persistent index of hdf5 dataset metadata, validated by file status.
+
+    A persistent index of the shapes, dtypes and chunk layouts of datasets within hdf5
+    files, stored as a json sidecar. Entries are keyed by path and key, and are
+    validated against the modification time and size of the file, such that startup
+    requires only a stat of each file rather than opening it.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        """Creates an index backed by a sidecar file, loading it if it exists.
+
+        Args:
+            path: The path of the json sidecar file.
+        """
+        self.path = Path(path)
+        self.entries: dict[tuple[str, str], Hdf5IndexEntry] = {}
+        if self.path.exists():
+            with open(self.path) as index_file:
+                contents = deserialize(_Hdf5IndexContents, json.load(index_file))
+            self.entries = {
+                (entry.path, entry.key): entry for entry in contents.entries
+            }
+
+    def save(self) -> None:
+        """Atomically writes the index to its sidecar file."""
+        contents = _Hdf5IndexContents(list(self.entries.values()))
+        temporary_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        with open(temporary_path, "w") as index_file:
+            json.dump(serialize(_Hdf5IndexContents, contents), index_file)
+        os.replace(temporary_path, self.path)
+
+    @staticmethod
+    def read_entry(path: Union[str, Path], key: str) -> Hdf5IndexEntry:
+        """Reads the metadata of a dataset by opening its hdf5 file.
+
+        Args:
+            path: The path to a hdf5 file.
+            key: The key which locates the dataset within the hdf5 file.
+
+        Returns:
+            Hdf5IndexEntry: The metadata of the dataset.
+        """
+        stat = os.stat(path)
+        with File(path, "r") as file:
+            dataset = file[key]
+            assert isinstance(dataset, Dataset)
+            return Hdf5IndexEntry(
+                str(path),
+                key,
+                stat.st_mtime_ns,
+                stat.st_size,
+                tuple(dataset.shape),
+                dataset.dtype.str,
+                tuple(dataset.chunks) if dataset.chunks is not None else None,
+            )
+
+    def _current_entry(self, path: str, key: str) -> Optional[Hdf5IndexEntry]:
+        entry = self.entries.get((path, key))
+        if entry is not None and entry.is_current(os.stat(path)):
+            return entry
+        return None
+
+    def scan(
+        self,
+        paths: Sequence[Union[str, Path]],
+        key: str,
+        max_workers: Optional[int] = None,
+    ) -> list[Hdf5IndexEntry]:
+        """Gets the metadata of a dataset in each file, indexing any which are stale.
+
+        Gets the metadata of the dataset at key in each file, validating existing
+        entries by file status and reading missing or stale entries in parallel across
+        a thread pool. The sidecar file is rewritten if any entry was updated.
+
+        Args:
+            paths: A sequence of paths to hdf5 files.
+            key: The key which locates the dataset within each hdf5 file.
+            max_workers: The maximum number of threads used to read entries, if None
+                the thread pool default is used. Defaults to None.
+
+        Returns:
+            list[Hdf5IndexEntry]: The metadata of the dataset in each file.
+        """
+        names = [str(path) for path in paths]
+        with ThreadPoolExecutor(max_workers) as executor:
+            current = list(
+                executor.map(lambda name: self._current_entry(name, key), names)
+            )
+            stale = [name for name, entry in zip(names, current) if entry is None]
+            for entry in executor.map(lambda name: self.read_entry(name, key), stale):
+                self.entries[(entry.path, entry.key)] = entry
+        if stale:
+            self.save()
+        return [self.entries[(name, key)] for name in names]
@@ -0,0 +1,152 @@
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock, Semaphore, Thread
+from typing import Iterable, Iterator, Optional, Sequence, Sized, TypeVar
+
+from torch.utils.data import Sampler
+
+from .utils import SizedDataset
+
+T_co = TypeVar("T_co", covariant=True)
+
+
+class ReadAheadDataset(SizedDataset[T_co]):
+    """A pytorch dataset which reads scheduled items ahead of their retrieval.
+
+    A pytorch dataset which, given the order in which items will be retrieved, reads
+    items a bounded distance ahead in a pool of threads, such that the latency of
+    storage is hidden behind consumption. Items whose read has been issued are awaited.
+    Items which were not scheduled, or which are retrieved before their read was
+    issued, are read on demand and their scheduled read is skipped, such that no item
+    is read twice. Read ahead happens in the process which schedules the order, so
+    should be used with an in-process loader.
+    """
+
+    def __init__(
+        self,
+        dataset: SizedDataset[T_co],
+        distance: int,
+        max_workers: Optional[int] = None,
+    ) -> None:
+        """Creates a pytorch dataset which reads scheduled items ahead of retrieval.
+
+        Args:
+            dataset: The dataset from which items are read.
+            distance: The maximum number of items read ahead but not yet retrieved.
+            max_workers: The maximum number of read threads, if None the thread pool
+                default is used. Defaults to None.
+        """
+        self.dataset = dataset
+        self.distance = distance
+        self.executor = ThreadPoolExecutor(max_workers)
+        self._buffer: dict[int, deque[Future[T_co]]] = {}
+        # The number of scheduled reads of each index which have not been issued
+        self._scheduled: Counter[int] = Counter()
+        # The number of scheduled reads of each index served on demand, to be skipped
+        self._claimed: Counter[int] = Counter()
+        self._slots = Semaphore(distance)
+        self._lock = Lock()
+        self._generation = 0
+
+    def schedule(self, indices: Iterable[int]) -> None:
+        """Begins reading ahead in the order in which items will be retrieved.
+
+        Begins reading ahead in the order in which items will be retrieved, replacing
+        any previous schedule and discarding items read ahead by it.
+
+        Args:
+            indices: The indices of items, in the order they will be retrieved.
+        """
+        indices = list(indices)
+        self.cancel()
+        with self._lock:
+            self._scheduled.update(indices)
+        Thread(
+            target=self._read_ahead, args=(iter(indices), self._generation), daemon=True
+        ).start()
+
+    def cancel(self) -> None:
+        """Stops reading ahead, discarding all items read ahead but not retrieved."""
+        with self._lock:
+            self._generation += 1
+            for futures in self._buffer.values():
+                for future in futures:
+                    future.cancel()
+                    self._slots.release()
+            self._buffer.clear()
+            self._scheduled.clear()
+            self._claimed.clear()
+
+    def _read_ahead(self, indices: Iterator[int], generation: int) -> None:
+        for idx in indices:
+            self._slots.acquire()
+            with self._lock:
+                if generation != self._generation:
+                    self._slots.release()
+                    return
+                if self._claimed[idx] > 0:
+                    self._claimed[idx] -= 1
+                    self._slots.release()
+                    continue
+                self._scheduled[idx] -= 1
+                future = self.executor.submit(self.dataset.__getitem__, idx)
+                self._buffer.setdefault(idx, deque()).append(future)
+
+    def _take(self, idx: int) -> Optional[Future[T_co]]:
+        with self._lock:
+            futures = self._buffer.get(idx)
+            if not futures:
+                if self._scheduled[idx] > 0:
+                    self._scheduled[idx] -= 1
+                    self._claimed[idx] += 1
+                return None
+            future = futures.popleft()
+            if not futures:
+                del self._buffer[idx]
+            self._slots.release()
+            return future
+
+    def __len__(self) -> int:
+        return len(self.dataset)
+
+    def __getitem__(self, idx: int) -> T_co:
+        future = self._take(idx)
+        return future.result() if future is not None else self.dataset[idx]
+
+    def __getitems__(self, indices: Sequence[int]) -> list[T_co]:
+        return [self[idx] for idx in indices]
+
+
+class ReadAheadSampler(Sampler[int]):
+    """A sampler which schedules reads ahead of the order it draws indices in."""
+
+    def __init__(self, sampler: Iterable[int], dataset: ReadAheadDataset) -> None:
+        """Creates a sampler which schedules reads ahead of the order it draws in.
+
+        Args:
+            sampler: The sampler which decides the order in which indices are drawn.
+            dataset: The dataset in which reads are scheduled at the start of each
+                epoch.
+        """
+        self.sampler = sampler
+        self.dataset = dataset
+
+    def set_epoch(self, epoch: int) -> None:
+        """Sets the epoch of the wrapped sampler, if it is epoch dependant.
+
+        Args:
+            epoch: The epoch number.
+        """
+        set_epoch = getattr(self.sampler, "set_epoch", None)
+        if set_epoch is not None:
+            set_epoch(epoch)
+
+    def __iter__(self) -> Iterator[int]:
+        indices = list(self.sampler)
+        self.dataset.schedule(indices)
+        return iter(indices)
+
+    def __len__(self) -> int:
+        return (
+            len(self.sampler) if isinstance(self.sampler, Sized) else len(self.dataset)
+        )
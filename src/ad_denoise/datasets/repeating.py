@@ -1,4 +1,4 @@
-from typing import Optional, TypeVar
+from typing import Optional, Sequence, TypeVar
 
 from torch.utils.data import Dataset
 
@@ -42,3 +42,8 @@ class RepeatingDataset(SizedDataset[T_co]):
         if index > len(self):
             raise IndexError
         return self._cached_data
+
+    def __getitems__(self, indices: Sequence[int]) -> list[T_co]:
+        if any(index > len(self) for index in indices):
+            raise IndexError
+        return [self._cached_data] * len(indices)
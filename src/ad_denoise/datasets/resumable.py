@@ -0,0 +1,161 @@
+from collections import deque
+from itertools import islice
+from typing import Any, Iterable, Iterator, Optional, Sized
+
+from torch import Generator, randperm
+from torch.utils.data import BatchSampler, Sampler
+
+from .sharded import sharded_sampler
+
+
+class ResumableSampler(Sampler[int]):
+    """A sampler which may resume an epoch from the next unconsumed index.
+
+    A sampler which draws indices in an order decided solely by its seed and epoch, or
+    by a wrapped epoch dependant sampler, such that an epoch may be recreated after a
+    restart. The number of indices of each epoch is that of the wrapped sampler at that
+    epoch, if any. The number of indices of the current epoch consumed by training is
+    set externally, as prefetching loaders draw indices ahead of consumption, and is
+    saved alongside the epoch by state_dict. Once loaded, the next iteration skips the
+    consumed indices, such that no data is read twice.
+    """
+
+    def __init__(
+        self,
+        dataset: Sized,
+        shuffle: bool = True,
+        seed: int = 0,
+        sampler: Optional[Sampler[int]] = None,
+    ) -> None:
+        """Creates a sampler which may resume an epoch from the next unconsumed index.
+
+        Args:
+            dataset: The dataset from which indices are drawn.
+            shuffle: If True, indices are drawn in an order seeded by the epoch.
+                Defaults to True.
+            seed: The seed of the shuffle. Defaults to 0.
+            sampler: An epoch dependant sampler which decides the order of indices in
+                place of the shuffle, such as a ShardedSampler, if None all indices of
+                the dataset are drawn. Defaults to None.
+        """
+        self.dataset = dataset
+        self.shuffle = shuffle
+        self.seed = seed
+        self.sampler = sampler
+        self.epoch = 0
+        #: The number of indices of the current epoch consumed by training.
+        self.consumed = 0
+        self._start = 0
+
+    def set_epoch(self, epoch: int) -> None:
+        """Sets the epoch, which seeds the order of indices.
+
+        Args:
+            epoch: The epoch number.
+        """
+        self.epoch = epoch
+        set_epoch = getattr(self.sampler, "set_epoch", None)
+        if set_epoch is not None:
+            set_epoch(epoch)
+
+    def state_dict(self) -> dict[str, Any]:
+        """Returns the epoch and the number of its indices consumed by training.
+
+        Returns:
+            dict[str, Any]: The epoch and the consumed indices, where a completed
+                epoch is saved as the start of the next.
+        """
+        if self.consumed >= len(self):
+            return {"epoch": self.epoch + 1, "consumed": 0}
+        return {"epoch": self.epoch, "consumed": self.consumed}
+
+    def load_state_dict(self, state_dict: dict[str, Any]) -> None:
+        """Restores the epoch, such that the next iteration skips consumed indices.
+
+        Args:
+            state_dict: The state, as returned by state_dict.
+        """
+        self.set_epoch(state_dict["epoch"])
+        self.consumed = self._start = state_dict["consumed"]
+
+    def _order(self) -> Iterator[int]:
+        if self.sampler is not None:
+            return iter(self.sampler)
+        if self.shuffle:
+            generator = Generator()
+            generator.manual_seed(self.seed + self.epoch)
+            return iter(randperm(len(self), generator=generator).tolist())
+        return iter(range(len(self)))
+
+    def __iter__(self) -> Iterator[int]:
+        start, self._start = self._start, 0
+        self.consumed = start
+        return islice(self._order(), start, None)
+
+    def __len__(self) -> int:
+        if isinstance(self.sampler, Sized):
+            return len(self.sampler)
+        return len(self.dataset)
+
+
+class ResumableBatchSampler(BatchSampler):
+    """A batch sampler which counts the indices consumed by training.
+
+    A batch sampler which records the number of indices of each batch as it is drawn,
+    such that, as prefetching loaders draw batches ahead of consumption, each batch
+    consumed by training adds its own number of indices, including those of a final
+    incomplete batch, to the consumed indices of a resumable sampler.
+    """
+
+    def __init__(
+        self,
+        sampler: Iterable[int],
+        batch_size: int,
+        drop_last: bool,
+        resumable: Optional[ResumableSampler] = None,
+    ) -> None:
+        """Creates a batch sampler which counts the indices consumed by training.
+
+        Args:
+            sampler: The sampler from which the indices of batches are drawn.
+            batch_size: The number of indices in each batch.
+            drop_last: If True, a final incomplete batch is dropped.
+            resumable: The resumable sampler whose consumed indices are counted, if
+                None the sampler, if it is resumable. Defaults to None.
+        """
+        super().__init__(sampler, batch_size, drop_last)
+        self.resumable = resumable or (
+            sampler if isinstance(sampler, ResumableSampler) else None
+        )
+        self._drawn: deque[int] = deque()
+
+    def consume(self) -> None:
+        """Counts the indices of the earliest drawn batch as consumed by training."""
+        if self._drawn and self.resumable is not None:
+            self.resumable.consumed += self._drawn.popleft()
+
+    def __iter__(self) -> Iterator[list[int]]:
+        self._drawn.clear()
+        for batch in super().__iter__():
+            self._drawn.append(len(batch))
+            yield batch
+
+
+def resumable_sampler(
+    dataset: Any, shuffle: bool, shard_frames: Optional[int] = None
+) -> ResumableSampler:
+    """Creates a resumable sampler, sharding a dataset by file if distributed.
+
+    Args:
+        dataset: The dataset from which indices are drawn.
+        shuffle: If True, indices are shuffled each epoch.
+        shard_frames: The maximum number of frames in each shard of distributed
+            training, if None each file is a single shard. Defaults to None.
+
+    Returns:
+        ResumableSampler: A resumable sampler, over the shards of this rank if a
+            default process group of more than one process is initialized.
+    """
+    return ResumableSampler(
+        dataset, shuffle, sampler=sharded_sampler(dataset, shuffle, shard_frames)
+    )
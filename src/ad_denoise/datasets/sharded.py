@@ -0,0 +1,214 @@
+from heapq import heapify, heappop, heappush
+from itertools import chain, islice
+from math import ceil
+from typing import Any, Iterator, Optional, Sequence
+
+from torch import Generator, distributed, randperm
+from torch.utils.data import Sampler
+
+from .hdf5 import SimpleHdf5
+
+#: A contiguous range of dataset indices, as its start and stop.
+Shard = tuple[int, int]
+
+
+def dataset_edges(dataset: Any) -> list[int]:
+    """Finds the edges of the hdf5 datasets from which a dataset tree reads frames.
+
+    Finds the edges of the first hdf5 frame source within a dataset tree, by following
+    the dataset attribute of wrapping datasets and the first of the datasets attribute
+    of zipped datasets, where the source spans the indices of the root dataset.
+
+    Args:
+        dataset: The root of the dataset tree.
+
+    Returns:
+        list[int]: A list of the total number of frames in all preceeding hdf5 datasets,
+            or the bounds of the root dataset if no aligned hdf5 source is found.
+    """
+    length = len(dataset)
+    node = dataset
+    while node is not None:
+        if isinstance(node, SimpleHdf5):
+            if node.edges[-1] == length:
+                return list(node.edges)
+            break
+        datasets = getattr(node, "datasets", None)
+        wrapped = getattr(node, "dataset", None)
+        node = wrapped if wrapped is not None else datasets[0] if datasets else None
+    return [0, length]
+
+
+def split_shards(
+    edges: Sequence[int], shard_frames: Optional[int] = None
+) -> list[Shard]:
+    """Divides the frames of many files into shards of contiguous frames.
+
+    Args:
+        edges: A list of the total number of frames in all preceeding files, as
+            computed by SimpleHdf5.get_dataset_edges.
+        shard_frames: The maximum number of frames in each shard, files are split into
+            shards of contiguous frames if they hold more, if None each file is a
+            single shard. Defaults to None.
+
+    Returns:
+        list[Shard]: The shards, in order, none of which span multiple files.
+    """
+    shards: list[Shard] = []
+    for start, stop in zip(edges[:-1], edges[1:]):
+        step = shard_frames or max(stop - start, 1)
+        shards.extend(
+            (shard, min(shard + step, stop)) for shard in range(start, stop, step)
+        )
+    return shards
+
+
+class ShardedSampler(Sampler[int]):
+    """A distributed sampler which assigns each replica a disjoint set of files.
+
+    A distributed sampler which divides the indices of a dataset into shards, of one
+    file or of contiguous frames within a file, and assigns each replica a disjoint set
+    of shards, balanced by frame count, such that each replica only opens and reads
+    from the files in its shards. Where there are fewer shards than replicas, such as a
+    single validation file, frames are instead split into shards of an equal share of
+    the frames of all files. If shuffling, shards are reassigned each epoch, as set
+    by set_epoch, and indices are shuffled within the shards of each replica. Every
+    replica draws the same number of indices, repeating its own indices where its shards
+    hold fewer frames than those of the largest replica.
+    """
+
+    def __init__(
+        self,
+        edges: Sequence[int],
+        num_replicas: Optional[int] = None,
+        rank: Optional[int] = None,
+        shuffle: bool = True,
+        seed: int = 0,
+        shard_frames: Optional[int] = None,
+    ) -> None:
+        """Creates a distributed sampler which assigns each replica a set of files.
+
+        Args:
+            edges: A list of the total number of frames in all preceeding files, as
+                computed by SimpleHdf5.get_dataset_edges.
+            num_replicas: The number of processes taking part in training, if None the
+                world size of the default process group is used. Defaults to None.
+            rank: The rank of this process, if None the rank within the default process
+                group is used. Defaults to None.
+            shuffle: If True, shards are reassigned and indices shuffled each epoch.
+                Defaults to True.
+            seed: The seed of the shuffle, which must be identical across replicas.
+                Defaults to 0.
+            shard_frames: The maximum number of frames in each shard, files are split
+                into shards of contiguous frames if they hold more, if None each file
+                is a single shard. Defaults to None.
+
+        Raises:
+            ValueError: If the rank is not within the replicas, or there are fewer
+                frames than replicas.
+        """
+        self.num_replicas = (
+            distributed.get_world_size() if num_replicas is None else num_replicas
+        )
+        self.rank = distributed.get_rank() if rank is None else rank
+        if not 0 <= self.rank < self.num_replicas:
+            raise ValueError(f"Rank {self.rank} is not within {self.num_replicas}.")
+        self.shuffle = shuffle
+        self.seed = seed
+        self.epoch = 0
+        self.shards = split_shards(edges, shard_frames)
+        if len(self.shards) < self.num_replicas:
+            if edges[-1] < self.num_replicas:
+                raise ValueError(
+                    f"{edges[-1]} frames cannot be divided between "
+                    f"{self.num_replicas} replicas."
+                )
+            self.shards = split_shards(edges, edges[-1] // self.num_replicas)
+
+    def set_epoch(self, epoch: int) -> None:
+        """Sets the epoch, which seeds the assignment and shuffle of shards.
+
+        Args:
+            epoch: The epoch number.
+        """
+        self.epoch = epoch
+
+    def assignment(self) -> list[list[Shard]]:
+        """Assigns the shards to replicas for the current epoch.
+
+        Assigns the shards, largest first, to the replica with the fewest frames, where
+        shards of equal size are taken in a random order seeded by the epoch if
+        shuffling, such that all replicas arrive at the same assignment.
+
+        Returns:
+            list[list[Shard]]: The shards of each replica, by rank.
+        """
+        order = list(range(len(self.shards)))
+        if self.shuffle:
+            generator = Generator()
+            generator.manual_seed(self.seed + self.epoch)
+            order = randperm(len(self.shards), generator=generator).tolist()
+        order.sort(key=lambda idx: self.shards[idx][0] - self.shards[idx][1])
+        loads = [(0, rank) for rank in range(self.num_replicas)]
+        heapify(loads)
+        assignment: list[list[Shard]] = [[] for _ in range(self.num_replicas)]
+        for idx in order:
+            load, rank = heappop(loads)
+            start, stop = self.shards[idx]
+            assignment[rank].append(self.shards[idx])
+            heappush(loads, (load + stop - start, rank))
+        return [sorted(shards) for shards in assignment]
+
+    def __iter__(self) -> Iterator[int]:
+        assignment = self.assignment()
+        indices = list(
+            chain.from_iterable(
+                range(start, stop) for start, stop in assignment[self.rank]
+            )
+        )
+        if self.shuffle:
+            generator = Generator()
+            generator.manual_seed(
+                self.seed + self.epoch * self.num_replicas + self.rank
+            )
+            indices = [
+                indices[idx]
+                for idx in randperm(len(indices), generator=generator).tolist()
+            ]
+        length = self._length(assignment)
+        return islice(
+            chain.from_iterable([indices] * ceil(length / len(indices))), length
+        )
+
+    @staticmethod
+    def _length(assignment: list[list[Shard]]) -> int:
+        return max(sum(stop - start for start, stop in shards) for shards in assignment)
+
+    def __len__(self) -> int:
+        return self._length(self.assignment())
+
+
+def sharded_sampler(
+    dataset: Any, shuffle: bool, shard_frames: Optional[int] = None
+) -> Optional[ShardedSampler]:
+    """Creates a sampler sharding a dataset by file if training is distributed.
+
+    Args:
+        dataset: The dataset from which indices are drawn.
+        shuffle: If True, shards are reassigned and indices shuffled each epoch.
+        shard_frames: The maximum number of frames in each shard, if None each file is
+            a single shard. Defaults to None.
+
+    Returns:
+        Optional[ShardedSampler]: A sampler over the shards of this rank, if a default
+            process group of more than one process is initialized, otherwise None.
+    """
+    if not (
+        distributed.is_available()
+        and distributed.is_initialized()
+        and distributed.get_world_size() > 1
+    ):
+        return None
+    return ShardedSampler(
+        dataset_edges(dataset), shuffle=shuffle, shard_frames=shard_frames
+    )
@@ -1,4 +1,5 @@
-from typing import NewType, Sized, TypeVar
+from collections import OrderedDict
+from typing import Generic, Hashable, NewType, Optional, Sequence, Sized, TypeVar
 
 from torch.utils.data import Dataset as TorchDataset
 
@@ -6,7 +7,87 @@ from torch.utils.data import Dataset as TorchDataset
 Dim = NewType("Dim", int)
 
 T_co = TypeVar("T_co", covariant=True)
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
 
 
 class SizedDataset(TorchDataset[T_co], Sized):
     """An abstract class representing a sized pytorch dataset."""
+
+
+def get_items(dataset: TorchDataset[T_co], indices: Sequence[int]) -> list[T_co]:
+    """Gets the items at many indices of a dataset, batching reads where supported.
+
+    Args:
+        dataset: A dataset from which to retrieve the items.
+        indices: The indices of the items to be retrieved.
+
+    Returns:
+        list[T_co]: The items at each of the indices, in order.
+    """
+    getitems = getattr(dataset, "__getitems__", None)
+    if getitems is not None:
+        return getitems(indices)
+    return [dataset[idx] for idx in indices]
+
+
+class LruCache(Generic[K, V]):
+    """A least recently used cache which tolerates concurrent use from threads.
+
+    A least recently used cache, in which each operation is a single atomic step of an
+    ordered dictionary, such that concurrent use from threads may at worst cause an
+    item to be evicted early, without requiring a lock.
+    """
+
+    def __init__(self, size: int) -> None:
+        """Creates a least recently used cache.
+
+        Args:
+            size: The maximum number of items to retain, may be zero.
+        """
+        self.size = size
+        self._items: OrderedDict[K, V] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def values(self) -> list[V]:
+        """Gets the cached items, from least to most recently used.
+
+        Returns:
+            list[V]: A snapshot of the cached items.
+        """
+        return list(self._items.values())
+
+    def get(self, key: K) -> Optional[V]:
+        """Gets an item, marking it as most recently used.
+
+        Args:
+            key: The key of the item.
+
+        Returns:
+            Optional[V]: The item if it is cached, otherwise None.
+        """
+        item = self._items.get(key)
+        if item is not None:
+            try:
+                self._items.move_to_end(key)
+            except KeyError:
+                pass
+        return item
+
+    def put(self, key: K, item: V) -> None:
+        """Stores an item, evicting the least recently used items beyond the size.
+
+        Args:
+            key: The key of the item.
+            item: The item to be stored.
+        """
+        if self.size <= 0:
+            return
+        self._items[key] = item
+        while len(self._items) > self.size:
+            try:
+                self._items.popitem(last=False)
+            except KeyError:
+                break
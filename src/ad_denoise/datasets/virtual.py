@@ -0,0 +1,67 @@
+from math import prod
+from pathlib import Path
+from typing import Sequence, Union
+
+from h5py import File, VirtualLayout, VirtualSource
+from numpy import dtype, unravel_index
+
+from .index import Hdf5Index
+
+
+def build_virtual_dataset(
+    paths: Sequence[Union[str, Path]],
+    key: str,
+    output: Union[str, Path],
+    frame_dims: int,
+) -> None:
+    """Builds a hdf5 virtual dataset which concatenates the frames of many files.
+
+    Builds a hdf5 virtual dataset at key in the output file, which maps the frames of
+    the dataset at key in each of the source files onto a single leading frame axis, in
+    order. Sources with multiple leading axes are flattened, such that the virtual
+    dataset has shape (total frames, *frame shape).
+
+    Args:
+        paths: A sequence of paths to hdf5 source files.
+        key: The key which locates the dataset within each source file, and at which
+            the virtual dataset is created.
+        output: The path of the hdf5 file to be written.
+        frame_dims: The trailing dimensionality of the frame.
+
+    Raises:
+        ValueError: If no paths are given or the frame shapes or dtypes of the sources
+            differ.
+    """
+    entries = [Hdf5Index.read_entry(path, key) for path in paths]
+    if not entries:
+        raise ValueError("At least one source path is required.")
+    frame_shape = entries[0].shape[len(entries[0].shape) - frame_dims :]
+    if any(
+        entry.shape[len(entry.shape) - frame_dims :] != frame_shape
+        or entry.dtype != entries[0].dtype
+        for entry in entries
+    ):
+        raise ValueError("All sources must have the same frame shape and dtype.")
+
+    counts = [entry.frame_count(frame_dims) for entry in entries]
+    layout = VirtualLayout((sum(counts), *frame_shape), dtype(entries[0].dtype))
+    start = 0
+    for path, entry, count in zip(paths, entries, counts):
+        source = VirtualSource(
+            str(Path(path).absolute()), key, shape=entry.shape, dtype=entry.dtype
+        )
+        leading_shape = entry.shape[: len(entry.shape) - frame_dims]
+        if len(leading_shape) == 0:
+            layout[start] = source
+        elif len(leading_shape) == 1:
+            layout[start : start + count] = source
+        else:
+            row_length = leading_shape[-1]
+            for row in range(prod(leading_shape[:-1])):
+                row_start = start + row * row_length
+                row_index = unravel_index(row, leading_shape[:-1])
+                layout[row_start : row_start + row_length] = source[row_index]
+        start += count
+
+    with File(output, "w") as file:
+        file.create_virtual_dataset(key, layout)
@@ -0,0 +1,313 @@
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+)
+from dataclasses import dataclass
+from hashlib import sha256
+from json import dumps
+from multiprocessing import get_context
+from os import cpu_count
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+
+import torch
+from apischema import serialize
+from h5py import File
+from numpy import float32
+from torch import Tensor, inference_mode, stack
+from torch.nn import Module
+
+from ad_denoise.datasets.config import SizedDatasetConfig
+from ad_denoise.datasets.hdf5 import H5Key, H5Path, SimpleHdf5, file_signature
+from ad_denoise.datasets.sharded import Shard, dataset_edges, split_shards
+from ad_denoise.datasets.utils import SizedDataset, get_items
+from ad_denoise.datasets.virtual import build_virtual_dataset
+
+# Networks are registered alongside the methods which train them, so noise2self is
+# imported such that its network configurations may be deserialized
+from ad_denoise.lightning_modules import noise2self  # noqa: F401
+from ad_denoise.modules import ModuleConfig
+from ad_denoise.writer import DirectChunkWriter, copy_structure
+
+
+@dataclass
+class DenoiseConfig:
+    """A configuration schema for denoising frames with a trained network."""
+
+    #: The network, as configured for training.
+    network: ModuleConfig
+    #: The path of a lightning checkpoint holding the trained network.
+    checkpoint: Path
+    #: The frames to be denoised.
+    dataset: SizedDatasetConfig[Tensor]
+    #: The path of the virtual dataset stitching the denoised shards.
+    output: Path
+    #: The key of the denoised frames within the output and shard files.
+    key: H5Key = H5Key("data")
+    #: The directory of the shard files, if None it is beside the output.
+    shard_directory: Optional[Path] = None
+    #: The maximum number of frames in each shard.
+    shard_frames: int = 1024
+    #: The number of frames denoised in each forward pass.
+    batch_size: int = 16
+    #: The number of worker processes, if None one per cpu is used.
+    processes: Optional[int] = None
+    #: The number of threads used by torch in each worker process.
+    threads: int = 1
+    #: The path of a quantized network, saved by quantize, used in place of the
+    #: checkpoint if given.
+    quantized: Optional[Path] = None
+    #: The compression of the shard files, one of deflate, bitshuffle or zstd, applied
+    #: in a thread pool, if None shards are not compressed.
+    compression: Optional[str] = None
+    #: The number of threads compressing shards in each worker process.
+    compression_threads: int = 2
+    #: The scale factor of integers in which frames are stored, if None frames are
+    #: stored as float32.
+    scale: Optional[float] = None
+    #: The integer type in which frames are stored, if a scale is given.
+    scaled_dtype: str = "int32"
+    #: The path of a NeXus file whose structure is copied into the output, in which the
+    #: denoised frames replace the dataset at key.
+    structure: Optional[H5Path] = None
+
+
+def load_network(
+    network: ModuleConfig, checkpoint: Union[str, Path], prefix: str = "network."
+) -> Module:
+    """Creates a network and loads its trained parameters from a lightning checkpoint.
+
+    Args:
+        network: The network, as configured for training.
+        checkpoint: The path of a lightning checkpoint.
+        prefix: The prefix of the parameters of the network in the checkpoint, such as
+            networks.{name}. for a network of a sweep. Defaults to network.
+
+    Returns:
+        Module: The trained network, in evaluation mode.
+    """
+    state = torch.load(checkpoint, map_location="cpu", weights_only=True)
+    module = network()
+    module.load_state_dict(
+        {
+            name[len(prefix) :]: value
+            for name, value in state["state_dict"].items()
+            if name.startswith(prefix)
+        }
+    )
+    return module.eval()
+
+
+# The fields of the configuration which do not affect the contents of shard files
+_EXECUTION_FIELDS = {
+    "output",
+    "shard_directory",
+    "batch_size",
+    "processes",
+    "threads",
+    "compression_threads",
+    "structure",
+}
+
+
+def source_paths(dataset: Any) -> list[H5Path]:
+    """Finds the hdf5 files from which a dataset tree reads.
+
+    Args:
+        dataset: The root of the dataset tree.
+
+    Returns:
+        list[H5Path]: The paths of the files of every hdf5 source within the tree,
+            found by following the dataset and datasets attributes of wrapping and
+            zipped datasets.
+    """
+    paths: list[H5Path] = []
+    nodes = [dataset]
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, SimpleHdf5):
+            paths.extend(node.paths)
+            continue
+        wrapped = getattr(node, "dataset", None)
+        if wrapped is not None:
+            nodes.append(wrapped)
+        nodes.extend(reversed(getattr(node, "datasets", ())))
+    return paths
+
+
+def fingerprint(config: DenoiseConfig, dataset: Any) -> str:
+    """Identifies the configuration, network and frames from which shards are denoised.
+
+    Args:
+        config: The denoising configuration.
+        dataset: The frames to be denoised, as created from the configuration.
+
+    Returns:
+        str: A digest of the configuration fields which affect the contents of shard
+            files, of the modification time and size of the checkpoint and of the
+            quantized network, if given, and of the path, modification time and size
+            of each hdf5 file from which frames are read.
+    """
+    fields = {
+        name: value
+        for name, value in serialize(DenoiseConfig, config).items()
+        if name not in _EXECUTION_FIELDS
+    }
+    networks = [config.checkpoint, config.quantized]
+    fields["files"] = [
+        list(file_signature(H5Path(path))[1:]) for path in networks if path is not None
+    ]
+    fields["sources"] = [
+        [str(resolved), modified, size]
+        for resolved, modified, size in map(file_signature, source_paths(dataset))
+    ]
+    return sha256(dumps(fields, sort_keys=True).encode()).hexdigest()
+
+
+def shard_fingerprint(path: Path) -> Optional[str]:
+    """Reads the fingerprint from which a shard file was denoised.
+
+    Args:
+        path: The path of the shard file.
+
+    Returns:
+        Optional[str]: The fingerprint, or None if the file does not exist or was not
+            fingerprinted.
+    """
+    try:
+        with File(path, "r") as file:
+            value = file.attrs.get("fingerprint")
+    except (FileNotFoundError, OSError):
+        return None
+    return value if isinstance(value, str) else None
+
+
+def shard_path(directory: Path, shard: Shard) -> Path:
+    """Gets the path of the file holding the denoised frames of a shard.
+
+    Args:
+        directory: The directory of the shard files.
+        shard: The start and stop of the shard.
+
+    Returns:
+        Path: The path of the shard file.
+    """
+    return directory.joinpath(f"{shard[0]:010d}-{shard[1]:010d}.h5")
+
+
+# The dataset, network and compression thread pool of a worker process, created once by
+# _initialize
+_worker: Optional[tuple[SizedDataset[Tensor], Module, DenoiseConfig, Executor]] = None
+
+
+def _initialize(config: DenoiseConfig) -> None:
+    global _worker
+    torch.set_num_threads(config.threads)
+    _worker = (
+        config.dataset(),
+        (
+            load_network(config.network, config.checkpoint)
+            if config.quantized is None
+            else torch.jit.load(str(config.quantized))
+        ),
+        config,
+        ThreadPoolExecutor(config.compression_threads),
+    )
+
+
+def _denoise_shard(shard: Shard, path: Path, digest: str) -> Path:
+    assert _worker is not None
+    dataset, network, config, executor = _worker
+    start, stop = shard
+    partial = path.with_name(f"{path.name}.partial")
+    writer: Optional[DirectChunkWriter] = None
+    with File(partial, "w") as file:
+        file.attrs["fingerprint"] = digest
+        for batch_start in range(start, stop, config.batch_size):
+            batch_stop = min(batch_start + config.batch_size, stop)
+            inputs = stack(get_items(dataset, range(batch_start, batch_stop)))
+            with inference_mode():
+                outputs = network(inputs)[:, 0].numpy().astype(float32)
+            if writer is None:
+                writer = DirectChunkWriter(
+                    file,
+                    config.key,
+                    (stop - start, *outputs.shape[1:]),
+                    float32 if config.scale is None else config.scaled_dtype,
+                    executor,
+                    config.compression,
+                    scale=config.scale,
+                )
+            writer.write(outputs)
+        if writer is not None:
+            writer.close()
+    return partial.replace(path)
+
+
+def denoise(
+    config: DenoiseConfig,
+    processes: Optional[int] = None,
+    on_shard: Optional[Callable[[Path], Any]] = None,
+) -> list[Path]:
+    """Denoises frames across a pool of processes, stitching shards into one output.
+
+    Divides the frames into shards of contiguous frames within each source file and
+    denoises them across a pool of worker processes, each of which holds its own copy
+    of the network and its own hdf5 handles. Each shard is written to its own file,
+    marked with the fingerprint of the configuration, network and source files and
+    renamed into place once complete, such that shards completed by a previous run with
+    the same fingerprint are not denoised again. The shards are stitched into a virtual
+    dataset at the output.
+
+    Args:
+        config: The denoising configuration.
+        processes: The number of worker processes, if None the configured number is
+            used. Defaults to None.
+        on_shard: A callback invoked with the path of each shard as it completes.
+            Defaults to None.
+
+    Returns:
+        list[Path]: The paths of the shard files, in order.
+
+    Raises:
+        ValueError: If the dataset holds no frames.
+    """
+    output = Path(config.output)
+    directory = Path(
+        config.shard_directory or output.with_name(f"{output.stem}_shards")
+    )
+    dataset = config.dataset()
+    if len(dataset) == 0:
+        raise ValueError("The dataset holds no frames to denoise.")
+    directory.mkdir(parents=True, exist_ok=True)
+    shards = split_shards(dataset_edges(dataset), config.shard_frames)
+    paths = [shard_path(directory, shard) for shard in shards]
+    digest = fingerprint(config, dataset)
+    pending = [
+        (shard, path, digest)
+        for shard, path in zip(shards, paths)
+        if shard_fingerprint(path) != digest
+    ]
+    if pending:
+        with ProcessPoolExecutor(
+            min(processes or config.processes or cpu_count() or 1, len(pending)),
+            mp_context=get_context("spawn"),
+            initializer=_initialize,
+            initargs=(config,),
+        ) as executor:
+            for future in as_completed(
+                [executor.submit(_denoise_shard, *args) for args in pending]
+            ):
+                path = future.result()
+                if on_shard is not None:
+                    on_shard(path)
+    build_virtual_dataset(paths, config.key, output, 2)
+    if config.scale is not None or config.structure is not None:
+        with File(output, "a") as file:
+            if config.scale is not None:
+                file[config.key].attrs["scale_factor"] = config.scale
+            if config.structure is not None:
+                copy_structure(config.structure, file, config.key)
+    return paths
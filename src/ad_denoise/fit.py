@@ -0,0 +1,264 @@
+from dataclasses import dataclass
+from math import exp, log, sqrt
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional, Union
+
+import torch
+from torch import Tensor, float64, zeros
+from torch.fft import irfft2, rfft2
+from torch.nn.functional import conv2d
+
+from ad_denoise.lightning_modules.noise2self import ScaledGaussianConfig
+from ad_denoise.modules.gaussian import BlindGaussianKernel2D, GaussianKernel2D
+from ad_denoise.train import TrainConfig
+
+#: The ratio of the golden section, by which the search interval shrinks each step.
+GOLDEN_RATIO = (sqrt(5) - 1) / 2
+
+
+class AutocorrelationStatistics:
+    """The spatial autocorrelation of frames, accumulated over a stream of batches.
+
+    The sum over frames of the zero padded autocorrelation of each frame, at each
+    offset up to a maximum in each axis, along with the number of pixels accumulated,
+    from which the mean squared error of any linear filter of that extent may be
+    computed without revisiting the frames.
+    """
+
+    def __init__(self, max_offset: int) -> None:
+        """Creates empty autocorrelation statistics.
+
+        Args:
+            max_offset: The largest offset, in each axis, at which autocorrelation is
+                accumulated.
+        """
+        self.max_offset = max_offset
+        self.sums = zeros((2 * max_offset + 1, 2 * max_offset + 1), dtype=float64)
+        self.pixels = 0
+
+    def update(self, frames: Tensor) -> None:
+        """Accumulates the autocorrelation of a batch of frames.
+
+        Args:
+            frames: A batch of single channel frames, of shape (batch, 1, height,
+                width), or of frames of shape (batch, height, width).
+        """
+        frames = frames.reshape(-1, *frames.shape[-2:]).to(float64)
+        offset = self.max_offset
+        size = (frames.shape[-2] + offset, frames.shape[-1] + offset)
+        spectra = rfft2(frames, s=size)
+        correlation = irfft2(spectra * spectra.conj(), s=size).sum(dim=0)
+        self.sums += correlation.roll((offset, offset), dims=(0, 1))[
+            : 2 * offset + 1, : 2 * offset + 1
+        ]
+        self.pixels += frames.numel()
+
+    def _lags(self, max_offset: int) -> Tensor:
+        return self.sums[
+            self.max_offset - max_offset : self.max_offset + max_offset + 1,
+            self.max_offset - max_offset : self.max_offset + max_offset + 1,
+        ]
+
+    def __call__(self, kernel: Tensor) -> tuple[float, float]:
+        """Computes the least mean squared error of a scaled filter in reconstruction.
+
+        Computes the scalar which minimises the mean squared error between frames and
+        the scaled convolution of the zero padded frames with a kernel, and that error,
+        neglecting the effect of padding on the energy of the convolution at frame
+        edges.
+
+        Args:
+            kernel: A square kernel of odd width, whose half width is no more than
+                half of max_offset.
+
+        Returns:
+            tuple[float, float]: The optimal scalar and the mean squared error.
+        """
+        kernel = kernel.reshape(kernel.shape[-2:]).to(float64)
+        half_width = kernel.shape[-1] // 2
+        cross = float((kernel * self._lags(half_width)).sum())
+        energy = float(
+            (
+                kernel
+                * conv2d(self._lags(2 * half_width)[None, None], kernel[None, None])
+            ).sum()
+        )
+        signal = float(self.sums[self.max_offset, self.max_offset])
+        if energy <= 0:
+            return 0.0, signal / self.pixels
+        return cross / energy, (signal - cross**2 / energy) / self.pixels
+
+
+def golden_section(
+    objective: Callable[[float], float], lower: float, upper: float, tol: float
+) -> float:
+    """Finds the minimum of a unimodal function on an interval by golden section search.
+
+    Args:
+        objective: The function to be minimised.
+        lower: The lower bound of the interval.
+        upper: The upper bound of the interval.
+        tol: The width of the interval at which the search stops.
+
+    Returns:
+        float: The centre of the final interval.
+    """
+    inner_lower = upper - GOLDEN_RATIO * (upper - lower)
+    inner_upper = lower + GOLDEN_RATIO * (upper - lower)
+    lower_value, upper_value = objective(inner_lower), objective(inner_upper)
+    while upper - lower > tol:
+        if lower_value < upper_value:
+            upper, inner_upper, upper_value = inner_upper, inner_lower, lower_value
+            inner_lower = upper - GOLDEN_RATIO * (upper - lower)
+            lower_value = objective(inner_lower)
+        else:
+            lower, inner_lower, lower_value = inner_lower, inner_upper, upper_value
+            inner_upper = lower + GOLDEN_RATIO * (upper - lower)
+            upper_value = objective(inner_upper)
+    return (lower + upper) / 2
+
+
+@dataclass
+class GaussianFit:
+    """The parameters of a scaled gaussian denoiser which minimise its loss."""
+
+    stdev: float
+    scalar: float
+    loss: float
+
+
+def fit_gaussian(
+    statistics: AutocorrelationStatistics,
+    half_width: int,
+    blind: bool = True,
+    tolerance: Optional[float] = None,
+    min_stdev: float = 1e-2,
+    samples: int = 64,
+    tol: float = 1e-4,
+) -> GaussianFit:
+    """Fits a scaled gaussian denoiser to autocorrelation statistics.
+
+    Fits the stdev of a gaussian kernel and the scalar of its output by minimising the
+    mean squared error of reconstruction, where the scalar is solved in closed form for
+    each stdev and the stdev is found by a search of its logarithm, sampled across the
+    interval then refined by golden section about the best sample. Without a blind spot
+    the loss falls as the kernel approaches the identity, as such a blind spot is used
+    by default, for which the loss is that of noise2self.
+
+    Args:
+        statistics: The autocorrelation statistics of the training frames, to an offset
+            of at least twice the half width.
+        half_width: The half width of the kernel.
+        blind: If True, the centre of the kernel is excluded. Defaults to True.
+        tolerance: The smallest weight of a tap relative to the centre of the kernel,
+            beyond which the kernel is truncated for each stdev, as it is when
+            convolved, if None the kernel is not truncated. Defaults to None.
+        min_stdev: The smallest stdev searched. Defaults to 1e-2.
+        samples: The number of stdevs sampled before refinement. Defaults to 64.
+        tol: The precision of the logarithm of the stdev. Defaults to 1e-4.
+
+    Returns:
+        GaussianFit: The stdev and scalar of the fit and its loss.
+
+    Raises:
+        ValueError: If the statistics do not extend to twice the half width.
+    """
+    if statistics.max_offset < 2 * half_width:
+        raise ValueError(
+            f"Statistics to offset {statistics.max_offset} cannot fit a kernel of half "
+            f"width {half_width}, which requires offsets to {2 * half_width}."
+        )
+    module = (BlindGaussianKernel2D if blind else GaussianKernel2D)(
+        half_width, 1.0, tolerance
+    )
+
+    def evaluate(log_stdev: float) -> tuple[float, float]:
+        with torch.no_grad():
+            module.stdev.fill_(exp(log_stdev))
+            return statistics(module._build_kernel(module.effective_half_width()))
+
+    lower, upper = log(min_stdev), log(4 * half_width)
+    step = (upper - lower) / (samples - 1)
+    best = min(
+        (lower + idx * step for idx in range(samples)),
+        key=lambda log_stdev: evaluate(log_stdev)[1],
+    )
+    log_stdev = golden_section(
+        lambda log_stdev: evaluate(log_stdev)[1],
+        max(best - step, lower),
+        min(best + step, upper),
+        tol,
+    )
+    scalar, loss = evaluate(log_stdev)
+    return GaussianFit(exp(log_stdev), scalar, loss)
+
+
+def accumulate(batches: Iterable[Any], max_offset: int) -> AutocorrelationStatistics:
+    """Accumulates the autocorrelation statistics of a stream of batches of frames.
+
+    Args:
+        batches: The batches of single channel frames, or of tuples led by them.
+        max_offset: The largest offset, in each axis, at which autocorrelation is
+            accumulated.
+
+    Returns:
+        AutocorrelationStatistics: The statistics of all frames.
+    """
+    statistics = AutocorrelationStatistics(max_offset)
+    for batch in batches:
+        while not isinstance(batch, Tensor):
+            batch = batch[0]
+        statistics.update(batch)
+    return statistics
+
+
+def fit(config: TrainConfig, output: Union[str, Path]) -> GaussianFit:
+    """Fits the configured scaled gaussian network in a single pass of its data.
+
+    Fits the configured scaled gaussian network to its training dataset, read once by
+    its training loader, and saves the fitted network as a checkpoint from which the
+    network may be loaded, as from a checkpoint of training. The centre of the kernel
+    is excluded from the fit if the network is configured with a blind spot, without
+    which the fit converges to the identity, and the kernel is truncated to the
+    configured tolerance, as it is when convolved.
+
+    Args:
+        config: The training configuration, of a model with a scaled gaussian network,
+            a training dataset and a training loader.
+        output: The path at which the checkpoint is saved.
+
+    Returns:
+        GaussianFit: The stdev and scalar of the fit and its loss.
+
+    Raises:
+        ValueError: If the model does not have a scaled gaussian network.
+    """
+    network = getattr(config.model, "network", None)
+    if not isinstance(network, ScaledGaussianConfig):
+        raise ValueError(f"{type(config.model).__name__} has no Gaussian network.")
+    model: Any = config.model
+    half_width = network.kernel_half_width
+    statistics = accumulate(
+        model.train_loader(model.train_dataset(), shuffle=False), 2 * half_width
+    )
+    result = fit_gaussian(
+        statistics, half_width, network.blind, network.kernel_tolerance
+    )
+    module = network()
+    module.load_state_dict(
+        {
+            "1.radii": module.state_dict()["1.radii"],
+            "1.stdev": torch.tensor([result.stdev]),
+            "2.scalar": torch.tensor([result.scalar]),
+        }
+    )
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    torch.save(
+        {
+            "state_dict": {
+                f"network.{name}": value for name, value in module.state_dict().items()
+            }
+        },
+        output,
+    )
+    return result
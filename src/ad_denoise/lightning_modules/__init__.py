@@ -1,4 +1,23 @@
-from . import noise2self
+from . import masking, noise2self, sweep
 from .config import LightningModuleConfig
+from .masking import (
+    GridMasking,
+    GridMaskingConfig,
+    Masking,
+    MaskingConfig,
+    RandomMasking,
+    RandomMaskingConfig,
+)
 
-__all__ = ["LightningModuleConfig", "noise2self"]
+__all__ = [
+    "GridMasking",
+    "GridMaskingConfig",
+    "LightningModuleConfig",
+    "Masking",
+    "MaskingConfig",
+    "RandomMasking",
+    "RandomMaskingConfig",
+    "masking",
+    "noise2self",
+    "sweep",
+]
@@ -0,0 +1,230 @@
+from dataclasses import dataclass
+from typing import NamedTuple
+
+import torch
+from torch import Tensor
+
+from ad_denoise.utils import TaggedUnionBase, as_tagged_union
+
+
+class MaskedBatch(NamedTuple):
+    """A batch with masked pixels replaced, the masked pixels and their true values."""
+
+    #: The batch, in which masked pixels are replaced by their interpolation.
+    inputs: Tensor
+    #: The flattened indices of the masked pixels of each frame, as (frames, pixels).
+    indices: Tensor
+    #: The true values of the masked pixels of each frame, as (frames, pixels).
+    targets: Tensor
+
+
+class _Buffers:
+    def __init__(self, batch: Tensor, pixels: int) -> None:
+        frames = batch[..., 0, 0].numel()
+        height, width = batch.shape[-2:]
+        self.indices = torch.empty(
+            (frames, pixels), dtype=torch.long, device=batch.device
+        )
+        self.padded_indices = torch.empty_like(self.indices)
+        self.padded = batch.new_zeros((frames, height + 2, width + 2))
+        self.neighbour = batch.new_empty((frames, pixels))
+        self.interpolated = torch.empty_like(self.neighbour)
+        self.targets = torch.empty_like(self.neighbour)
+        self.inputs = torch.empty_like(batch)
+        self.zeros = torch.zeros_like(self.neighbour)
+
+
+class Masking:
+    """A generator of noise2self masks, replacing masked pixels by interpolation.
+
+    A generator of noise2self masks for whole batches, which selects a fixed number of
+    pixels in each frame and replaces them by the mean of their four neighbours, where
+    neighbours which are themselves masked, or beyond the frame, count as zero. As such
+    the prediction of a network at a masked pixel is independent of its value, and the
+    loss may be evaluated at masked pixels alone, for any network. Buffers are retained
+    for each batch shape, such that steady state masking does not allocate.
+    """
+
+    def __init__(self) -> None:
+        """Creates a generator of noise2self masks."""
+        self._buffers: dict[tuple[torch.Size, torch.device, torch.dtype], _Buffers] = {}
+
+    def pixels(self, height: int, width: int) -> int:
+        """Computes the number of masked pixels in each frame.
+
+        Args:
+            height: The height of each frame.
+            width: The width of each frame.
+
+        Returns:
+            int: The number of masked pixels in each frame.
+        """
+        raise NotImplementedError(self)
+
+    def _select(self, buffers: _Buffers, height: int, width: int) -> None:
+        raise NotImplementedError(self)
+
+    def _get_buffers(self, batch: Tensor) -> _Buffers:
+        key = (batch.shape, batch.device, batch.dtype)
+        if key not in self._buffers:
+            self._buffers[key] = _Buffers(batch, self.pixels(*batch.shape[-2:]))
+        return self._buffers[key]
+
+    def __call__(self, batch: Tensor) -> MaskedBatch:
+        """Masks a batch, replacing the masked pixels of each frame by interpolation.
+
+        Args:
+            batch: A batch of frames, of shape (..., height, width).
+
+        Returns:
+            MaskedBatch: The masked batch, the masked pixels and their true values. The
+                tensors are reused by the next batch of the same shape.
+        """
+        buffers = self._get_buffers(batch)
+        height, width = batch.shape[-2:]
+        self._select(buffers, height, width)
+        frames = batch.detach().reshape(-1, height * width)
+        torch.gather(frames, 1, buffers.indices, out=buffers.targets)
+        # Indices within the padded frames, (y + 1) * (width + 2) + x + 1
+        padded_indices = buffers.padded_indices
+        torch.floor_divide(buffers.indices, width, out=padded_indices)
+        padded_indices.mul_(2).add_(buffers.indices).add_(width + 3)
+        padded = buffers.padded.view(padded_indices.shape[0], -1)
+        buffers.padded[:, 1:-1, 1:-1].copy_(frames.view(-1, height, width))
+        padded.scatter_(1, padded_indices, buffers.zeros)
+        buffers.interpolated.zero_()
+        for step in (-1, 2, -width - 3, 2 * width + 4):
+            padded_indices.add_(step)
+            torch.gather(padded, 1, padded_indices, out=buffers.neighbour)
+            buffers.interpolated.add_(buffers.neighbour)
+        buffers.interpolated.mul_(0.25)
+        buffers.inputs.copy_(batch.detach())
+        buffers.inputs.view(-1, height * width).scatter_(
+            1, buffers.indices, buffers.interpolated
+        )
+        return MaskedBatch(buffers.inputs, buffers.indices, buffers.targets)
+
+    @staticmethod
+    def gather(outputs: Tensor, indices: Tensor) -> Tensor:
+        """Gathers the predictions at the masked pixels into a compact tensor.
+
+        Args:
+            outputs: The predictions of a network, of shape (..., height, width).
+            indices: The flattened indices of the masked pixels of each frame.
+
+        Returns:
+            Tensor: The predictions at the masked pixels, as (frames, pixels).
+        """
+        return outputs.reshape(indices.shape[0], -1).gather(1, indices)
+
+
+class GridMasking(Masking):
+    """A generator of noise2self masks on a regular grid, with random phase per frame.
+
+    A generator of noise2self masks, which masks one pixel in each square cell of a
+    regular grid, at a phase within the cell chosen at random for each frame.
+    """
+
+    def __init__(self, spacing: int = 4) -> None:
+        """Creates a generator of noise2self masks on a regular grid.
+
+        Args:
+            spacing: The distance between masked pixels, along each axis. Defaults to 4.
+
+        Raises:
+            ValueError: If the spacing is less than two, such that masked pixels would
+                neighbour one another.
+        """
+        super().__init__()
+        if spacing < 2:
+            raise ValueError("Grid spacing must be at least two.")
+        self.spacing = spacing
+        self._grids: dict[tuple[int, int, torch.device], Tensor] = {}
+        self._phases: dict[tuple[int, torch.device], tuple[Tensor, Tensor]] = {}
+
+    def pixels(self, height: int, width: int) -> int:  # noqa: D102
+        return (height // self.spacing) * (width // self.spacing)
+
+    def _select(self, buffers: _Buffers, height: int, width: int) -> None:
+        frames, device = buffers.indices.shape[0], buffers.indices.device
+        if (height, width, device) not in self._grids:
+            rows = torch.arange(height // self.spacing, device=device) * self.spacing
+            columns = torch.arange(width // self.spacing, device=device) * self.spacing
+            self._grids[height, width, device] = (
+                rows[:, None] * width + columns[None, :]
+            ).flatten()
+        if (frames, device) not in self._phases:
+            self._phases[frames, device] = (
+                torch.empty((frames, 1), dtype=torch.long, device=device),
+                torch.empty((frames, 1), dtype=torch.long, device=device),
+            )
+        rows, columns = self._phases[frames, device]
+        rows.random_(self.spacing)
+        columns.random_(self.spacing)
+        rows.mul_(width).add_(columns)
+        torch.add(self._grids[height, width, device], rows, out=buffers.indices)
+
+
+class RandomMasking(Masking):
+    """A generator of noise2self masks of pixels drawn at random, without repeats."""
+
+    def __init__(self, fraction: float = 0.0625) -> None:
+        """Creates a generator of noise2self masks of pixels drawn at random.
+
+        Args:
+            fraction: The fraction of pixels masked in each frame. Defaults to 0.0625.
+
+        Raises:
+            ValueError: If the fraction is not between zero and one.
+        """
+        super().__init__()
+        if not 0 < fraction < 1:
+            raise ValueError("Masked fraction must be between zero and one.")
+        self.fraction = fraction
+        self._scores: dict[tuple[int, int, torch.device], tuple[Tensor, Tensor]] = {}
+
+    def pixels(self, height: int, width: int) -> int:  # noqa: D102
+        return max(1, int(self.fraction * height * width))
+
+    def _select(self, buffers: _Buffers, height: int, width: int) -> None:
+        frames, pixels = buffers.indices.shape
+        key = (frames, height * width, buffers.indices.device)
+        if key not in self._scores:
+            self._scores[key] = (
+                torch.empty((frames, height * width), device=key[2]),
+                torch.empty((frames, pixels), device=key[2]),
+            )
+        scores, values = self._scores[key]
+        scores.uniform_()
+        torch.topk(scores, pixels, dim=1, sorted=False, out=(values, buffers.indices))
+
+
+@dataclass
+@as_tagged_union
+class MaskingConfig(TaggedUnionBase):
+    """A configuration schema for noise2self masking."""
+
+    def __call__(self) -> Masking:  # noqa: D102
+        raise NotImplementedError(self)
+
+
+@dataclass
+class GridMaskingConfig(MaskingConfig):
+    """A configuration schema for noise2self masking on a regular grid."""
+
+    __alias__ = "GridMasking"
+    spacing: int = 4
+
+    def __call__(self) -> Masking:  # noqa: D102
+        return GridMasking(self.spacing)
+
+
+@dataclass
+class RandomMaskingConfig(MaskingConfig):
+    """A configuration schema for noise2self masking of pixels drawn at random."""
+
+    __alias__ = "RandomMasking"
+    fraction: float = 0.0625
+
+    def __call__(self) -> Masking:  # noqa: D102
+        return RandomMasking(self.fraction)
@@ -1,18 +1,23 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Optional
 
 from pytorch_lightning import LightningModule
 from torch import Tensor
 from torch.nn import Module, Sequential, ZeroPad2d
 from torch.nn.functional import mse_loss
 from torch.optim import Adam
-from torch.utils.data import DataLoader, Dataset
+from torch.utils.data import Dataset
 
 from ad_denoise.datasets.config import SizedDatasetConfig
+from ad_denoise.loaders import DataLoaderConfig, ProcessDataLoaderConfig
 from ad_denoise.modules import ScalarMultiply
+from ad_denoise.modules.blind_spot import ShiftedBlindSpotNetwork
 from ad_denoise.modules.config import ModuleConfig
-from ad_denoise.modules.gaussian import GaussianKernel2D
+from ad_denoise.modules.gaussian import BlindGaussianKernel2D, GaussianKernel2D
+from ad_denoise.timing import Stage, timed
 
 from .config import LightningModuleConfig
+from .masking import Masking, MaskingConfig
 
 
 class Noise2Self(LightningModule):
@@ -20,7 +25,8 @@ class Noise2Self(LightningModule):
 
     A ligntning module which trains a nieve scaled gaussian denoiser. This model will
     always converge close to a pair of weights which maximises the contribution by the
-    centermost pixel.
+    centermost pixel. If masking is given, masked pixels are replaced in the input and
+    the loss is evaluated at masked pixels alone, such that any network may be trained.
     """
 
     def __init__(
@@ -28,6 +34,10 @@ class Noise2Self(LightningModule):
         network: Module,
         train_dataset: Dataset[Tensor],
         val_dataset: Dataset[tuple[Tensor, Tensor]],
+        train_loader: Optional[DataLoaderConfig] = None,
+        val_loader: Optional[DataLoaderConfig] = None,
+        masking: Optional[Masking] = None,
+        learning_rate: float = 0.1,
     ) -> None:
         """Creates a ligntning module which trains a nieve scaled gaussian denoiser.
 
@@ -41,11 +51,24 @@ class Noise2Self(LightningModule):
             val_dataset: A dataset which produces the evaluation data, in the form of a
                 tuple containing two two dimensional tensors per index, the first of
                 which represents noisy data and the second which represents clean data.
+            train_loader: The data loader used to load batches of training data, if
+                None a pytorch data loader with worker processes is used. Defaults to
+                None.
+            val_loader: The data loader used to load batches of evaluation data, if
+                None a pytorch data loader with worker processes is used. Defaults to
+                None.
+            masking: The masking of training batches, if None the loss is evaluated at
+                every pixel of the unmasked batch. Defaults to None.
+            learning_rate: The learning rate of the Adam optimizer. Defaults to 0.1.
         """
         super().__init__()
         self.train_dataset = train_dataset
         self.val_dataset = val_dataset
         self.network = network
+        self.train_loader = train_loader or ProcessDataLoaderConfig()
+        self.val_loader = val_loader or ProcessDataLoaderConfig()
+        self.masking = masking
+        self.learning_rate = learning_rate
 
     def forward(self, x: Tensor) -> Tensor:  # type: ignore  # noqa: D102
         return self.network(x)
@@ -53,33 +76,35 @@ class Noise2Self(LightningModule):
     def training_step(  # type: ignore
         self, batch: Tensor, batch_idx: int
     ) -> Tensor:  # noqa: D102
-        inputs = targets = batch
-        outputs = self.forward(inputs)
-        loss = mse_loss(outputs, targets)
+        with timed(Stage.TRAINING_STEP):
+            if self.masking is None:
+                inputs = targets = batch
+                outputs = self.forward(inputs)
+            else:
+                inputs, indices, targets = self.masking(batch)
+                outputs = Masking.gather(self.forward(inputs), indices)
+            loss = mse_loss(outputs, targets)
         self.log("train_loss", loss)
         return loss
 
     def validation_step(  # type: ignore
         self, batch: tuple[Tensor, Tensor], batch_idx: int
     ) -> Tensor:  # noqa: D102
-        inputs, targets = batch
-        outputs = self.forward(inputs)
-        loss = mse_loss(outputs, targets)
-        self.log("val_loss", loss)
+        with timed(Stage.VALIDATION_STEP):
+            inputs, targets = batch
+            outputs = self.forward(inputs)
+            loss = mse_loss(outputs, targets)
+        self.log("val_loss", loss, sync_dist=True)
         return loss
 
-    def train_dataloader(self) -> DataLoader:  # noqa: D102
-        return DataLoader(
-            self.train_dataset, batch_size=32, shuffle=True, num_workers=12
-        )
+    def train_dataloader(self) -> Iterable[Any]:  # noqa: D102
+        return self.train_loader(self.train_dataset, shuffle=True)
 
-    def val_dataloader(self) -> DataLoader:  # noqa: D102
-        return DataLoader(
-            self.val_dataset, batch_size=32, shuffle=False, num_workers=12
-        )
+    def val_dataloader(self) -> Iterable[Any]:  # noqa: D102
+        return self.val_loader(self.val_dataset, shuffle=False)
 
     def configure_optimizers(self) -> Adam:  # noqa: D102
-        return Adam(self.parameters(), 0.1)
+        return Adam(self.parameters(), self.learning_rate)
 
 
 @dataclass
@@ -88,15 +113,37 @@ class ScaledGaussianConfig(ModuleConfig):
 
     __alias__ = "Gaussian"
     kernel_half_width: int
+    #: The relative weight beyond which the kernel is truncated, if None it is not.
+    kernel_tolerance: Optional[float] = None
+    #: If True, the centre of the kernel is excluded, such that it has a blind spot.
+    blind: bool = False
 
     def __call__(self) -> Module:  # noqa:D102
+        kernel = BlindGaussianKernel2D if self.blind else GaussianKernel2D
         return Sequential(
             ZeroPad2d(self.kernel_half_width),
-            GaussianKernel2D(self.kernel_half_width),
+            kernel(self.kernel_half_width, tolerance=self.kernel_tolerance),
             ScalarMultiply(),
         )
 
 
+@dataclass
+class ShiftedBlindSpotConfig(ModuleConfig):
+    """A configuration schema for a blind spot network of shifted convolutions."""
+
+    __alias__ = "ShiftedBlindSpot"
+    #: The number of channels of each hidden layer.
+    channels: int = 32
+    #: The number of shifted convolutions.
+    depth: int = 5
+    kernel_half_width: int = 1
+
+    def __call__(self) -> Module:  # noqa:D102
+        return ShiftedBlindSpotNetwork(
+            channels=self.channels, depth=self.depth, half_width=self.kernel_half_width
+        )
+
+
 @dataclass
 class Noise2SelfConfig(LightningModuleConfig):
     """A configuration schema for the noise2self method."""
@@ -105,6 +152,20 @@ class Noise2SelfConfig(LightningModuleConfig):
     network: ModuleConfig
     train_dataset: SizedDatasetConfig[Tensor]
     val_dataset: SizedDatasetConfig[tuple[Tensor, Tensor]]
+    train_loader: DataLoaderConfig = field(default_factory=ProcessDataLoaderConfig)
+    val_loader: DataLoaderConfig = field(default_factory=ProcessDataLoaderConfig)
+    #: The masking of training batches, if None the loss is evaluated at every pixel.
+    masking: Optional[MaskingConfig] = None
+    #: The learning rate of the Adam optimizer.
+    learning_rate: float = 0.1
 
     def __call__(self) -> LightningModule:  # noqa: D102
-        return Noise2Self(self.network(), self.train_dataset(), self.val_dataset())
+        return Noise2Self(
+            self.network(),
+            self.train_dataset(),
+            self.val_dataset(),
+            self.train_loader,
+            self.val_loader,
+            None if self.masking is None else self.masking(),
+            self.learning_rate,
+        )
@@ -0,0 +1,156 @@
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Optional, cast
+
+from pytorch_lightning import LightningModule
+from pytorch_lightning.core.optimizer import LightningOptimizer
+from torch import Tensor
+from torch.nn import Module, ModuleDict
+from torch.nn.functional import mse_loss
+from torch.optim import Adam
+from torch.utils.data import Dataset
+
+from ad_denoise.datasets.config import SizedDatasetConfig
+from ad_denoise.loaders import DataLoaderConfig, ProcessDataLoaderConfig
+from ad_denoise.modules.config import ModuleConfig
+from ad_denoise.timing import Stage, timed
+
+from .config import LightningModuleConfig
+from .masking import Masking, MaskingConfig
+
+
+class Noise2SelfSweep(LightningModule):
+    """A lightning module which trains several networks by noise2self on one stream.
+
+    A lightning module which trains several networks side by side using the noise2self
+    methodology, such that each batch is read, decompressed and masked once and every
+    network is trained on identical batches. Each network has its own parameter group
+    of a single optimizer, which is stepped once per batch by manual optimization, such
+    that steps count batches, and its losses are logged under its name.
+    """
+
+    def __init__(
+        self,
+        networks: dict[str, Module],
+        train_dataset: Dataset[Tensor],
+        val_dataset: Dataset[tuple[Tensor, Tensor]],
+        train_loader: Optional[DataLoaderConfig] = None,
+        val_loader: Optional[DataLoaderConfig] = None,
+        masking: Optional[Masking] = None,
+        learning_rate: float = 0.1,
+    ) -> None:
+        """Creates a lightning module which trains several networks on one stream.
+
+        Args:
+            networks: The neural networks to be trained, by name, each of which must
+                take an image in and return an equivilent image. Names must not contain
+                a period.
+            train_dataset: A dataset which produces the training data, in the form of a
+                single two dimensional tensor per index, which represents noisy data.
+            val_dataset: A dataset which produces the evaluation data, in the form of a
+                tuple containing two two dimensional tensors per index, the first of
+                which represents noisy data and the second which represents clean data.
+            train_loader: The data loader used to load batches of training data, if
+                None a pytorch data loader with worker processes is used. Defaults to
+                None.
+            val_loader: The data loader used to load batches of evaluation data, if
+                None a pytorch data loader with worker processes is used. Defaults to
+                None.
+            masking: The masking of training batches, shared by all networks, if None
+                the loss is evaluated at every pixel of the unmasked batch. Defaults to
+                None.
+            learning_rate: The learning rate of the parameter group of each network.
+                Defaults to 0.1.
+
+        Raises:
+            ValueError: If no networks are given.
+        """
+        super().__init__()
+        if not networks:
+            raise ValueError("At least one network must be swept.")
+        self.automatic_optimization = False
+        self.train_dataset = train_dataset
+        self.val_dataset = val_dataset
+        self.networks = ModuleDict(networks)
+        self.train_loader = train_loader or ProcessDataLoaderConfig()
+        self.val_loader = val_loader or ProcessDataLoaderConfig()
+        self.masking = masking
+        self.learning_rate = learning_rate
+
+    def forward(self, x: Tensor) -> dict[str, Tensor]:  # type: ignore  # noqa: D102
+        return {name: network(x) for name, network in self.networks.items()}
+
+    def training_step(  # type: ignore
+        self, batch: Tensor, batch_idx: int
+    ) -> dict[str, Tensor]:  # noqa: D102
+        losses: dict[str, Tensor] = {}
+        with timed(Stage.TRAINING_STEP):
+            if self.masking is None:
+                inputs = targets = batch
+            else:
+                inputs, indices, targets = self.masking(batch)
+            optimizer = cast(LightningOptimizer, self.optimizers())
+            optimizer.zero_grad()
+            for name, network in self.networks.items():
+                outputs = network(inputs)
+                if self.masking is not None:
+                    outputs = Masking.gather(outputs, indices)
+                loss = mse_loss(outputs, targets)
+                self.manual_backward(loss)
+                losses[name] = loss.detach()
+            optimizer.step()
+        for name, loss in losses.items():
+            self.log(f"train_loss/{name}", loss)
+        return losses
+
+    def validation_step(  # type: ignore
+        self, batch: tuple[Tensor, Tensor], batch_idx: int
+    ) -> dict[str, Tensor]:  # noqa: D102
+        with timed(Stage.VALIDATION_STEP):
+            inputs, targets = batch
+            losses = {
+                name: mse_loss(outputs, targets)
+                for name, outputs in self.forward(inputs).items()
+            }
+        for name, loss in losses.items():
+            self.log(f"val_loss/{name}", loss, sync_dist=True)
+        return losses
+
+    def train_dataloader(self) -> Iterable[Any]:  # noqa: D102
+        return self.train_loader(self.train_dataset, shuffle=True)
+
+    def val_dataloader(self) -> Iterable[Any]:  # noqa: D102
+        return self.val_loader(self.val_dataset, shuffle=False)
+
+    def configure_optimizers(self) -> Adam:  # noqa: D102
+        return Adam(
+            [{"params": network.parameters()} for network in self.networks.values()],
+            self.learning_rate,
+        )
+
+
+@dataclass
+class Noise2SelfSweepConfig(LightningModuleConfig):
+    """A configuration schema for the noise2self method over several networks."""
+
+    __alias__ = "Noise2SelfSweep"
+    #: The networks to be trained on identical batches, by name.
+    networks: dict[str, ModuleConfig]
+    train_dataset: SizedDatasetConfig[Tensor]
+    val_dataset: SizedDatasetConfig[tuple[Tensor, Tensor]]
+    train_loader: DataLoaderConfig = field(default_factory=ProcessDataLoaderConfig)
+    val_loader: DataLoaderConfig = field(default_factory=ProcessDataLoaderConfig)
+    #: The masking of training batches, if None the loss is evaluated at every pixel.
+    masking: Optional[MaskingConfig] = None
+    #: The learning rate of the parameter group of each network.
+    learning_rate: float = 0.1
+
+    def __call__(self) -> LightningModule:  # noqa: D102
+        return Noise2SelfSweep(
+            {name: network() for name, network in self.networks.items()},
+            self.train_dataset(),
+            self.val_dataset(),
+            self.train_loader,
+            self.val_loader,
+            None if self.masking is None else self.masking(),
+            self.learning_rate,
+        )
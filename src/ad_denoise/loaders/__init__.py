@@ -0,0 +1,14 @@
+from . import process, threaded
+from .config import DataLoaderConfig
+from .process import ProcessDataLoaderConfig, ResumableDataLoader
+from .threaded import ThreadedDataLoader, ThreadedDataLoaderConfig
+
+__all__ = [
+    "process",
+    "threaded",
+    "DataLoaderConfig",
+    "ProcessDataLoaderConfig",
+    "ResumableDataLoader",
+    "ThreadedDataLoader",
+    "ThreadedDataLoaderConfig",
+]
@@ -0,0 +1,24 @@
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+from torch.utils.data import Dataset
+
+from ad_denoise.utils import TaggedUnionBase, as_tagged_union
+
+
+@dataclass
+@as_tagged_union
+class DataLoaderConfig(TaggedUnionBase):
+    """A configuration schema for data loaders."""
+
+    def __call__(self, dataset: Dataset[Any], shuffle: bool) -> Iterable[Any]:
+        """Creates a data loader over a dataset.
+
+        Args:
+            dataset: The dataset from which items are loaded.
+            shuffle: If True, items are drawn in a random order each epoch.
+
+        Returns:
+            Iterable[Any]: The data loader, an iterable of batches.
+        """
+        raise NotImplementedError(self)
@@ -0,0 +1,101 @@
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional
+
+from torch import Generator
+from torch.utils.data import DataLoader, Dataset
+
+from ad_denoise.datasets.resumable import (
+    ResumableBatchSampler,
+    ResumableSampler,
+    resumable_sampler,
+)
+from ad_denoise.memory import memory_tracking_enabled, worker_init_fn
+
+from .config import DataLoaderConfig
+
+
+class ResumableDataLoader(DataLoader):
+    """A pytorch data loader whose state is that of its resumable sampler.
+
+    A pytorch data loader which saves and restores the state of its sampler, if it is
+    resumable, such that lightning may resume training mid epoch from the next
+    unconsumed batch. Batches of a resumable sampler are drawn by a batch sampler which
+    counts the indices of the batches consumed by training. The seeds of workers are
+    drawn from a generator of the loader, rather than the global generator, such that
+    the random sequence of the training process does not depend on when the loader was
+    iterated.
+    """
+
+    def __init__(self, dataset: Dataset[Any], **kwargs: Any) -> None:
+        """Creates a pytorch data loader whose state is that of its sampler.
+
+        Args:
+            dataset: The dataset from which items are loaded.
+            kwargs: The keyword arguments of the pytorch data loader.
+        """
+        kwargs.setdefault("generator", Generator())
+        if isinstance(kwargs.get("sampler"), ResumableSampler):
+            kwargs["batch_sampler"] = ResumableBatchSampler(
+                kwargs.pop("sampler"),
+                kwargs.pop("batch_size", 1),
+                kwargs.pop("drop_last", False),
+            )
+        super().__init__(dataset, **kwargs)
+
+    @property
+    def resumable(self) -> Optional[ResumableSampler]:
+        """The resumable sampler of the loader, if any."""
+        return getattr(self.batch_sampler, "resumable", None)
+
+    def state_dict(self) -> dict[str, Any]:
+        """Returns the state of the sampler, if it is resumable.
+
+        Returns:
+            dict[str, Any]: The state of the sampler, or an empty dictionary.
+        """
+        if self.resumable is not None:
+            return self.resumable.state_dict()
+        return {}
+
+    def load_state_dict(self, state_dict: dict[str, Any]) -> None:
+        """Restores the state of the sampler, if it is resumable.
+
+        Args:
+            state_dict: The state, as returned by state_dict.
+        """
+        if self.resumable is not None and state_dict:
+            self.resumable.load_state_dict(state_dict)
+
+
+@dataclass
+class ProcessDataLoaderConfig(DataLoaderConfig):
+    """A configuration schema for a pytorch data loader with worker processes."""
+
+    __alias__ = "ProcessDataLoader"
+    batch_size: int = 32
+    num_workers: int = 12
+    pin_memory: bool = False
+    #: If True, workers are kept alive between epochs, rather than forked each epoch.
+    persistent_workers: bool = False
+    #: The maximum number of frames in each shard of distributed training.
+    shard_frames: Optional[int] = None
+
+    def __call__(self, dataset: Dataset[Any], shuffle: bool) -> Iterable[Any]:
+        """Creates a pytorch data loader with worker processes over a dataset.
+
+        Args:
+            dataset: The dataset from which items are loaded.
+            shuffle: If True, items are drawn in a random order each epoch.
+
+        Returns:
+            Iterable[Any]: The data loader, an iterable of batches.
+        """
+        return ResumableDataLoader(
+            dataset,
+            batch_size=self.batch_size,
+            sampler=resumable_sampler(dataset, shuffle, self.shard_frames),
+            num_workers=self.num_workers,
+            pin_memory=self.pin_memory,
+            persistent_workers=self.persistent_workers and self.num_workers > 0,
+            worker_init_fn=worker_init_fn if memory_tracking_enabled() else None,
+        )
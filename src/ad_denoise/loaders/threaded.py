@@ -0,0 +1,195 @@
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Iterable, Iterator, Optional, Sized, cast
+
+from torch import Tensor, cuda, empty, stack
+from torch.utils.data import (
+    Dataset,
+    RandomSampler,
+    Sampler,
+    SequentialSampler,
+)
+from torch.utils.data._utils.collate import default_collate
+
+from ad_denoise.datasets.read_ahead import ReadAheadDataset, ReadAheadSampler
+from ad_denoise.datasets.resumable import (
+    ResumableBatchSampler,
+    ResumableSampler,
+    resumable_sampler,
+)
+from ad_denoise.datasets.utils import SizedDataset, get_items
+
+from .config import DataLoaderConfig
+
+
+class ThreadedDataLoader(Iterable[Any]):
+    """An in-process data loader which prepares batches across a thread pool.
+
+    An in-process data loader which reads and collates batches in a pool of threads,
+    a configurable number of batches ahead of consumption. Reading, decompression and
+    tensor operations release the global interpreter lock, such that threads achieve
+    parallelism without duplicating file handles, masks and caches across processes.
+    Tensors are collated into a ring of reusable, optionally pinned, buffers, as such a
+    batch is only valid until a further prefetch_batches + 1 batches have been drawn,
+    the ring holding those batches alongside the prefetch_batches prepared behind them.
+    Items may additionally be read a number of items ahead, in the order decided by the
+    sampler at the start of each epoch. If the sampler is resumable, its state is saved
+    and restored with that of the loader.
+    """
+
+    def __init__(
+        self,
+        dataset: Dataset[Any],
+        batch_size: int = 1,
+        shuffle: bool = False,
+        drop_last: bool = False,
+        num_threads: int = 4,
+        prefetch_batches: int = 8,
+        pin_memory: bool = False,
+        read_ahead: int = 0,
+        sampler: Optional[Sampler[int]] = None,
+    ) -> None:
+        """Creates an in-process data loader which prepares batches across threads.
+
+        Args:
+            dataset: The sized dataset from which items are loaded.
+            batch_size: The number of items in each batch. Defaults to 1.
+            shuffle: If True, items are drawn in a random order each epoch. Defaults to
+                False.
+            drop_last: If True, a final incomplete batch is dropped. Defaults to False.
+            num_threads: The number of threads which prepare batches. Defaults to 4.
+            prefetch_batches: The number of batches prepared ahead of consumption.
+                Defaults to 8.
+            pin_memory: If True and cuda is available, batches are collated into page
+                locked memory. Defaults to False.
+            read_ahead: The number of items read ahead of retrieval, in the order
+                decided by the sampler, or zero to read on demand. Defaults to 0.
+            sampler: The sampler which decides the order in which items are drawn, if
+                None items are drawn sequentially or, if shuffling, randomly. Defaults
+                to None.
+        """
+        sized = cast(Sized, dataset)
+        order: Iterable[int] = sampler or (
+            RandomSampler(sized) if shuffle else SequentialSampler(sized)
+        )
+        self.sampler = order
+        if read_ahead > 0:
+            dataset = ReadAheadDataset(
+                cast(SizedDataset[Any], dataset), read_ahead, num_threads
+            )
+            order = ReadAheadSampler(order, dataset)
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.num_threads = num_threads
+        self.prefetch_batches = prefetch_batches
+        self.pin_memory = pin_memory and cuda.is_available()
+        self.batch_sampler = ResumableBatchSampler(
+            order,
+            batch_size,
+            drop_last,
+            sampler if isinstance(sampler, ResumableSampler) else None,
+        )
+
+    def __len__(self) -> int:
+        return len(self.batch_sampler)
+
+    def state_dict(self) -> dict[str, Any]:
+        """Returns the state of the sampler, if it is resumable.
+
+        Returns:
+            dict[str, Any]: The state of the sampler, or an empty dictionary.
+        """
+        if isinstance(self.sampler, ResumableSampler):
+            return self.sampler.state_dict()
+        return {}
+
+    def load_state_dict(self, state_dict: dict[str, Any]) -> None:
+        """Restores the state of the sampler, if it is resumable.
+
+        Args:
+            state_dict: The state, as returned by state_dict.
+        """
+        if isinstance(self.sampler, ResumableSampler) and state_dict:
+            self.sampler.load_state_dict(state_dict)
+
+    def _collate(self, items: list[Any], buffer: Any) -> tuple[Any, Any]:
+        first = items[0]
+        if isinstance(first, Tensor):
+            if (
+                not isinstance(buffer, Tensor)
+                or buffer.shape[1:] != first.shape
+                or buffer.dtype != first.dtype
+            ):
+                buffer = empty(
+                    (self.batch_size, *first.shape),
+                    dtype=first.dtype,
+                    pin_memory=self.pin_memory,
+                )
+            return stack(items, out=buffer[: len(items)]), buffer
+        if isinstance(first, (tuple, list)):
+            buffers = buffer if isinstance(buffer, tuple) else (None,) * len(first)
+            batch, buffers = zip(
+                *(
+                    self._collate(list(elements), element_buffer)
+                    for elements, element_buffer in zip(zip(*items), buffers)
+                )
+            )
+            return batch, buffers
+        return default_collate(items), None
+
+    def _load(self, indices: list[int], buffers: list[Any], slot: int) -> Any:
+        batch, buffers[slot] = self._collate(
+            get_items(self.dataset, indices), buffers[slot]
+        )
+        return batch
+
+    def __iter__(self) -> Iterator[Any]:
+        buffers: list[Any] = [None] * (2 * self.prefetch_batches + 2)
+        pending: deque[Future[Any]] = deque()
+        with ThreadPoolExecutor(self.num_threads) as executor:
+            for batch_idx, indices in enumerate(self.batch_sampler):
+                pending.append(
+                    executor.submit(
+                        self._load, indices, buffers, batch_idx % len(buffers)
+                    )
+                )
+                if len(pending) > self.prefetch_batches:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+
+@dataclass
+class ThreadedDataLoaderConfig(DataLoaderConfig):
+    """A configuration schema for an in-process data loader with a thread pool."""
+
+    __alias__ = "ThreadedDataLoader"
+    batch_size: int = 32
+    num_threads: int = 12
+    prefetch_batches: int = 24
+    pin_memory: bool = False
+    read_ahead: int = 0
+    #: The maximum number of frames in each shard of distributed training.
+    shard_frames: Optional[int] = None
+
+    def __call__(self, dataset: Dataset[Any], shuffle: bool) -> Iterable[Any]:
+        """Creates an in-process data loader with a thread pool over a dataset.
+
+        Args:
+            dataset: The dataset from which items are loaded.
+            shuffle: If True, items are drawn in a random order each epoch.
+
+        Returns:
+            Iterable[Any]: The data loader, an iterable of batches.
+        """
+        return ThreadedDataLoader(
+            dataset,
+            batch_size=self.batch_size,
+            shuffle=shuffle,
+            num_threads=self.num_threads,
+            prefetch_batches=self.prefetch_batches,
+            pin_memory=self.pin_memory,
+            read_ahead=self.read_ahead,
+            sampler=resumable_sampler(dataset, shuffle, self.shard_frames),
+        )
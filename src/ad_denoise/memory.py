@@ -0,0 +1,308 @@
+from enum import IntEnum
+from multiprocessing import Array, Event
+from os import getpid
+from threading import Thread
+from typing import Any, Optional
+
+from numpy import ndarray
+from torch import Tensor
+from torch.nn import Module
+from torch.utils.data import Dataset, get_worker_info
+from torch.utils.hooks import RemovableHandle
+
+from ad_denoise.datasets.chunks import DirectChunkReader
+from ad_denoise.datasets.hdf5 import SimpleHdf5
+from ad_denoise.datasets.read_ahead import ReadAheadDataset
+from ad_denoise.datasets.repeating import RepeatingDataset
+
+
+class Component(IntEnum):
+    """The components of a process which hold memory, as accounted for."""
+
+    RSS = 0
+    FRAME_CACHE = 1
+    MASK = 2
+    CHUNK_CACHE = 3
+    HDF5_CHUNK_CACHE = 4
+    READ_AHEAD = 5
+    BATCH = 6
+
+
+def process_rss(pid: int) -> int:
+    """Gets the resident set size of a process.
+
+    Args:
+        pid: The process id.
+
+    Returns:
+        int: The resident set size in bytes, or zero if it could not be read.
+    """
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            return next(
+                int(line.split()[1]) * 1024
+                for line in status
+                if line.startswith("VmRSS:")
+            )
+    except (FileNotFoundError, ProcessLookupError, StopIteration):
+        return 0
+
+
+def tree_rss(pid: int) -> int:
+    """Sums the resident set size of a process and its descendants.
+
+    Args:
+        pid: The process id of the root process.
+
+    Returns:
+        int: The resident set size in bytes, or zero if it could not be read.
+    """
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as children:
+            descendants = sum(tree_rss(int(child)) for child in children.read().split())
+    except (FileNotFoundError, ProcessLookupError):
+        descendants = 0
+    return process_rss(pid) + descendants
+
+
+def nbytes(obj: Any, seen: Optional[set[int]] = None) -> int:
+    """Sums the bytes held by the tensors and arrays within a nested structure.
+
+    Args:
+        obj: A tensor, array or nested tuple, list or dictionary of them.
+        seen: The ids of objects already accounted for, which are not counted again and
+            to which counted objects are added. Defaults to None.
+
+    Returns:
+        int: The number of bytes held by the tensors and arrays.
+    """
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    if isinstance(obj, Tensor):
+        seen.add(id(obj))
+        return obj.element_size() * obj.nelement()
+    if isinstance(obj, ndarray):
+        seen.add(id(obj))
+        return obj.nbytes
+    if isinstance(obj, (tuple, list)):
+        return sum(nbytes(item, seen) for item in obj)
+    if isinstance(obj, dict):
+        return sum(nbytes(item, seen) for item in obj.values())
+    return 0
+
+
+def _chunk_cache_bytes(reader: Optional[DirectChunkReader], seen: set[int]) -> int:
+    return 0 if reader is None else nbytes(reader.cache.values(), seen)
+
+
+def _hdf5_chunk_cache_bytes(dataset: SimpleHdf5) -> int:
+    return sum(
+        h5_dataset.id.get_access_plist().get_chunk_cache()[1]
+        for h5_dataset in dataset._datasets
+        if h5_dataset is not None and h5_dataset.chunks is not None
+    )
+
+
+def dataset_memory(*datasets: Any) -> dict[Component, int]:
+    """Accounts for the memory held by the caches and buffers of dataset trees.
+
+    Accounts for the memory held by frame caches, repeated masks, decompressed chunk
+    caches, the upper bound of the hdf5 chunk caches and items read ahead, by walking
+    the attributes of each dataset. Tensors shared between datasets are counted once.
+
+    Args:
+        datasets: The roots of the dataset trees.
+
+    Returns:
+        dict[Component, int]: The number of bytes held by each component.
+    """
+    usage = {component: 0 for component in Component}
+    seen_datasets: set[int] = set()
+    seen_tensors: set[int] = set()
+
+    def visit(obj: Any, mask: bool) -> None:
+        if isinstance(obj, (tuple, list)):
+            for item in obj:
+                visit(item, mask)
+            return
+        if not isinstance(obj, Dataset) or id(obj) in seen_datasets:
+            return
+        seen_datasets.add(id(obj))
+        if isinstance(obj, SimpleHdf5):
+            cached = nbytes(obj.cache.values(), seen_tensors)
+            usage[Component.MASK if mask else Component.FRAME_CACHE] += cached
+            usage[Component.CHUNK_CACHE] += sum(
+                _chunk_cache_bytes(reader, seen_tensors)
+                for reader in obj._readers.values()
+            )
+            usage[Component.HDF5_CHUNK_CACHE] += _hdf5_chunk_cache_bytes(obj)
+            return
+        if isinstance(obj, RepeatingDataset):
+            usage[Component.MASK] += nbytes(obj._cached_data_store, seen_tensors)
+            visit(obj.dataset, True)
+            return
+        if isinstance(obj, ReadAheadDataset):
+            usage[Component.READ_AHEAD] += sum(
+                nbytes(future.result(), seen_tensors)
+                for futures in list(obj._buffer.values())
+                for future in list(futures)
+                if future.done() and not future.cancelled()
+            )
+        for value in vars(obj).values():
+            visit(value, mask)
+
+    for dataset in datasets:
+        visit(dataset, False)
+    return usage
+
+
+# The bytes held by each component of each process, in memory shared with processes
+# forked after tracking is enabled, or None if tracking is disabled
+_usage: Optional[Any] = None
+# The event on which the reporting threads of forked processes stop, set once tracking
+# is disabled
+_stop: Optional[Any] = None
+
+
+def enable_memory_tracking(processes: int) -> None:
+    """Enables the reporting of memory by process, clearing any previous reports.
+
+    Reports are held in shared memory, such that data loader workers forked after
+    tracking is enabled may report into it. The main process reports in slot zero and
+    worker i reports in slot i + 1.
+
+    Args:
+        processes: The maximum number of reporting processes, including this one.
+    """
+    global _usage, _stop
+    disable_memory_tracking()
+    _usage = Array("q", processes * len(Component))
+    _stop = Event()
+
+
+def disable_memory_tracking() -> None:
+    """Disables the reporting of memory by process, discarding any reports.
+
+    The reporting threads of data loader workers which are still alive are stopped.
+    """
+    global _usage, _stop
+    if _stop is not None:
+        _stop.set()
+    _usage = None
+    _stop = None
+
+
+def memory_tracking_enabled() -> bool:
+    """Checks whether the reporting of memory by process is enabled.
+
+    Returns:
+        bool: True if tracking is enabled.
+    """
+    return _usage is not None
+
+
+def report_memory(slot: int, usage: dict[Component, int]) -> None:
+    """Reports the memory held by the components of a process, if tracking is enabled.
+
+    Args:
+        slot: The slot of the reporting process, reports beyond the maximum number of
+            processes are discarded.
+        usage: The number of bytes held by each component, omitted components are
+            unchanged.
+    """
+    shared = _usage
+    if shared is None or (slot + 1) * len(Component) > len(shared):
+        return
+    with shared.get_lock():
+        for component, size in usage.items():
+            shared[slot * len(Component) + component] = size
+
+
+def read_memory() -> dict[int, dict[Component, int]]:
+    """Reads the memory reported by each process.
+
+    Returns:
+        dict[int, dict[Component, int]]: The number of bytes held by each component of
+            each process which has reported, by slot.
+    """
+    shared = _usage
+    if shared is None:
+        return {}
+    with shared.get_lock():
+        values = shared[:]
+    return {
+        slot: {
+            component: values[slot * len(Component) + component]
+            for component in Component
+        }
+        for slot in range(len(values) // len(Component))
+        if values[slot * len(Component) + Component.RSS] > 0
+    }
+
+
+def _report_periodically(slot: int, dataset: Any, interval: float, stop: Any) -> None:
+    while not stop.is_set():
+        report_memory(
+            slot, {**dataset_memory(dataset), Component.RSS: process_rss(getpid())}
+        )
+        stop.wait(interval)
+
+
+def worker_init_fn(worker_id: int) -> None:
+    """Begins reporting the memory of a data loader worker, if tracking is enabled.
+
+    Begins periodically reporting the memory of a pytorch data loader worker process,
+    and of its copy of the dataset, in slot worker_id + 1 from a daemon thread, until
+    tracking is disabled.
+
+    Args:
+        worker_id: The index of the worker within its data loader.
+    """
+    worker_info = get_worker_info()
+    if _usage is None or worker_info is None:
+        return
+    Thread(
+        target=_report_periodically,
+        args=(worker_id + 1, worker_info.dataset, 1.0, _stop),
+        daemon=True,
+    ).start()
+
+
+class ActivationTracker:
+    """A recorder of the largest output of each leaf module of a network.
+
+    A recorder of the largest output, in bytes, of each leaf module of a network, as
+    observed by forward hooks, which approximates the activations held for the
+    backward pass.
+    """
+
+    def __init__(self, network: Module) -> None:
+        """Creates a recorder of the largest output of each leaf module of a network.
+
+        Args:
+            network: The network whose leaf modules are hooked.
+        """
+        self.usage: dict[str, int] = {}
+        self._handles: list[RemovableHandle] = [
+            module.register_forward_hook(self._hook(name))
+            for name, module in network.named_modules()
+            if next(module.children(), None) is None
+        ]
+
+    def _hook(self, name: str) -> Any:
+        def hook(module: Module, inputs: Any, output: Any) -> None:
+            self.usage[name] = max(self.usage.get(name, 0), nbytes(output))
+
+        return hook
+
+    @property
+    def total(self) -> int:
+        """The sum of the largest output of each leaf module, in bytes."""
+        return sum(self.usage.values())
+
+    def remove(self) -> None:
+        """Removes the forward hooks from the network."""
+        for handle in self._handles:
+            handle.remove()
+        self._handles.clear()
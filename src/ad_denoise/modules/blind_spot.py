@@ -0,0 +1,103 @@
+from torch import Tensor, cat
+from torch.nn import Conv2d, LeakyReLU, Module, Sequential
+from torch.nn.functional import pad
+
+from .shift import Shift
+
+
+class ShiftConv2D(Module):
+    """A pytorch module which convolves in 2d with a receptive field above each pixel.
+
+    A pytorch module which convolves its input, zero padded by twice the half width of
+    the kernel above, none below and the half width to either side, such that each
+    output pixel attends only to the rows of the input at or above it and the output
+    has the shape of the input. This is equivalent to translating the input downwards
+    by the half width before a centred convolution, with the translation folded into
+    the padding.
+    """
+
+    def __init__(
+        self, in_channels: int, out_channels: int, half_width: int = 1
+    ) -> None:
+        """Creates a module which convolves with a receptive field above each pixel.
+
+        Args:
+            in_channels: The number of input channels.
+            out_channels: The number of output channels.
+            half_width: The half width of the kernel, such that the full width is
+                2*half_width+1. Defaults to 1.
+
+        Raises:
+            ValueError: If the half width is not positive.
+        """
+        super().__init__()
+        if not half_width > 0:
+            raise ValueError("Kernel half width must be positive.")
+        self.half_width = half_width
+        self.conv = Conv2d(in_channels, out_channels, 2 * half_width + 1)
+
+    def forward(self, x: Tensor) -> Tensor:  # noqa: D102
+        half_width = self.half_width
+        return self.conv(pad(x, (half_width, half_width, 2 * half_width, 0)))
+
+
+class ShiftedBlindSpotNetwork(Module):
+    """A pytorch module which denoises by four shifted half plane receptive fields.
+
+    A pytorch module which evaluates a stack of shifted convolutions, whose receptive
+    field lies strictly above each pixel, over the four rotations of its input, batched
+    as a single pass. The rotations are undone and their features fused by 1x1
+    convolutions, such that the receptive field of the network is the union of four
+    half planes, which excludes only the pixel itself. Frames which are not square are
+    evaluated in two passes, of the rotations which preserve their shape and of those
+    which transpose it, rather than padded to square.
+    """
+
+    def __init__(
+        self,
+        in_channels: int = 1,
+        channels: int = 32,
+        depth: int = 5,
+        half_width: int = 1,
+    ) -> None:
+        """Creates a module which denoises by four shifted half plane receptive fields.
+
+        Args:
+            in_channels: The number of input and output channels. Defaults to 1.
+            channels: The number of channels of each hidden layer. Defaults to 32.
+            depth: The number of shifted convolutions. Defaults to 5.
+            half_width: The half width of the kernel of each shifted convolution.
+                Defaults to 1.
+
+        Raises:
+            ValueError: If the depth is not positive.
+        """
+        super().__init__()
+        if not depth > 0:
+            raise ValueError("Depth must be positive.")
+        layers: list[Module] = []
+        for layer in range(depth):
+            layers.append(
+                ShiftConv2D(
+                    in_channels if layer == 0 else channels, channels, half_width
+                )
+            )
+            layers.append(LeakyReLU(0.1))
+        layers.append(Shift([(-2, 1)]))
+        self.branch = Sequential(*layers)
+        self.fuse = Sequential(
+            Conv2d(4 * channels, 4 * channels, 1),
+            LeakyReLU(0.1),
+            Conv2d(4 * channels, channels, 1),
+            LeakyReLU(0.1),
+            Conv2d(channels, in_channels, 1),
+        )
+
+    def forward(self, x: Tensor) -> Tensor:  # noqa: D102
+        passes = [(0, 1, 2, 3)] if x.shape[-2] == x.shape[-1] else [(0, 2), (1, 3)]
+        features: dict[int, Tensor] = {}
+        for rotations in passes:
+            outputs = self.branch(cat([x.rot90(k, (-2, -1)) for k in rotations]))
+            for k, rotated in zip(rotations, outputs.chunk(len(rotations))):
+                features[k] = rotated.rot90(-k, (-2, -1))
+        return self.fuse(cat([features[k] for k in range(4)], dim=1))
@@ -2,12 +2,12 @@ from dataclasses import dataclass
 
 from torch.nn import Module
 
-from ad_denoise.utils import as_tagged_union
+from ad_denoise.utils import TaggedUnionBase, as_tagged_union
 
 
 @dataclass
 @as_tagged_union
-class ModuleConfig:
+class ModuleConfig(TaggedUnionBase):
     """A configuration schema for pytorch modules."""
 
     def __call__(self) -> Module:  # noqa: D102
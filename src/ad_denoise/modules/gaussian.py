@@ -1,4 +1,4 @@
-from math import pi, sqrt
+from math import ceil, log, pi, sqrt
 from typing import Optional
 
 from torch import Tensor, as_tensor, exp, linspace, meshgrid, norm, rand, stack
@@ -8,9 +8,23 @@ from torch.nn.parameter import Parameter
 
 
 class GaussianKernel2D(Module):
-    """A pytorch module which convolves a gaussian kernel with learned stdev in 2d."""
+    """A pytorch module which convolves a gaussian kernel with learned stdev in 2d.
+
+    A pytorch module which convolves a gaussian kernel with learned stdev in 2d. If a
+    tolerance is given, the kernel is truncated to the taps whose weight relative to
+    the centre is at least the tolerance, up to the half width, and the input is
+    cropped to match, such that the output has the shape of that of the full kernel.
+    The truncated half width is cached, such that the device is not synchronized on
+    each forward pass. It is recomputed when the stdev changes in evaluation, and on
+    each call of train while training, as at the start of each lightning epoch.
+    """
 
-    def __init__(self, half_width: int, stdev: Optional[float] = None) -> None:
+    def __init__(
+        self,
+        half_width: int,
+        stdev: Optional[float] = None,
+        tolerance: Optional[float] = None,
+    ) -> None:
         """Creates a module which convolves a gaussian kernel with learned stdev in 2d.
 
         Args:
@@ -19,10 +33,18 @@ class GaussianKernel2D(Module):
             stdev: The initial standard deviation of kernel, if None a random value is
                 selected from the uniform distribtuon on the interval [0,1). Defaults
                 to None.
+            tolerance: The smallest weight of a tap relative to the centre of the
+                kernel, beyond which the kernel is truncated, if None the kernel is not
+                truncated. Defaults to None.
         """
         super().__init__()
         if not half_width > 0:
             raise ValueError("Kernel half width must be positive.")
+        if tolerance is not None and not 0 < tolerance < 1:
+            raise ValueError("Kernel tolerance must be between zero and one.")
+
+        self.half_width = half_width
+        self.tolerance = tolerance
 
         linvec = linspace(-half_width, half_width, 2 * half_width + 1)
         self.radii = Parameter(
@@ -32,26 +54,64 @@ class GaussianKernel2D(Module):
         self.stdev = Parameter(
             as_tensor(stdev) if stdev is not None else rand((1,)), requires_grad=True
         )
+        self._truncation: Optional[tuple[int, int]] = None
+
+    def train(self, mode: bool = True) -> "GaussianKernel2D":
+        """Sets the training mode, recomputing the truncated half width when next used.
+
+        Args:
+            mode: If True, the module is set to training mode, otherwise evaluation
+                mode. Defaults to True.
+
+        Returns:
+            GaussianKernel2D: This module.
+        """
+        self._truncation = None
+        return super().train(mode)
+
+    def effective_half_width(self) -> int:
+        """Computes the half width of the kernel after truncation.
+
+        Returns:
+            int: The half width of the taps whose weight relative to the centre is at
+                least the tolerance, at least one and at most the half width.
+        """
+        if self.tolerance is None:
+            return self.half_width
+        extent = self.stdev.detach().abs().max().item() * sqrt(-2 * log(self.tolerance))
+        return max(1, min(self.half_width, ceil(extent)))
+
+    def _truncated_half_width(self) -> int:
+        version = self.stdev._version
+        if self._truncation is None or (
+            not self.training and self._truncation[0] != version
+        ):
+            self._truncation = (version, self.effective_half_width())
+        return self._truncation[1]
 
-    def _build_kernel(self) -> Tensor:
+    def _build_kernel(self, half_width: Optional[int] = None) -> Tensor:
+        trim = self.half_width - (self.half_width if half_width is None else half_width)
+        radii = self.radii[
+            trim : self.radii.shape[0] - trim, trim : self.radii.shape[1] - trim
+        ]
         return (
-            (
-                1
-                / (self.stdev * sqrt(2 * pi))
-                * exp(-0.5 * (self.radii / self.stdev) ** 2)
-            )
+            (1 / (self.stdev * sqrt(2 * pi)) * exp(-0.5 * (radii / self.stdev) ** 2))
             .unsqueeze(0)
             .unsqueeze(0)
         )
 
     def forward(self, x: Tensor) -> Tensor:  # noqa: D102
-        return conv2d(x, self._build_kernel().type_as(x))
+        half_width = self._truncated_half_width()
+        trim = self.half_width - half_width
+        if trim > 0:
+            x = x[..., trim : x.shape[-2] - trim, trim : x.shape[-1] - trim]
+        return conv2d(x, self._build_kernel(half_width).type_as(x))
 
 
 class BlindGaussianKernel2D(GaussianKernel2D):
     """A pytorch module which convolves a gaussian kernel with learned stdev in 2d."""
 
-    def _build_kernel(self) -> Tensor:
-        kernel = super()._build_kernel()
+    def _build_kernel(self, half_width: Optional[int] = None) -> Tensor:
+        kernel = super()._build_kernel(half_width)
         kernel[:, :, kernel.shape[2] // 2, kernel.shape[3] // 2] = 0
         return kernel
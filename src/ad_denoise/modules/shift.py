@@ -1,14 +1,43 @@
-from typing import Iterable
+from typing import Iterable, Sequence
 
-from torch import Tensor, roll
+from torch import Tensor
 from torch.nn import Module
 
 
+def _shift_into(out: Tensor, x: Tensor, dim_shifts: Sequence[tuple[int, int]]) -> None:
+    """Writes a translation of a tensor into an uninitialized tensor of its shape.
+
+    Bands vacated by the translation are zeroed and the remainder is copied from the
+    overlapping slices of the input, such that each element is written once, save for
+    the corners where vacated bands of several dimensions cross.
+
+    Args:
+        out: The tensor into which the translation is written.
+        x: The tensor to be translated.
+        dim_shifts: A sequence, where each item is a tuple of the dimension on which
+            the translation should occur and the number of pixels by which it should
+            be translated.
+    """
+    source, target = x, out
+    for dim, shift in dim_shifts:
+        size = x.shape[dim]
+        shift = max(-size, min(shift, size))
+        if shift > 0:
+            out.narrow(dim, 0, shift).zero_()
+        elif shift < 0:
+            out.narrow(dim, size + shift, -shift).zero_()
+        source = source.narrow(dim, max(-shift, 0), size - abs(shift))
+        target = target.narrow(dim, max(shift, 0), size - abs(shift))
+    if source.numel() > 0:
+        target.copy_(source)
+
+
 class Shift(Module):
     """A pytorch module which translates a tensor, filling with zero.
 
     A pytorch module which translates a tensor by an arbitrary pixel value across
-    multiple dimensions, filling all newly values with zero.
+    multiple dimensions, filling all newly values with zero. The translation is written
+    into a single uninitialized output by slicing, rather than rolling a full copy.
     """
 
     def __init__(self, dim_shifts: Iterable[tuple[int, int]]) -> None:
@@ -20,14 +49,46 @@ class Shift(Module):
                 should be translated.
         """
         super().__init__()
-        self.shifts = tuple(shift for _, shift in dim_shifts)
-        self.dims = tuple(dim for dim, _ in dim_shifts)
+        self.dim_shifts = tuple(dim_shifts)
+        self.shifts = tuple(shift for _, shift in self.dim_shifts)
+        self.dims = tuple(dim for dim, _ in self.dim_shifts)
+
+    def forward(self, x: Tensor) -> Tensor:  # noqa: D102
+        out = x.new_empty(x.shape)
+        _shift_into(out, x, self.dim_shifts)
+        return out
+
+
+class MultiShift(Module):
+    """A pytorch module which stacks translations of a tensor, filling with zero.
+
+    A pytorch module which translates a tensor by each of several sets of shifts,
+    filling vacated values with zero, and stacks the translations along a new
+    dimension. The translations are written into a single output by slicing, such that
+    the stack is allocated once.
+    """
+
+    def __init__(
+        self, dim_shifts: Iterable[Iterable[tuple[int, int]]], dim: int = 0
+    ) -> None:
+        """Creates a module which stacks several translations of a tensor.
+
+        Args:
+            dim_shifts: An iterable of translations, each of which is an iterable of
+                tuples of the dimension of the input on which the translation should
+                occur and the number of pixels by which it should be translated.
+            dim: The dimension of the output along which translations are stacked.
+                Defaults to 0.
+        """
+        super().__init__()
+        self.dim_shifts = tuple(tuple(shifts) for shifts in dim_shifts)
+        self.dim = dim
 
     def forward(self, x: Tensor) -> Tensor:  # noqa: D102
-        x = roll(x, self.shifts, self.dims)
-        for shift, dim in zip(self.shifts, self.dims):
-            if shift > 0:
-                x.tensor_split(shift + 1, dim)[0].zero_()
-            elif shift < 0:
-                x.tensor_split(x.shape[dim] - shift, dim)[1].zero_()
-        return x
+        dim = self.dim % (x.dim() + 1)
+        shape = list(x.shape)
+        shape.insert(dim, len(self.dim_shifts))
+        out = x.new_empty(shape)
+        for idx, shifts in enumerate(self.dim_shifts):
+            _shift_into(out.select(dim, idx), x, shifts)
+        return out
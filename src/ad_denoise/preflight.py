@@ -0,0 +1,168 @@
+from dataclasses import dataclass, fields, is_dataclass
+from math import prod
+from os import getpid
+from typing import Any, Iterator
+
+from numpy import dtype
+from torch import no_grad, zeros
+
+from ad_denoise.datasets.area_detector import Hdf5ADImagesDatasetConfig
+from ad_denoise.datasets.index import Hdf5Index
+from ad_denoise.loaders import (
+    DataLoaderConfig,
+    ProcessDataLoaderConfig,
+    ThreadedDataLoaderConfig,
+)
+from ad_denoise.memory import ActivationTracker, process_rss
+from ad_denoise.train import TrainConfig
+
+#: The default size of the hdf5 chunk cache of each open dataset, in bytes.
+HDF5_CHUNK_CACHE_BYTES = 2**20
+#: The number of decompressed chunks retained by each direct chunk reader.
+DIRECT_CHUNK_CACHE_SIZE = 16
+#: The number of batches each pytorch data loader worker prepares ahead.
+PREFETCH_FACTOR = 2
+
+
+@dataclass
+class MemoryEstimate:
+    """A prediction of the peak memory of training, by component, in bytes."""
+
+    processes: int
+    components: dict[str, int]
+
+    @property
+    def total(self) -> int:
+        """The predicted peak memory of all processes, in bytes."""
+        return sum(self.components.values())
+
+
+def _dataset_configs(config: Any) -> Iterator[Hdf5ADImagesDatasetConfig]:
+    if isinstance(config, Hdf5ADImagesDatasetConfig):
+        yield config
+    elif isinstance(config, (list, tuple)):
+        for item in config:
+            yield from _dataset_configs(item)
+    elif is_dataclass(config):
+        for field in fields(config):
+            yield from _dataset_configs(getattr(config, field.name))
+
+
+def _workers(loader: DataLoaderConfig) -> int:
+    return loader.num_workers if isinstance(loader, ProcessDataLoaderConfig) else 0
+
+
+def peak_processes(model: Any) -> int:
+    """Predicts the peak number of processes of training, including this one.
+
+    The workers of the training and validation data loaders are only alive at once if
+    either loader keeps its workers between epochs, as otherwise the workers of each
+    loader exit once an epoch of it is exhausted.
+
+    Args:
+        model: The model configuration, whose train_loader and val_loader are counted
+            if present.
+
+    Returns:
+        int: The peak number of processes.
+    """
+    loaders: list[DataLoaderConfig] = [
+        loader
+        for loader in (
+            getattr(model, "train_loader", None),
+            getattr(model, "val_loader", None),
+        )
+        if loader is not None
+    ]
+    workers = [_workers(loader) for loader in loaders]
+    if any(getattr(loader, "persistent_workers", False) for loader in loaders):
+        return 1 + sum(workers)
+    return 1 + max(workers, default=0)
+
+
+def _batch_size(loader: DataLoaderConfig) -> int:
+    return getattr(loader, "batch_size", 1)
+
+
+def _batch_buffers(loader: DataLoaderConfig, batch_bytes: int) -> int:
+    if isinstance(loader, ProcessDataLoaderConfig):
+        in_flight = PREFETCH_FACTOR * loader.num_workers + 1
+        return batch_bytes * (in_flight + (1 if loader.pin_memory else 0))
+    if isinstance(loader, ThreadedDataLoaderConfig):
+        read_ahead = loader.read_ahead * batch_bytes // loader.batch_size
+        return batch_bytes * (loader.prefetch_batches + 2) + read_ahead
+    return batch_bytes
+
+
+def estimate_memory(config: TrainConfig) -> MemoryEstimate:
+    """Predicts the peak memory of training from a configuration, before training.
+
+    Predicts the peak memory of training from the frame shape and chunking of the
+    configured area detector datasets, read from the first file of each, the batch
+    size and workers of the data loaders and the activations of the network, observed
+    over a forward pass of a single frame. Each data loader worker holds its own masks,
+    hdf5 chunk caches and direct chunk caches. The interpreter is measured as this
+    process, workers are assumed to share it copy-on-write.
+
+    Args:
+        config: The training configuration, of a model with a network, training and
+            validation datasets and data loaders.
+
+    Returns:
+        MemoryEstimate: The predicted peak memory by component.
+
+    Raises:
+        ValueError: If the model does not have the expected fields, or no area detector
+            dataset is configured.
+    """
+    model = config.model
+    try:
+        network = getattr(model, "network")
+        train_loader: DataLoaderConfig = getattr(model, "train_loader")
+        val_loader: DataLoaderConfig = getattr(model, "val_loader")
+    except AttributeError:
+        raise ValueError(f"{type(model).__name__} is not a supported model.")
+    datasets = list(_dataset_configs(model))
+    if not datasets:
+        raise ValueError("No area detector dataset is configured.")
+
+    processes = peak_processes(model)
+    entry = Hdf5Index.read_entry(datasets[0].data_paths[0], datasets[0].frame_key)
+    frame_shape = entry.shape[-2:]
+    item_bytes = 4 * prod(frame_shape)
+    chunk_bytes = prod(entry.chunks or entry.shape) * dtype(entry.dtype).itemsize
+
+    masks = {(str(dataset.mask_path), dataset.mask_key) for dataset in datasets}
+    sources = {
+        (tuple(str(path) for path in dataset.data_paths), dataset.frame_key): dataset
+        for dataset in datasets
+    }
+    files = sum(len(paths) for paths, _ in sources)
+    direct_files = sum(
+        len(paths) for (paths, _), dataset in sources.items() if dataset.direct
+    )
+
+    network_module = network()
+    tracker = ActivationTracker(network_module)
+    with no_grad():
+        network_module(zeros((1, 1, *frame_shape)))
+    tracker.remove()
+
+    train_batch = _batch_size(train_loader)
+    val_batch = _batch_size(val_loader)
+    return MemoryEstimate(
+        processes,
+        {
+            "interpreter": process_rss(getpid()),
+            "masks": processes * len(masks) * item_bytes,
+            "hdf5_chunk_caches": (
+                processes * files * min(chunk_bytes, HDF5_CHUNK_CACHE_BYTES)
+            ),
+            "direct_chunk_caches": (
+                processes * direct_files * DIRECT_CHUNK_CACHE_SIZE * chunk_bytes
+            ),
+            "batches": _batch_buffers(train_loader, train_batch * item_bytes)
+            + _batch_buffers(val_loader, 2 * val_batch * item_bytes),
+            "activations": train_batch * tracker.total,
+        },
+    )
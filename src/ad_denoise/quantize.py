@@ -0,0 +1,274 @@
+from copy import deepcopy
+from dataclasses import dataclass
+from math import log10
+from pathlib import Path
+from typing import Any, Iterable, Optional, Union
+
+import torch
+from torch import Generator, Tensor, inference_mode, no_grad, randperm, stack
+from torch.ao.quantization import (
+    DeQuantStub,
+    QuantStub,
+    convert,
+    get_default_qconfig,
+    prepare,
+)
+from torch.nn import Conv2d, LeakyReLU, Module, ReLU, Sequential, ZeroPad2d
+from torch.nn.functional import pad
+
+from ad_denoise.datasets.utils import SizedDataset, get_items
+from ad_denoise.denoise import load_network
+from ad_denoise.modules import GaussianKernel2D, ScalarMultiply
+from ad_denoise.modules.blind_conv import BlindConv2D
+from ad_denoise.modules.config import ModuleConfig
+from ad_denoise.train import TrainConfig
+
+
+def _leaves(network: Module) -> Iterable[Module]:
+    if isinstance(network, Sequential):
+        for module in network:
+            yield from _leaves(module)
+    else:
+        yield network
+
+
+def _padding(module: ZeroPad2d) -> int:
+    left, right, top, bottom = module.padding
+    if not left == right == top == bottom:
+        raise ValueError(f"Asymmetric padding {module.padding} cannot be folded.")
+    return left
+
+
+def _conv(weight: Tensor, bias: Optional[Tensor], padding: int) -> Conv2d:
+    conv = Conv2d(
+        weight.shape[1],
+        weight.shape[0],
+        (weight.shape[2], weight.shape[3]),
+        padding=padding,
+        bias=False,
+    )
+    conv.weight = torch.nn.Parameter(weight.detach().clone(), requires_grad=False)
+    if bias is not None:
+        conv.bias = torch.nn.Parameter(bias.detach().clone(), requires_grad=False)
+    return conv
+
+
+def fold_network(network: Module) -> Sequential:
+    """Folds a trained network into standard layers which may be quantized.
+
+    Folds a sequence of zero padding, gaussian kernels, blind convolutions, standard
+    convolutions, scalar multiplication and rectified linear units into standard
+    convolutions and activations. Zero padding is folded into the padding of the
+    following convolution, the kernel of gaussian and blind convolutions is built from
+    their learned parameters, truncated as in their forward pass, and scalars are folded
+    into the weights of the preceding convolution.
+
+    Args:
+        network: The trained network, a module or nested sequence of modules.
+
+    Returns:
+        Sequential: An equivalent network of standard layers, in evaluation mode.
+
+    Raises:
+        ValueError: If the network holds a module which cannot be folded.
+    """
+    layers: list[Module] = []
+    padding = 0
+    for module in _leaves(network):
+        if isinstance(module, ZeroPad2d):
+            padding += _padding(module)
+        elif isinstance(module, GaussianKernel2D):
+            half_width = module.effective_half_width()
+            trim = module.half_width - half_width
+            kernel = module._build_kernel(half_width).detach()
+            if padding >= trim:
+                layers.append(_conv(kernel, None, padding - trim))
+            else:
+                layers.append(_conv(pad(kernel, (trim,) * 4), None, padding))
+            padding = 0
+        elif isinstance(module, BlindConv2D):
+            weights = module.weights.detach().clone()
+            weights[:, :, module.half_width, module.half_width] = 0
+            layers.append(_conv(weights, None, padding))
+            padding = 0
+        elif (
+            isinstance(module, Conv2d)
+            and module.padding_mode == "zeros"
+            and isinstance(module.padding, tuple)
+        ):
+            conv = _conv(module.weight, module.bias, 0)
+            conv.stride, conv.dilation, conv.groups = (
+                module.stride,
+                module.dilation,
+                module.groups,
+            )
+            conv.padding = tuple(side + padding for side in module.padding)
+            layers.append(conv)
+            padding = 0
+        elif isinstance(module, ScalarMultiply):
+            if padding or not layers or not isinstance(layers[-1], Conv2d):
+                raise ValueError("A scalar may only be folded into a convolution.")
+            scalar = module.scalar.detach()
+            with no_grad():
+                layers[-1].weight.mul_(scalar)
+                if layers[-1].bias is not None:
+                    layers[-1].bias.mul_(scalar)
+        elif isinstance(module, (ReLU, LeakyReLU)) and not padding:
+            layers.append(deepcopy(module))
+        else:
+            raise ValueError(
+                f"{type(module).__name__} cannot be folded for quantizing."
+            )
+    if padding:
+        layers.append(ZeroPad2d(padding))
+    return Sequential(*layers).eval()
+
+
+def quantize_network(
+    network: Module, calibration: Iterable[Tensor], backend: str = "x86"
+) -> Module:
+    """Quantizes a trained network to int8 by post-training static quantization.
+
+    Folds the network into standard layers, observes the range of the activations of
+    each layer over the calibration batches and converts the layers to operate on int8
+    weights and uint8 activations. The quantized network takes and returns floating
+    point tensors.
+
+    Args:
+        network: The trained network, a module or nested sequence of modules which may
+            be folded by fold_network.
+        calibration: The batches of frames over which activations are observed.
+        backend: The quantized engine, such as x86, fbgemm or qnnpack. Defaults to x86.
+
+    Returns:
+        Module: The quantized network, in evaluation mode.
+
+    Raises:
+        ValueError: If the network cannot be folded or the backend is not supported.
+    """
+    if backend not in torch.backends.quantized.supported_engines:
+        raise ValueError(f"Quantized engine {backend} is not supported.")
+    torch.backends.quantized.engine = backend
+    model = Sequential(QuantStub(), *fold_network(network), DeQuantStub()).eval()
+    model.qconfig = get_default_qconfig(backend)  # type: ignore
+    prepare(model, inplace=True)
+    with no_grad():
+        for batch in calibration:
+            model(batch)
+    return convert(model, inplace=True)
+
+
+@dataclass
+class QuantizationReport:
+    """The accuracy of a quantized network against the float network it quantizes."""
+
+    #: The mean squared error of the float network against the validation targets.
+    float_loss: float
+    #: The mean squared error of the quantized network against the validation targets.
+    quantized_loss: float
+    #: The mean squared error between the outputs of the two networks.
+    output_mse: float
+    #: The largest absolute difference between the outputs of the two networks.
+    max_error: float
+    #: The peak signal to noise ratio of the quantized outputs against the float
+    #: outputs, in decibels.
+    psnr: float
+
+
+def compare_networks(
+    reference: Module, quantized: Module, batches: Iterable[tuple[Tensor, Tensor]]
+) -> QuantizationReport:
+    """Compares a quantized network to its float network over batches of validation.
+
+    Args:
+        reference: The float network.
+        quantized: The quantized network.
+        batches: The batches of inputs and targets.
+
+    Returns:
+        QuantizationReport: The accuracy of the quantized network.
+
+    Raises:
+        ValueError: If there are no batches.
+    """
+    sums = {"float": 0.0, "quantized": 0.0, "output": 0.0}
+    pixels, max_error, peak = 0, 0.0, 0.0
+    with inference_mode():
+        for inputs, targets in batches:
+            expected = reference(inputs)
+            outputs = quantized(inputs)
+            sums["float"] += (expected - targets).square().sum().item()
+            sums["quantized"] += (outputs - targets).square().sum().item()
+            sums["output"] += (outputs - expected).square().sum().item()
+            max_error = max(max_error, (outputs - expected).abs().max().item())
+            peak = max(peak, expected.abs().max().item())
+            pixels += expected.numel()
+    if pixels == 0:
+        raise ValueError("No validation batches were given.")
+    mse = sums["output"] / pixels
+    return QuantizationReport(
+        sums["float"] / pixels,
+        sums["quantized"] / pixels,
+        mse,
+        max_error,
+        float("inf") if mse == 0 else 10 * log10(peak**2 / mse),
+    )
+
+
+def _batches(dataset: SizedDataset[Any], frames: int, batch_size: int) -> list[Any]:
+    indices = randperm(len(dataset), generator=Generator().manual_seed(0))[:frames]
+    batches: list[Any] = []
+    for start in range(0, len(indices), batch_size):
+        items = get_items(dataset, indices[start : start + batch_size].tolist())
+        if isinstance(items[0], tuple):
+            batches.append(tuple(stack(group) for group in zip(*items)))
+        else:
+            batches.append(stack(items))
+    return batches
+
+
+def quantize(
+    config: TrainConfig,
+    checkpoint: Union[str, Path],
+    output: Union[str, Path],
+    frames: int = 64,
+    batch_size: int = 8,
+    backend: str = "x86",
+) -> QuantizationReport:
+    """Quantizes a trained network, calibrated on a sample of its training data.
+
+    Quantizes the configured network, loaded from a checkpoint of training, calibrating
+    the range of its activations on a random sample of its training dataset, compares
+    it to the float network on a random sample of its validation dataset and saves it
+    as TorchScript, which may be loaded by torch.jit.load and denoised with.
+
+    Args:
+        config: The training configuration, of a model with a network, a training
+            dataset and a validation dataset.
+        checkpoint: The path of the checkpoint of training.
+        output: The path at which the quantized network is saved.
+        frames: The number of frames sampled for calibration and for comparison.
+            Defaults to 64.
+        batch_size: The number of frames in each batch. Defaults to 8.
+        backend: The quantized engine. Defaults to x86.
+
+    Returns:
+        QuantizationReport: The accuracy of the quantized network.
+
+    Raises:
+        ValueError: If the model does not have a network, or it cannot be quantized.
+    """
+    model: Any = config.model
+    network = getattr(model, "network", None)
+    if not isinstance(network, ModuleConfig):
+        raise ValueError(f"{type(model).__name__} has no network.")
+    reference = load_network(network, checkpoint)
+    quantized = quantize_network(
+        reference, _batches(model.train_dataset(), frames, batch_size), backend
+    )
+    report = compare_networks(
+        reference, quantized, _batches(model.val_dataset(), frames, batch_size)
+    )
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    torch.jit.save(torch.jit.script(quantized), str(output))
+    return report
@@ -0,0 +1,379 @@
+import json
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+from http.client import HTTPConnection
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from math import prod
+from pathlib import Path
+from queue import Empty, SimpleQueue
+from threading import Lock, Thread
+from time import perf_counter
+from typing import Any, Optional
+
+import torch
+from numpy import ascontiguousarray, dtype, frombuffer, ndarray
+from torch import Tensor, from_numpy, inference_mode, stack
+from torch.nn import Module
+
+from ad_denoise.denoise import load_network
+from ad_denoise.modules import ModuleConfig
+
+#: The header holding the comma separated shape of a frame.
+SHAPE_HEADER = "X-Shape"
+#: The header holding the numpy dtype string of a frame.
+DTYPE_HEADER = "X-Dtype"
+
+
+@dataclass
+class ServeConfig:
+    """A configuration schema for serving a trained network over http."""
+
+    #: The network, as configured for training.
+    network: ModuleConfig
+    #: The path of a lightning checkpoint holding the trained network.
+    checkpoint: Path
+    #: The address on which the server listens.
+    host: str = "127.0.0.1"
+    #: The port on which the server listens, or zero for any free port.
+    port: int = 8000
+    #: The maximum number of frames denoised in each forward pass.
+    max_batch_size: int = 16
+    #: The longest a request waits for others to join its batch, in milliseconds.
+    max_delay_ms: float = 5.0
+    #: The number of threads used by torch, if None the torch default is used.
+    threads: Optional[int] = None
+
+
+class ServeMetrics:
+    """The latency and throughput of the requests served by a dynamic batcher."""
+
+    def __init__(self) -> None:
+        """Creates empty metrics, from which throughput is measured."""
+        self.started = perf_counter()
+        self.requests = 0
+        self.batches = 0
+        self.latency_seconds = 0.0
+        self.max_latency_seconds = 0.0
+        self._lock = Lock()
+
+    def record(self, latencies: list[float]) -> None:
+        """Records a batch of requests.
+
+        Args:
+            latencies: The time from submission to completion of each request in the
+                batch, in seconds.
+        """
+        with self._lock:
+            self.requests += len(latencies)
+            self.batches += 1
+            self.latency_seconds += sum(latencies)
+            self.max_latency_seconds = max(self.max_latency_seconds, *latencies)
+
+    def snapshot(self) -> dict[str, float]:
+        """Summarises the requests served so far.
+
+        Returns:
+            dict[str, float]: The number of requests and batches, the mean batch size,
+                the mean and maximum latency in milliseconds and the number of
+                requests served per second since the metrics were created.
+        """
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "batches": self.batches,
+                "mean_batch_size": self.requests / max(self.batches, 1),
+                "mean_latency_ms": 1e3 * self.latency_seconds / max(self.requests, 1),
+                "max_latency_ms": 1e3 * self.max_latency_seconds,
+                "requests_per_second": self.requests / (perf_counter() - self.started),
+            }
+
+
+# A frame, the future of its denoised frame and the time it was submitted
+_Request = tuple[Tensor, "Future[Tensor]", float]
+
+
+class DynamicBatcher:
+    """A batcher which denoises concurrently submitted frames in shared batches.
+
+    A batcher which denoises frames in a background thread, where each batch is begun
+    by the oldest waiting frame and joined by frames of the same shape submitted
+    before the batch is full or the oldest frame has waited the maximum delay, such
+    that concurrent requests share a forward pass at a bounded cost to latency.
+    """
+
+    def __init__(
+        self, network: Module, max_batch_size: int = 16, max_delay: float = 0.005
+    ) -> None:
+        """Creates a batcher which denoises submitted frames in a background thread.
+
+        Args:
+            network: The network, which maps batches of single channel frames to
+                batches of single channel frames.
+            max_batch_size: The maximum number of frames in each batch. Defaults to 16.
+            max_delay: The longest the oldest frame of a batch waits for others to join
+                it, in seconds. Defaults to 0.005.
+        """
+        self.network = network
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.metrics = ServeMetrics()
+        self._queue: SimpleQueue[Optional[_Request]] = SimpleQueue()
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, frame: Tensor) -> "Future[Tensor]":
+        """Submits a frame to be denoised in the next batch of its shape.
+
+        Args:
+            frame: A frame, without batch or channel axes.
+
+        Returns:
+            Future[Tensor]: The future of the denoised frame.
+        """
+        future: Future[Tensor] = Future()
+        self._queue.put((frame, future, perf_counter()))
+        return future
+
+    def close(self) -> None:
+        """Denoises the frames already submitted, then stops the background thread."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _gather(self, first: _Request, deferred: deque[_Request]) -> list[_Request]:
+        batch = [first]
+        for _ in range(len(deferred)):
+            waiting = deferred.popleft()
+            if len(batch) < self.max_batch_size and waiting[0].shape == first[0].shape:
+                batch.append(waiting)
+            else:
+                deferred.append(waiting)
+        deadline = first[2] + self.max_delay
+        while len(batch) < self.max_batch_size:
+            try:
+                request = self._queue.get(timeout=max(deadline - perf_counter(), 0))
+            except Empty:
+                break
+            if request is None:
+                self._queue.put(None)
+                break
+            if request[0].shape == first[0].shape:
+                batch.append(request)
+            else:
+                deferred.append(request)
+        return batch
+
+    def _denoise(self, batch: list[_Request]) -> None:
+        try:
+            with inference_mode():
+                outputs = self.network(
+                    stack([frame for frame, _, _ in batch]).unsqueeze(1)
+                )[:, 0]
+        except Exception as exception:
+            for _, future, _ in batch:
+                future.set_exception(exception)
+            return
+        now = perf_counter()
+        for (_, future, submitted), output in zip(batch, outputs):
+            future.set_result(output)
+        self.metrics.record([now - submitted for _, _, submitted in batch])
+
+    def _run(self) -> None:
+        deferred: deque[_Request] = deque()
+        while True:
+            first = deferred.popleft() if deferred else self._queue.get()
+            if first is None:
+                return
+            self._denoise(self._gather(first, deferred))
+
+
+def decode_frame(body: bytearray, shape: str, dtype_str: str) -> Tensor:
+    """Decodes a frame from its raw bytes, without copying, as a float tensor.
+
+    Args:
+        body: The raw bytes of the frame, in C order.
+        shape: The comma separated shape of the frame.
+        dtype_str: The numpy dtype string of the frame, such as <f4 or <u4.
+
+    Returns:
+        Tensor: The frame, sharing memory with the body if it is of 32 bit floats.
+
+    Raises:
+        ValueError: If the shape is not of a non-empty two dimensional frame, the dtype
+            is not of booleans, integers or floats, or the length of the body does not
+            match the shape and dtype.
+        TypeError: If the dtype string is not understood by numpy.
+    """
+    frame_shape = tuple(int(size) for size in shape.split(","))
+    if len(frame_shape) != 2 or min(frame_shape) < 1:
+        raise ValueError(f"{shape} is not the shape of a two dimensional frame.")
+    frame_dtype = dtype(dtype_str)
+    if frame_dtype.kind not in "biuf":
+        raise ValueError(f"{dtype_str} is not a boolean, integer or float dtype.")
+    if len(body) != prod(frame_shape) * frame_dtype.itemsize:
+        raise ValueError(f"{len(body)} bytes do not hold a {dtype_str} {frame_shape}.")
+    array = frombuffer(body, frame_dtype).reshape(frame_shape)
+    return from_numpy(array.astype(frame_dtype.newbyteorder("="), copy=False)).float()
+
+
+class _DenoiseHandler(BaseHTTPRequestHandler):
+    server: "DenoiseServer"
+    protocol_version = "HTTP/1.1"
+
+    def _reply(self, status: int, body: Any, headers: dict[str, str]) -> None:
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(memoryview(body).nbytes))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: int, message: str) -> None:
+        self._reply(status, message.encode(), {"Content-Type": "text/plain"})
+
+    def do_GET(self) -> None:
+        if self.path != "/metrics":
+            return self._error(404, f"{self.path} not found.")
+        body = json.dumps(self.server.batcher.metrics.snapshot()).encode()
+        self._reply(200, body, {"Content-Type": "application/json"})
+
+    def do_POST(self) -> None:
+        if self.path != "/denoise":
+            return self._error(404, f"{self.path} not found.")
+        try:
+            body = bytearray(int(self.headers.get("Content-Length", 0)))
+        except ValueError:
+            # The body cannot be skipped, so the connection cannot be reused
+            self.close_connection = True
+            return self._error(400, "Content-Length is not an integer.")
+        self.rfile.readinto(body)
+        shape, dtype_str = self.headers[SHAPE_HEADER], self.headers[DTYPE_HEADER]
+        if shape is None or dtype_str is None:
+            return self._error(400, f"{SHAPE_HEADER} and {DTYPE_HEADER} are required.")
+        try:
+            frame = decode_frame(body, shape, dtype_str)
+        except (TypeError, ValueError) as error:
+            return self._error(400, str(error))
+        try:
+            denoised = self.server.batcher.submit(frame).result()
+        except Exception as error:
+            return self._error(500, f"The frame could not be denoised: {error}")
+        output = ascontiguousarray(denoised.numpy())
+        self._reply(
+            200,
+            output.data,
+            {
+                "Content-Type": "application/octet-stream",
+                SHAPE_HEADER: ",".join(str(size) for size in output.shape),
+                DTYPE_HEADER: output.dtype.str,
+            },
+        )
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class DenoiseServer(ThreadingHTTPServer):
+    """A http server which denoises frames with a dynamic batcher.
+
+    A http server on which frames are denoised by posting their raw bytes to /denoise,
+    with their shape and numpy dtype in the X-Shape and X-Dtype headers, which responds
+    with the raw bytes of the denoised frame as 32 bit floats. The latency and
+    throughput of requests are served as json from /metrics.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], batcher: DynamicBatcher) -> None:
+        """Creates a http server which denoises frames with a dynamic batcher.
+
+        Args:
+            address: The host and port on which the server listens.
+            batcher: The batcher by which frames are denoised.
+        """
+        super().__init__(address, _DenoiseHandler)
+        self.batcher = batcher
+
+
+class DenoiseClient:
+    """A client of a denoise server, reusing a single connection."""
+
+    def __init__(self, host: str, port: int, timeout: Optional[float] = None) -> None:
+        """Creates a client of a denoise server.
+
+        Args:
+            host: The address of the server.
+            port: The port of the server.
+            timeout: The timeout of each request in seconds, if None requests do not
+                time out. Defaults to None.
+        """
+        self.connection = HTTPConnection(host, port, timeout=timeout)
+
+    def __call__(self, frame: ndarray) -> ndarray:
+        """Denoises a frame.
+
+        Args:
+            frame: A frame, without batch or channel axes.
+
+        Returns:
+            ndarray: The denoised frame, as 32 bit floats.
+
+        Raises:
+            RuntimeError: If the server does not denoise the frame.
+        """
+        self.connection.request(
+            "POST",
+            "/denoise",
+            ascontiguousarray(frame).data,
+            {
+                SHAPE_HEADER: ",".join(str(size) for size in frame.shape),
+                DTYPE_HEADER: frame.dtype.str,
+            },
+        )
+        response = self.connection.getresponse()
+        body = bytearray(response.read())
+        if response.status != 200:
+            raise RuntimeError(body.decode())
+        return decode_frame(
+            body, response.headers[SHAPE_HEADER], response.headers[DTYPE_HEADER]
+        ).numpy()
+
+    def metrics(self) -> dict[str, float]:
+        """Gets the latency and throughput of the requests served so far.
+
+        Returns:
+            dict[str, float]: The metrics, as summarised by ServeMetrics.snapshot.
+        """
+        self.connection.request("GET", "/metrics")
+        return json.loads(self.connection.getresponse().read())
+
+    def close(self) -> None:
+        """Closes the connection to the server."""
+        self.connection.close()
+
+
+def create_server(
+    config: ServeConfig, host: Optional[str] = None, port: Optional[int] = None
+) -> DenoiseServer:
+    """Loads the configured network and creates a server which denoises with it.
+
+    Args:
+        config: The serving configuration.
+        host: The address on which the server listens, if None the configured address
+            is used. Defaults to None.
+        port: The port on which the server listens, if None the configured port is
+            used. Defaults to None.
+
+    Returns:
+        DenoiseServer: The server, bound but not yet serving.
+    """
+    if config.threads is not None:
+        torch.set_num_threads(config.threads)
+    batcher = DynamicBatcher(
+        load_network(config.network, config.checkpoint),
+        config.max_batch_size,
+        config.max_delay_ms / 1e3,
+    )
+    return DenoiseServer(
+        (host or config.host, config.port if port is None else port), batcher
+    )
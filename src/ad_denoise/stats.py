@@ -0,0 +1,282 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from multiprocessing import get_context
+from os import cpu_count
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import torch
+from h5py import File
+from numpy import float64 as np_float64
+from torch import Tensor, cat, float64, stack
+
+from ad_denoise.datasets.config import SizedDatasetConfig
+from ad_denoise.datasets.sharded import Shard, dataset_edges, split_shards
+from ad_denoise.datasets.utils import SizedDataset, get_items
+
+
+@dataclass
+class StatsConfig:
+    """A configuration schema for computing the statistics of a dataset."""
+
+    #: The frames whose statistics are computed.
+    dataset: SizedDatasetConfig[Tensor]
+    #: The path of the hdf5 file to which the statistics are written.
+    output: Path
+    #: The count time of each frame, if None count times are not summarised.
+    count_times: Optional[SizedDatasetConfig[Tensor]] = None
+    #: The lower edge of the intensity histogram.
+    histogram_min: float = 0.0
+    #: The upper edge of the intensity histogram.
+    histogram_max: float = 65536.0
+    #: The number of bins of the intensity histogram.
+    bins: int = 1024
+    #: The maximum number of frames accumulated by each task.
+    shard_frames: int = 1024
+    #: The number of frames read at once.
+    batch_size: int = 16
+    #: The number of worker processes, if None one per cpu is used.
+    processes: Optional[int] = None
+    #: The number of threads used by torch in each worker process.
+    threads: int = 1
+
+
+class DatasetStatistics:
+    """Mergeable statistics of a stream of frames.
+
+    The per pixel mean and sum of squared deviations, accumulated by the parallel form
+    of Welford's algorithm such that batches and partial statistics may be merged in
+    any order, the global extrema, a histogram of intensities over a fixed range and
+    the distinct count times with the number of frames of each. Memory is bounded by
+    the shape of a frame, the number of bins and the number of distinct count times.
+    """
+
+    def __init__(self, minimum: float, maximum: float, bins: int) -> None:
+        """Creates empty statistics.
+
+        Args:
+            minimum: The lower edge of the intensity histogram.
+            maximum: The upper edge of the intensity histogram.
+            bins: The number of bins of the intensity histogram.
+
+        Raises:
+            ValueError: If the histogram range is empty.
+        """
+        if not minimum < maximum:
+            raise ValueError(f"Histogram range {minimum} to {maximum} is empty.")
+        self.histogram_min = minimum
+        self.histogram_max = maximum
+        self.frames = 0
+        self.mean: Optional[Tensor] = None
+        self.m2: Optional[Tensor] = None
+        self.minimum = float("inf")
+        self.maximum = float("-inf")
+        self.histogram = torch.zeros(bins, dtype=float64)
+        self.underflow = 0
+        self.overflow = 0
+        self.count_times = torch.zeros(0, dtype=float64)
+        self.count_time_frames = torch.zeros(0, dtype=torch.long)
+
+    @property
+    def variance(self) -> Tensor:
+        """The per pixel population variance of the frames.
+
+        Raises:
+            ValueError: If no frames have been accumulated.
+        """
+        if self.m2 is None:
+            raise ValueError("No frames have been accumulated.")
+        return self.m2 / self.frames
+
+    def _merge_moments(self, frames: int, mean: Tensor, m2: Tensor) -> None:
+        if self.mean is None or self.m2 is None:
+            self.frames, self.mean, self.m2 = frames, mean, m2
+            return
+        total = self.frames + frames
+        delta = mean - self.mean
+        self.mean += delta * (frames / total)
+        self.m2 += m2 + delta.square_() * (self.frames * frames / total)
+        self.frames = total
+
+    def _merge_count_times(self, values: Tensor, counts: Tensor) -> None:
+        values, inverse = cat([self.count_times, values]).unique(return_inverse=True)
+        self.count_time_frames = torch.zeros(len(values), dtype=torch.long).index_add_(
+            0, inverse, cat([self.count_time_frames, counts])
+        )
+        self.count_times = values
+
+    def update(self, frames: Tensor, count_times: Optional[Tensor] = None) -> None:
+        """Accumulates a batch of frames.
+
+        Args:
+            frames: A batch of frames, of shape (batch, ...).
+            count_times: The count time of each frame of the batch. Defaults to None.
+        """
+        frames = frames.to(float64)
+        mean = frames.mean(dim=0)
+        self._merge_moments(len(frames), mean, (frames - mean).square_().sum(dim=0))
+        self.minimum = min(self.minimum, frames.min().item())
+        self.maximum = max(self.maximum, frames.max().item())
+        self.histogram += torch.histc(
+            frames,
+            len(self.histogram),
+            self.histogram_min,
+            self.histogram_max,
+        )
+        self.underflow += int((frames < self.histogram_min).sum())
+        self.overflow += int((frames > self.histogram_max).sum())
+        if count_times is not None:
+            values, counts = (
+                count_times.to(float64).flatten().unique(return_counts=True)
+            )
+            self._merge_count_times(values, counts)
+
+    def merge(self, other: "DatasetStatistics") -> "DatasetStatistics":
+        """Merges the statistics of another stream of frames into these statistics.
+
+        Args:
+            other: Statistics with the same histogram range and bins.
+
+        Returns:
+            DatasetStatistics: These statistics, updated in place.
+
+        Raises:
+            ValueError: If the histograms differ in range or bins.
+        """
+        if (self.histogram_min, self.histogram_max, len(self.histogram)) != (
+            other.histogram_min,
+            other.histogram_max,
+            len(other.histogram),
+        ):
+            raise ValueError("Statistics with different histograms cannot be merged.")
+        if other.mean is not None and other.m2 is not None:
+            self._merge_moments(other.frames, other.mean.clone(), other.m2.clone())
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        self.histogram += other.histogram
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+        self._merge_count_times(other.count_times, other.count_time_frames)
+        return self
+
+    def write(self, file: File) -> None:
+        """Writes the statistics to an open hdf5 file.
+
+        Args:
+            file: The file to which the statistics are written.
+
+        Raises:
+            ValueError: If no frames have been accumulated.
+        """
+        if self.mean is None:
+            raise ValueError("No frames have been accumulated.")
+        file["mean"] = self.mean.numpy()
+        file["variance"] = self.variance.numpy()
+        file.attrs["frames"] = self.frames
+        file.attrs["minimum"] = self.minimum
+        file.attrs["maximum"] = self.maximum
+        file["histogram/counts"] = self.histogram.numpy().astype("int64")
+        file["histogram/edges"] = torch.linspace(
+            self.histogram_min,
+            self.histogram_max,
+            len(self.histogram) + 1,
+            dtype=float64,
+        ).numpy()
+        file["histogram"].attrs["underflow"] = self.underflow
+        file["histogram"].attrs["overflow"] = self.overflow
+        if len(self.count_times):
+            file["count_times/values"] = self.count_times.numpy()
+            file["count_times/frames"] = self.count_time_frames.numpy()
+
+
+_worker: Optional[
+    tuple[SizedDataset[Tensor], Optional[SizedDataset[Tensor]], StatsConfig]
+] = None
+
+
+def _initialize(config: StatsConfig) -> None:
+    global _worker
+    torch.set_num_threads(config.threads)
+    _worker = (
+        config.dataset(),
+        None if config.count_times is None else config.count_times(),
+        config,
+    )
+
+
+def _accumulate_shard(shard: Shard) -> tuple[Shard, DatasetStatistics, Tensor]:
+    assert _worker is not None
+    dataset, count_times, config = _worker
+    statistics = DatasetStatistics(
+        config.histogram_min, config.histogram_max, config.bins
+    )
+    start, stop = shard
+    frame_means = torch.empty(stop - start, dtype=float64)
+    for batch_start in range(start, stop, config.batch_size):
+        indices = range(batch_start, min(batch_start + config.batch_size, stop))
+        frames = stack(get_items(dataset, indices))
+        times = None
+        if count_times is not None:
+            times = stack(get_items(count_times, indices))
+        statistics.update(frames, times)
+        frame_means[batch_start - start : indices.stop - start] = (
+            frames.to(float64).flatten(1).mean(dim=1)
+        )
+    return shard, statistics, frame_means
+
+
+def compute_statistics(
+    config: StatsConfig,
+    processes: Optional[int] = None,
+    on_shard: Optional[Callable[[Shard], Any]] = None,
+) -> DatasetStatistics:
+    """Computes the statistics of a dataset in a single pass across a process pool.
+
+    Divides the frames into shards of contiguous frames within each source file and
+    accumulates the statistics of each across a pool of worker processes, each with its
+    own hdf5 handles. Statistics of shards are merged as they complete, and the mean of
+    each frame is written to the output as its shard completes, such that memory is
+    bounded by the shape of a frame rather than the number of frames. The merged
+    statistics are written to the output alongside the frame means.
+
+    Args:
+        config: The statistics configuration.
+        processes: The number of worker processes, if None the configured number is
+            used. Defaults to None.
+        on_shard: A callback invoked with each shard as it completes. Defaults to None.
+
+    Returns:
+        DatasetStatistics: The statistics of all frames.
+
+    Raises:
+        ValueError: If there are no frames, or the count times are not of the same
+            length as the frames.
+    """
+    dataset = config.dataset()
+    if len(dataset) == 0:
+        raise ValueError("No frames have been accumulated.")
+    if config.count_times is not None and len(config.count_times()) != len(dataset):
+        raise ValueError("Count times must be of the same length as the frames.")
+    shards = split_shards(dataset_edges(dataset), config.shard_frames)
+    statistics = DatasetStatistics(
+        config.histogram_min, config.histogram_max, config.bins
+    )
+    Path(config.output).parent.mkdir(parents=True, exist_ok=True)
+    with File(config.output, "w") as file:
+        frame_means = file.create_dataset("frame_mean", (len(dataset),), np_float64)
+        with ProcessPoolExecutor(
+            min(processes or config.processes or cpu_count() or 1, len(shards)),
+            mp_context=get_context("spawn"),
+            initializer=_initialize,
+            initargs=(config,),
+        ) as executor:
+            for future in as_completed(
+                [executor.submit(_accumulate_shard, shard) for shard in shards]
+            ):
+                (start, stop), shard_statistics, means = future.result()
+                statistics.merge(shard_statistics)
+                frame_means[start:stop] = means.numpy()
+                if on_shard is not None:
+                    on_shard((start, stop))
+        statistics.write(file)
+    return statistics
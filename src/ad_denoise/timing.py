@@ -0,0 +1,127 @@
+from contextlib import nullcontext
+from enum import IntEnum
+from multiprocessing import Array
+from time import perf_counter
+from types import TracebackType
+from typing import Any, ContextManager, Optional
+
+
+class Stage(IntEnum):
+    """The stages of the data pipeline and training loop which may be timed.
+
+    Stages may be nested, such that decompression and chunk reads are included within
+    hdf5 reads and training steps, the forward pass and loss, are included in training
+    batches, which additionally include the backward pass and optimization. Compression
+    and hdf5 writes are those of writers of denoised output.
+    """
+
+    HDF5_OPEN = 0
+    HDF5_READ = 1
+    CHUNK_READ = 2
+    DECOMPRESS = 3
+    COMPUTE = 4
+    DATA_WAIT = 5
+    TRAINING_BATCH = 6
+    TRAINING_STEP = 7
+    VALIDATION_STEP = 8
+    COMPRESS = 9
+    HDF5_WRITE = 10
+
+
+# The accumulated seconds and count of each stage, in memory shared with processes
+# forked after timing is enabled, or None if timing is disabled
+_totals: Optional[Any] = None
+
+_DISABLED: ContextManager[None] = nullcontext()
+
+
+def enable_timing() -> None:
+    """Enables the timing of stages, clearing any previously accumulated timings.
+
+    Timings are accumulated in shared memory, such that stages timed in data loader
+    workers forked after timing is enabled are aggregated with those of this process.
+    """
+    global _totals
+    _totals = Array("d", 2 * len(Stage))
+
+
+def disable_timing() -> None:
+    """Disables the timing of stages, discarding any accumulated timings."""
+    global _totals
+    _totals = None
+
+
+def timing_enabled() -> bool:
+    """Checks whether the timing of stages is enabled.
+
+    Returns:
+        bool: True if timing is enabled.
+    """
+    return _totals is not None
+
+
+def record(stage: Stage, seconds: float) -> None:
+    """Adds a single occurance of a stage to its timing, if timing is enabled.
+
+    Args:
+        stage: The stage which occured.
+        seconds: The duration of the occurance in seconds.
+    """
+    totals = _totals
+    if totals is None:
+        return
+    with totals.get_lock():
+        totals[2 * stage] += seconds
+        totals[2 * stage + 1] += 1
+
+
+class _Timer:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage: Stage) -> None:
+        self.stage = stage
+        self.start = 0.0
+
+    def __enter__(self) -> None:
+        self.start = perf_counter()
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        record(self.stage, perf_counter() - self.start)
+
+
+def timed(stage: Stage) -> ContextManager[None]:
+    """Creates a context manager which times its body as an occurance of a stage.
+
+    Args:
+        stage: The stage which the body of the context manager performs.
+
+    Returns:
+        ContextManager[None]: A context manager which records the duration of its body
+            if timing is enabled, or a shared no-op context manager otherwise.
+    """
+    return _DISABLED if _totals is None else _Timer(stage)
+
+
+def read_timings(reset: bool = False) -> dict[Stage, tuple[float, int]]:
+    """Reads the accumulated timing of each stage, across all processes.
+
+    Args:
+        reset: If True, the accumulated timings are cleared. Defaults to False.
+
+    Returns:
+        dict[Stage, tuple[float, int]]: The total seconds and number of occurances of
+            each stage, or an empty dictionary if timing is disabled.
+    """
+    totals = _totals
+    if totals is None:
+        return {}
+    with totals.get_lock():
+        values = totals[:]
+        if reset:
+            totals[:] = [0.0] * len(values)
+    return {stage: (values[2 * stage], int(values[2 * stage + 1])) for stage in Stage}
@@ -0,0 +1,314 @@
+import random
+from dataclasses import dataclass
+from os import getcwd, getpid
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Optional, Union
+from warnings import warn
+
+import numpy
+import torch
+from pytorch_lightning import Callback, LightningModule, Trainer
+from pytorch_lightning.callbacks import ModelCheckpoint
+from pytorch_lightning.loggers import TensorBoardLogger
+
+from ad_denoise.datasets.resumable import ResumableBatchSampler
+from ad_denoise.lightning_modules import LightningModuleConfig
+from ad_denoise.memory import (
+    ActivationTracker,
+    Component,
+    dataset_memory,
+    disable_memory_tracking,
+    enable_memory_tracking,
+    nbytes,
+    process_rss,
+    read_memory,
+    report_memory,
+    tree_rss,
+)
+from ad_denoise.timing import Stage, enable_timing, read_timings, record
+
+
+@dataclass
+class TrainConfig:
+    """A configuration schema for network training."""
+
+    name: str
+    model: LightningModuleConfig
+    max_epochs: int
+    #: If True, the stages of the data pipeline and training loop are timed and logged.
+    timing: bool = False
+    #: If True, memory is estimated before training and accounted for and logged.
+    memory: bool = False
+    #: The hardware on which training runs, such as cpu or gpu.
+    accelerator: str = "auto"
+    #: The number of devices, or the devices, on which each node trains.
+    devices: Union[int, str] = "auto"
+    #: The number of nodes across which training is distributed.
+    num_nodes: int = 1
+    #: The lightning distribution strategy, such as ddp.
+    strategy: str = "auto"
+    #: The number of training steps between checkpoints to last.ckpt in the checkpoints
+    #: directory of the model, from which an interrupted run resumes mid epoch. If None,
+    #: checkpoints are only saved at the end of each epoch.
+    checkpoint_steps: Optional[int] = None
+
+
+class TimingCallback(Callback):
+    """A lightning callback which logs the timing of each stage at the end of epochs.
+
+    A lightning callback which times the wait for each training batch, including the
+    transfer from data loader workers, and each training batch, then logs the timings
+    of all stages, accumulated across data loader workers, to the trainer logger at the
+    end of each training epoch. Timing must be enabled for stages to be recorded.
+    """
+
+    def __init__(self) -> None:
+        """Creates a lightning callback which logs the timing of each stage."""
+        self._mark = 0.0
+
+    def on_train_epoch_start(
+        self, trainer: Trainer, pl_module: LightningModule
+    ) -> None:
+        """Marks the start of the wait for the first batch of the epoch."""
+        self._mark = perf_counter()
+
+    def on_train_batch_start(
+        self, trainer: Trainer, pl_module: LightningModule, batch: Any, batch_idx: int
+    ) -> None:
+        """Records the wait for the batch and marks the start of its training step."""
+        now = perf_counter()
+        record(Stage.DATA_WAIT, now - self._mark)
+        self._mark = now
+
+    def on_train_batch_end(
+        self,
+        trainer: Trainer,
+        pl_module: LightningModule,
+        outputs: Any,
+        batch: Any,
+        batch_idx: int,
+    ) -> None:
+        """Records the training step and marks the start of the wait for a batch."""
+        now = perf_counter()
+        record(Stage.TRAINING_BATCH, now - self._mark)
+        self._mark = now
+
+    def on_train_epoch_end(self, trainer: Trainer, pl_module: LightningModule) -> None:
+        """Logs the time spent in each stage during the epoch and resets the timings."""
+        metrics: dict[str, float] = {}
+        for stage, (seconds, count) in read_timings(reset=True).items():
+            if count > 0:
+                name = f"timing/{stage.name.lower()}"
+                metrics[f"{name}_seconds"] = seconds
+                metrics[f"{name}_count"] = count
+                metrics[f"{name}_mean_ms"] = 1e3 * seconds / count
+        if trainer.logger is not None and metrics:
+            trainer.logger.log_metrics(metrics, step=trainer.global_step)
+
+
+class MemoryCallback(Callback):
+    """A lightning callback which logs the memory held by each component per process.
+
+    A lightning callback which logs, at the end of each training epoch, the memory held
+    by the caches, masks and buffers of the datasets and the resident set size of the
+    main process and of each data loader worker, the largest training batch and the
+    largest output of each leaf module of the model. Memory tracking must be enabled
+    before data loader workers are created for workers to report.
+    """
+
+    def __init__(self) -> None:
+        """Creates a lightning callback which logs the memory of each component."""
+        self._tracker: Optional[ActivationTracker] = None
+        self._batch = 0
+
+    def on_fit_start(self, trainer: Trainer, pl_module: LightningModule) -> None:
+        """Begins recording the largest output of each leaf module of the model."""
+        self._tracker = ActivationTracker(pl_module)
+
+    def on_fit_end(self, trainer: Trainer, pl_module: LightningModule) -> None:
+        """Stops recording the outputs of the leaf modules of the model."""
+        if self._tracker is not None:
+            self._tracker.remove()
+
+    def on_train_batch_end(
+        self,
+        trainer: Trainer,
+        pl_module: LightningModule,
+        outputs: Any,
+        batch: Any,
+        batch_idx: int,
+    ) -> None:
+        """Records the size of the training batch, if it is the largest so far."""
+        self._batch = max(self._batch, nbytes(batch))
+
+    def on_train_epoch_end(self, trainer: Trainer, pl_module: LightningModule) -> None:
+        """Logs the memory held by each component of each process."""
+        datasets = [
+            getattr(pl_module, name)
+            for name in ("train_dataset", "val_dataset")
+            if hasattr(pl_module, name)
+        ]
+        report_memory(
+            0,
+            {
+                **dataset_memory(*datasets),
+                Component.RSS: process_rss(getpid()),
+                Component.BATCH: self._batch,
+            },
+        )
+        metrics: dict[str, float] = {"memory/total_rss_mib": tree_rss(getpid()) / 2**20}
+        for slot, usage in read_memory().items():
+            name = "memory/main" if slot == 0 else f"memory/worker_{slot - 1}"
+            for component, size in usage.items():
+                metrics[f"{name}/{component.name.lower()}_mib"] = size / 2**20
+        if self._tracker is not None:
+            for module, size in self._tracker.usage.items():
+                metrics[f"memory/activations/{module}_mib"] = size / 2**20
+        if trainer.logger is not None:
+            trainer.logger.log_metrics(metrics, step=trainer.global_step)
+
+    def teardown(
+        self, trainer: Trainer, pl_module: LightningModule, stage: str
+    ) -> None:
+        """Disables memory tracking, stopping the reports of data loader workers."""
+        disable_memory_tracking()
+
+
+class ResumeCallback(Callback):
+    """A lightning callback which saves the state required to resume mid epoch.
+
+    A lightning callback which counts, after each training batch, the indices of the
+    batch, as recorded by the resumable batch sampler of the training data loader, as
+    consumed on its resumable sampler, which lightning saves as the state of the loader,
+    such that training resumes from the next unconsumed batch without reading consumed
+    data again. The state of the random number generators of the training process is
+    saved in checkpoints and restored on resumption, such that masks continue the same
+    sequence.
+    """
+
+    def __init__(self) -> None:
+        """Creates a lightning callback which saves the state required to resume."""
+        self._rng_states: Optional[dict[str, Any]] = None
+
+    def on_train_batch_end(
+        self,
+        trainer: Trainer,
+        pl_module: LightningModule,
+        outputs: Any,
+        batch: Any,
+        batch_idx: int,
+    ) -> None:
+        """Counts the indices of the batch as consumed by training."""
+        batch_sampler = getattr(trainer.train_dataloader, "batch_sampler", None)
+        if isinstance(batch_sampler, ResumableBatchSampler):
+            batch_sampler.consume()
+
+    def state_dict(self) -> dict[str, Any]:
+        """Returns the state of the random number generators."""
+        state = numpy.random.get_state(legacy=False)
+        state["state"]["key"] = state["state"]["key"].tolist()
+        return {
+            "torch": torch.get_rng_state(),
+            "cuda": torch.cuda.get_rng_state_all() if torch.cuda.is_available() else [],
+            # Saved as builtin types, such that checkpoints load with weights_only
+            "numpy": state,
+            "python": random.getstate(),
+        }
+
+    def load_state_dict(self, state_dict: dict[str, Any]) -> None:
+        """Holds the state of the random number generators until training starts."""
+        self._rng_states = state_dict
+
+    def on_train_start(self, trainer: Trainer, pl_module: LightningModule) -> None:
+        """Restores the state of the random number generators, if loaded."""
+        # Restored once data loaders have been iterated, as worker seeds are drawn
+        if self._rng_states is None:
+            return
+        torch.set_rng_state(self._rng_states["torch"])
+        if self._rng_states["cuda"] and torch.cuda.is_available():
+            torch.cuda.set_rng_state_all(self._rng_states["cuda"])
+        state = self._rng_states["numpy"]
+        state["state"]["key"] = numpy.array(state["state"]["key"], numpy.uint32)
+        numpy.random.set_state(state)
+        random.setstate(self._rng_states["python"])
+        self._rng_states = None
+
+
+def checkpoint_directory(config: TrainConfig) -> Path:
+    """Finds the directory of the step checkpoints of a model.
+
+    Args:
+        config: The training configuration.
+
+    Returns:
+        Path: The directory of the step checkpoints, shared by all runs of the model.
+    """
+    return Path(getcwd()).joinpath("logs", config.name, "checkpoints")
+
+
+def train(config: TrainConfig, checkpoint: Optional[Path] = None) -> None:
+    """Trains the configured model, logging to tensorboard in the working directory.
+
+    If training is distributed, each rank is assigned a disjoint set of files by the
+    configured data loaders, rather than by the lightning distributed sampler.
+    If timing is configured, the timing of each stage is logged alongside the losses.
+    If memory is configured, the preflight memory estimate is logged before training,
+    if the model supports it, and the memory of each component of each process is
+    logged during training.
+    If checkpoint steps are configured, training is checkpointed to last.ckpt every
+    number of steps and, unless a checkpoint is given, resumes from it if it exists.
+
+    Args:
+        config: The training configuration.
+        checkpoint: The path of a checkpoint from which training resumes, mid epoch if
+            it was saved mid epoch. Defaults to None.
+    """
+    callbacks: list[Callback] = []
+    if config.checkpoint_steps is not None:
+        directory = checkpoint_directory(config)
+        callbacks.append(ResumeCallback())
+        callbacks.append(ModelCheckpoint())
+        callbacks.append(
+            ModelCheckpoint(
+                directory,
+                every_n_train_steps=config.checkpoint_steps,
+                save_top_k=0,
+                save_last=True,
+            )
+        )
+        if checkpoint is None and directory.joinpath("last.ckpt").exists():
+            checkpoint = directory.joinpath("last.ckpt")
+    logger = TensorBoardLogger(str(Path(getcwd()).joinpath("logs")), config.name)
+    if config.timing:
+        enable_timing()
+        callbacks.append(TimingCallback())
+    if config.memory:
+        from ad_denoise.preflight import estimate_memory, peak_processes
+
+        try:
+            estimate = estimate_memory(config)
+        except ValueError as error:
+            warn(f"The memory of training is not estimated: {error}")
+        else:
+            logger.log_metrics(
+                {
+                    f"memory/estimate/{component}_mib": size / 2**20
+                    for component, size in estimate.components.items()
+                },
+                step=0,
+            )
+        enable_memory_tracking(peak_processes(config.model))
+        callbacks.append(MemoryCallback())
+    trainer = Trainer(
+        max_epochs=config.max_epochs,
+        log_every_n_steps=1,
+        accelerator=config.accelerator,
+        devices=config.devices,
+        num_nodes=config.num_nodes,
+        strategy=config.strategy,
+        use_distributed_sampler=False,
+        logger=logger,
+        callbacks=callbacks,
+    )
+    trainer.fit(config.model(), ckpt_path=checkpoint)
@@ -1,10 +1,16 @@
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, DefaultDict, Dict, Iterator, Type, TypeVar
+from typing import Any, Callable, DefaultDict, Dict, Iterator, Type, TypeVar
 
-from apischema import deserialize, deserializer, serializer
+from apischema import deserialization_method, deserializer, serializer
 from apischema.conversions import Conversion
 from apischema.tagged_unions import Tagged, TaggedUnion, get_tagged
-from yaml import Loader, load
+from yaml import load
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # pragma: no cover
+    from yaml import SafeLoader  # type: ignore
 
 # Implementation adapted from apischema example: Class as tagged union of its subclasses
 # see: https://wyfo.github.io/apischema/examples/subclass_tagged_union/
@@ -30,6 +36,43 @@ def rec_subclasses(cls: type) -> Iterator[type]:
 
 #: Whether the current class is registered as a tagged union
 is_tagged_union: Dict[Type[Any], bool] = DefaultDict(lambda: False)
+# The functions which register the conversions of each tagged union, by base class
+_registrations: Dict[Type[Any], Callable[[], None]] = {}
+
+
+@lru_cache(maxsize=None)
+def config_deserializer(config_type: Type[Any]) -> Callable[[Any], Any]:
+    """Gets a memoized apischema deserialization method for a config type.
+
+    Gets a memoized apischema deserialization method for a config type, such that the
+    tagged unions of its sub-trees are built once rather than on each deserialization.
+    The memo is cleared whenever a sub-class of a TaggedUnionBase is defined.
+
+    Args:
+        config_type: The type of the configuration object.
+
+    Returns:
+        Callable[[Any], Any]: A function which deserializes a configuration object.
+    """
+    return deserialization_method(config_type)
+
+
+class TaggedUnionBase:
+    """A base class for config base classes which can deserialize sub-classes.
+
+    A base class which re-registers the conversions of the tagged unions of its config
+    base classes whenever a sub-class is defined, clearing the memoized deserialization
+    methods, such that the tagged unions are rebuilt to include it.
+    """
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        """Re-registers the tagged unions of the base classes of a new sub-class."""
+        super().__init_subclass__(**kwargs)
+        for base in cls.__mro__[1:]:
+            register = _registrations.get(base)
+            if register is not None:
+                register()
+        config_deserializer.cache_clear()
 
 
 def as_tagged_union(cls: Cls) -> Cls:  # noqa: D205
@@ -39,7 +82,9 @@ def as_tagged_union(cls: Cls) -> Cls:  # noqa: D205
     allowing for serialization and deserialization of config trees by class alias. The
     function registers both an apischema serialization and an apischema deserialization
     conversion for the base class which perform lookup based on a tagged union of
-    aliased sub-classes.
+    aliased sub-classes. The tagged unions are built on first use and memoized, the
+    config base class should derive from TaggedUnionBase, such that the tagged unions
+    are rebuilt to include sub-classes defined after first use.
 
     Args:
         cls (Cls): The config base class.
@@ -72,8 +117,13 @@ def as_tagged_union(cls: Cls) -> Cls:  # noqa: D205
             lambda obj: get_tagged(obj)[1], source=tagged_union, target=cls
         )
 
-    deserializer(lazy=deserialization, target=cls)
-    serializer(lazy=serialization, source=cls)
+    def register() -> None:
+        deserializer(lazy=deserialization, target=cls)
+        serializer(lazy=serialization, source=cls)
+
+    register()
+    config_deserializer.cache_clear()
+    _registrations[cls] = register
     is_tagged_union[cls] = True
     return cls
 
@@ -90,6 +140,6 @@ def load_config(path: Path, config_type: Type[T]) -> T:
         T: The configuration object.
     """
     with open(path) as config_file:
-        toml_dict = load(config_file, Loader=Loader)
-        config = deserialize(config_type, toml_dict)
+        toml_dict = load(config_file, Loader=SafeLoader)
+        config = config_deserializer(config_type)(toml_dict)  # type: ignore
         return config
@@ -0,0 +1,214 @@
+import zlib
+from collections import deque
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Optional
+
+import hdf5plugin
+from h5py import Dataset, ExternalLink, File, Group, SoftLink
+from numpy import dtype, iinfo, integer, ndarray, rint, zeros
+
+from ad_denoise.datasets.chunks import BSHUF_ID, DEFLATE_ID, ZSTD_ID
+from ad_denoise.datasets.hdf5 import H5Key, H5Path
+from ad_denoise.timing import Stage, timed
+
+#: A function which applies a hdf5 filter to the bytes of a chunk.
+ChunkEncoder = Callable[[ndarray], bytes]
+
+#: The size, in bytes, of the blocks of bitshuffle, as chosen by its hdf5 filter.
+BSHUF_BLOCK_BYTES = 8192
+
+
+def _deflate(chunk: ndarray) -> bytes:
+    return zlib.compress(chunk.tobytes(), 4)
+
+
+#: Encoders and the options of their hdf5 filters, by filter id, extended by any
+#: installed codecs.
+ENCODERS: dict[int, tuple[dict[str, Any], ChunkEncoder]] = {
+    DEFLATE_ID: ({"compression": "gzip", "compression_opts": 4}, _deflate),
+}
+
+try:
+    from bitshuffle import compress_lz4
+
+    def _bitshuffle(chunk: ndarray) -> bytes:
+        block_size = max(128, BSHUF_BLOCK_BYTES // chunk.itemsize // 8 * 8)
+        return (
+            chunk.nbytes.to_bytes(8, "big")
+            + (block_size * chunk.itemsize).to_bytes(4, "big")
+            + compress_lz4(chunk.reshape(-1), block_size).tobytes()
+        )
+
+    ENCODERS[BSHUF_ID] = (dict(hdf5plugin.Bitshuffle(cname="lz4")), _bitshuffle)
+except ImportError:  # pragma: no cover
+    pass
+
+try:
+    from zstandard import ZstdCompressor
+
+    def _zstd(chunk: ndarray) -> bytes:
+        return ZstdCompressor(level=3).compress(chunk.tobytes())
+
+    ENCODERS[ZSTD_ID] = (dict(hdf5plugin.Zstd(clevel=3)), _zstd)
+except ImportError:  # pragma: no cover
+    pass
+
+#: The filter ids of the encoders, by name.
+COMPRESSIONS = {"deflate": DEFLATE_ID, "bitshuffle": BSHUF_ID, "zstd": ZSTD_ID}
+
+
+class DirectChunkWriter:
+    """A writer which compresses hdf5 chunks in parallel across threads.
+
+    A writer which appends frames to a hdf5 dataset, chunked by whole frames, buffering
+    frames until a chunk is complete, compressing complete chunks in a thread pool and
+    writing the compressed bytes directly, bypassing the hdf5 filter pipeline, such
+    that compression, which releases the global interpreter lock, scales across cores.
+    Chunks are written in order by the calling thread, and at most max_pending chunks
+    are held awaiting compression. Floating point frames may be stored as integers
+    divided by a scale factor, which is stored as the scale_factor attribute.
+    """
+
+    def __init__(
+        self,
+        group: Group,
+        key: H5Key,
+        shape: tuple[int, ...],
+        frame_dtype: Any,
+        executor: Executor,
+        compression: Optional[str] = "bitshuffle",
+        chunk_frames: int = 1,
+        scale: Optional[float] = None,
+        max_pending: int = 16,
+    ) -> None:
+        """Creates a writer which compresses hdf5 chunks in parallel.
+
+        Args:
+            group: The hdf5 group in which the dataset is created.
+            key: The key of the dataset within the group.
+            shape: The shape of the dataset, led by the number of frames.
+            frame_dtype: The data type stored, an integer type if a scale is given.
+            executor: The thread pool in which chunks are compressed, which may be
+                shared between writers.
+            compression: The name of the compression, one of deflate, bitshuffle or
+                zstd, if None chunks are written uncompressed. Defaults to bitshuffle.
+            chunk_frames: The number of frames in each chunk. Defaults to 1.
+            scale: The scale factor of the stored integers, such that the value of
+                each is the product of it and the scale, if None frames are stored as
+                given. Defaults to None.
+            max_pending: The largest number of chunks awaiting compression. Defaults to
+                16.
+
+        Raises:
+            ValueError: If the compression is not installed, or a scale is given for a
+                non integer type.
+        """
+        if compression is not None and COMPRESSIONS.get(compression) not in ENCODERS:
+            raise ValueError(f"Compression {compression} is not available.")
+        self.dtype = dtype(frame_dtype)
+        if scale is not None and not issubclass(self.dtype.type, integer):
+            raise ValueError("Scaled frames must be stored as integers.")
+        options, self.encoder = (
+            ({}, ndarray.tobytes)
+            if compression is None
+            else ENCODERS[COMPRESSIONS[compression]]
+        )
+        self.chunks = (chunk_frames, *shape[1:])
+        self.dataset: Dataset = group.create_dataset(
+            key, shape, self.dtype, chunks=self.chunks, **options
+        )
+        if scale is not None:
+            self.dataset.attrs["scale_factor"] = scale
+        self.scale = scale
+        self.executor = executor
+        self.max_pending = max_pending
+        self.buffer = zeros(self.chunks, self.dtype)
+        self.buffered = 0
+        self.written = 0
+        self.pending: deque[tuple[int, Future[bytes]]] = deque()
+
+    def _convert(self, frames: ndarray) -> ndarray:
+        if self.scale is None:
+            return frames
+        limits = iinfo(self.dtype)
+        return rint(frames / self.scale).clip(limits.min, limits.max)
+
+    def _encode(self, chunk: ndarray) -> bytes:
+        with timed(Stage.COMPRESS):
+            return self.encoder(chunk)
+
+    def _drain(self, limit: int) -> None:
+        while len(self.pending) > limit:
+            start, future = self.pending.popleft()
+            offset = (start, *(0 for _ in self.chunks[1:]))
+            data = future.result()
+            with timed(Stage.HDF5_WRITE):
+                self.dataset.id.write_direct_chunk(offset, data)
+
+    def _submit(self) -> None:
+        self.pending.append(
+            (self.written, self.executor.submit(self._encode, self.buffer))
+        )
+        self.written += self.chunks[0]
+        self.buffer = zeros(self.chunks, self.dtype)
+        self.buffered = 0
+        self._drain(self.max_pending)
+
+    def write(self, frames: ndarray) -> None:
+        """Appends frames to the dataset.
+
+        Args:
+            frames: The frames, of shape (frames, ...).
+
+        Raises:
+            ValueError: If the frames would overrun the dataset.
+        """
+        if self.written + self.buffered + len(frames) > len(self.dataset):
+            raise ValueError("Frames overrun the length of the dataset.")
+        frames = self._convert(frames)
+        while len(frames):
+            count = min(self.chunks[0] - self.buffered, len(frames))
+            self.buffer[self.buffered : self.buffered + count] = frames[:count]
+            self.buffered += count
+            frames = frames[count:]
+            if self.buffered == self.chunks[0]:
+                self._submit()
+
+    def close(self) -> None:
+        """Compresses and writes any buffered frames and awaits all pending chunks."""
+        if self.buffered:
+            self._submit()
+        self._drain(0)
+
+
+def copy_structure(source: H5Path, destination: Group, exclude: H5Key) -> None:
+    """Copies the groups, attributes, links and datasets of a file, bar one dataset.
+
+    Copies the structure of a NeXus file, such as its groups and their attributes, soft
+    and external links and datasets other than that excluded, into a destination, such
+    that the excluded dataset may be replaced while the file remains valid NeXus.
+
+    Args:
+        source: The path of the file whose structure is copied.
+        destination: The group into which the structure is copied.
+        exclude: The key of the dataset which is not copied.
+    """
+    excluded = "/" + exclude.strip("/")
+    with File(source, "r") as file:
+
+        def copy(source_group: Group, destination_group: Group) -> None:
+            destination_group.attrs.update(source_group.attrs)
+            for name in source_group:
+                link = source_group.get(name, getlink=True)
+                path = f"{source_group.name.rstrip('/')}/{name}"
+                if path == excluded:
+                    continue
+                if isinstance(link, (SoftLink, ExternalLink)):
+                    if name not in destination_group:
+                        destination_group[name] = link
+                elif isinstance(source_group[name], Group):
+                    copy(source_group[name], destination_group.require_group(name))
+                elif name not in destination_group:
+                    file.copy(source_group[name], destination_group, name)
+
+        copy(file, destination)
@@ -0,0 +1,52 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from h5py import File
+from numpy import float32, iinfo, int32, ones, zeros
+from numpy.random import randint
+from torch import from_numpy
+
+from ad_denoise.datasets.area_detector import Hdf5ADImagesDatasetConfig
+from ad_denoise.datasets.hdf5 import H5Key, H5Path
+
+
+def _write_scan(path: Path) -> None:
+    with File(path, "w") as file:
+        file["entry/data"] = randint(iinfo(int32).max, size=(4, 8, 8))
+        file["entry/count_time"] = ones((4,), dtype=float32)
+        file["entry/mask"] = zeros((8, 8), dtype=float32)
+
+
+def test_hdf5_ad_images_produces_frames():
+    with TemporaryDirectory() as tmpdir:
+        file_path = H5Path(Path(tmpdir).joinpath("scan.nxs"))
+        _write_scan(file_path)
+        dataset = Hdf5ADImagesDatasetConfig(
+            [file_path],
+            H5Key("entry/data"),
+            H5Key("entry/count_time"),
+            file_path,
+            H5Key("entry/mask"),
+        )()
+        with File(file_path) as file:
+            for idx, frame in enumerate(dataset):
+                expected = from_numpy(file["entry/data"][idx]).float()
+                assert (expected == frame).all()
+
+
+def test_hdf5_ad_images_configs_share_sources():
+    with TemporaryDirectory() as tmpdir:
+        file_path = H5Path(Path(tmpdir).joinpath("scan.nxs"))
+        _write_scan(file_path)
+        config = Hdf5ADImagesDatasetConfig(
+            [file_path],
+            H5Key("entry/data"),
+            H5Key("entry/count_time"),
+            file_path,
+            H5Key("entry/mask"),
+        )
+        first, second = config(), config()
+        first_frames, first_mask, _ = first.dataset.dataset.datasets
+        second_frames, second_mask, _ = second.dataset.dataset.datasets
+        assert first_frames is second_frames
+        assert first_mask[0] is second_mask[0]
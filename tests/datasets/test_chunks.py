@@ -0,0 +1,90 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any
+
+import hdf5plugin
+import pytest
+from h5py import File
+from numpy import arange, iinfo, int32, uint16
+from numpy.random import randint
+from torch import from_numpy
+
+from ad_denoise.datasets.chunks import BSHUF_ID, DECODERS, DirectChunkReader
+from ad_denoise.datasets.hdf5 import H5Key, H5Path, SimpleHdf5
+from ad_denoise.datasets.utils import Dim
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        {},
+        {"compression": "gzip", "shuffle": True},
+        {"fletcher32": True},
+        dict(hdf5plugin.Bitshuffle(cname="none")),
+        dict(hdf5plugin.Bitshuffle()),
+        dict(hdf5plugin.Bitshuffle(cname="zstd")),
+        dict(hdf5plugin.Blosc()),
+        dict(hdf5plugin.LZ4()),
+        dict(hdf5plugin.Zstd()),
+    ],
+)
+def test_direct_chunk_reader_decodes_frames(filters: dict[str, Any]):
+    data = randint(1000, size=(3, 4, 17, 21)).astype(uint16)
+    with TemporaryDirectory() as tmpdir:
+        file_path = Path(tmpdir).joinpath("testfile.h5")
+        with File(file_path, "w") as file:
+            file.create_dataset("dataset", data=data, chunks=(2, 3, 8, 8), **filters)
+        with File(file_path) as file, ThreadPoolExecutor() as executor:
+            dataset = file["dataset"]
+            if not all(
+                filter_id in DECODERS
+                for filter_id, _ in DirectChunkReader.get_filters(dataset)
+            ):
+                pytest.skip("Codec not installed")
+            reader = DirectChunkReader(dataset, 2, executor)
+            idxs = [11, 0, 5, 5, 7]
+            assert (data.reshape(12, 17, 21)[idxs] == reader.read_frames(idxs)).all()
+
+
+def test_bitunshuffle_decodes_without_compression_values():
+    if BSHUF_ID not in DECODERS:
+        pytest.skip("Codec not installed")
+    import bitshuffle
+
+    data = arange(100, dtype=uint16)
+    shuffled = bitshuffle.bitshuffle(data, 0).tobytes()
+    decoded = DECODERS[BSHUF_ID](shuffled, (0, 4, 2, 0), data.nbytes)
+    assert data.tobytes() == decoded
+
+
+def test_bitunshuffle_rejects_unknown_compression():
+    if BSHUF_ID not in DECODERS:
+        pytest.skip("Codec not installed")
+    with pytest.raises(ValueError):
+        DECODERS[BSHUF_ID](bytes(16), (0, 4, 2, 0, 9), 4)
+
+
+def test_direct_chunk_reader_does_not_support_unknown_filters():
+    with TemporaryDirectory() as tmpdir:
+        file_path = Path(tmpdir).joinpath("testfile.h5")
+        with File(file_path, "w") as file:
+            file.create_dataset("dataset", data=arange(64), compression="lzf")
+        with File(file_path) as file:
+            assert not DirectChunkReader.supports(file["dataset"])
+
+
+@pytest.mark.parametrize("compression", [None, "gzip", "lzf"])
+def test_simple_hdf5_direct_produces_frames(compression: str):
+    data = randint(iinfo(int32).max, size=(10, 10, 10))
+    with TemporaryDirectory() as tmpdir:
+        file_path = Path(tmpdir).joinpath("testfile.h5")
+        with File(file_path, "w") as file:
+            file.create_dataset(
+                "dataset", data=data, chunks=(1, 10, 10), compression=compression
+            )
+        dataset = SimpleHdf5([H5Path(file_path)], H5Key("dataset"), Dim(2), direct=True)
+        for idx in range(len(dataset)):
+            assert (from_numpy(data[idx]) == dataset[idx][0]).all()
+        for idx, (frame,) in zip([9, 2, 3], dataset.__getitems__([9, 2, 3])):
+            assert (from_numpy(data[idx]) == frame).all()
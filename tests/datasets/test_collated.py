@@ -3,7 +3,11 @@ from unittest.mock import MagicMock
 from pytest import raises
 from torch import iinfo, int32, randint
 
-from ad_denoise.datasets.collated import CrossedDatasets, ZippedDatasets
+from ad_denoise.datasets.collated import (
+    CrossedDatasets,
+    InputTargetDataset,
+    ZippedDatasets,
+)
 
 
 def test_zipped_produces_frames_single():
@@ -68,3 +72,27 @@ def test_crossed_reports_length():
     mock_dataset2 = MagicMock(__len__=MagicMock(return_value=2))
     mock_dataset3 = MagicMock(__len__=MagicMock(return_value=3))
     assert 6 == len(CrossedDatasets(mock_dataset1, mock_dataset2, mock_dataset3))
+
+
+def test_zipped_getitems_matches_getitem():
+    data1 = randint(iinfo(int32).max, size=(10, 10, 10))
+    data2 = randint(iinfo(int32).max, size=(10, 10, 10))
+    mock_dataset1 = MagicMock(
+        __getitem__=lambda _, idx: data1[idx], __len__=MagicMock(return_value=10)
+    )
+    mock_dataset2 = MagicMock(
+        __getitem__=lambda _, idx: data2[idx], __len__=MagicMock(return_value=10)
+    )
+    dataset = ZippedDatasets(mock_dataset1, mock_dataset2)
+    for idx, (frame1, frame2) in zip([4, 2, 9], dataset.__getitems__([4, 2, 9])):
+        assert (data1[idx] == frame1).all()
+        assert (data2[idx] == frame2).all()
+
+
+def test_input_target_getitems_reads_datasets_without_getitems():
+    inputs = randint(iinfo(int32).max, size=(10, 10, 10))
+    targets = randint(iinfo(int32).max, size=(10, 10, 10))
+    dataset = InputTargetDataset(list(inputs), list(targets))  # type: ignore
+    for idx, (input, target) in zip([4, 2, 9], dataset.__getitems__([4, 2, 9])):
+        assert (inputs[idx] == input).all()
+        assert (targets[idx] == target).all()
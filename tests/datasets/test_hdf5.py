@@ -1,3 +1,5 @@
+import gc
+from os import utime
 from pathlib import Path
 from tempfile import TemporaryDirectory
 
@@ -6,7 +8,8 @@ from numpy import iinfo, int32, split
 from numpy.random import randint
 from torch import from_numpy
 
-from ad_denoise.datasets.hdf5 import H5Key, H5Path, SimpleHdf5
+from ad_denoise.datasets import hdf5
+from ad_denoise.datasets.hdf5 import H5Key, H5Path, SimpleHdf5, open_file
 from ad_denoise.datasets.utils import Dim
 
 
@@ -51,3 +54,135 @@ def test_simple_hdf5_reports_length():
         with File(file_path2, "w") as file2:
             file2["dataset"] = data2
         assert 20 == len(SimpleHdf5([file_path1, file_path2], H5Key("dataset"), Dim(2)))
+
+
+def test_simple_hdf5_shared_returns_same_instance():
+    data = randint(iinfo(int32).max, size=(10, 10, 10))
+    with TemporaryDirectory() as tmpdir:
+        file_path = Path(tmpdir).joinpath("testfile.h5")
+        with File(file_path, "w") as file:
+            file["dataset"] = data
+        first = SimpleHdf5.shared([file_path], H5Key("dataset"), Dim(2))
+        second = SimpleHdf5.shared([str(file_path)], H5Key("dataset"), Dim(2))
+        assert first is second
+
+
+def test_simple_hdf5_shared_separates_options_and_changed_files():
+    with TemporaryDirectory() as tmpdir:
+        file_path = H5Path(Path(tmpdir).joinpath("testfile.h5"))
+        with File(file_path, "w") as file:
+            file["dataset"] = randint(iinfo(int32).max, size=(10, 10, 10))
+        first = SimpleHdf5.shared([file_path], H5Key("dataset"), Dim(2))
+        direct = SimpleHdf5.shared([file_path], H5Key("dataset"), Dim(2), direct=True)
+        assert first is not direct
+        assert not first.direct
+        first.close()
+        direct.close()
+        with File(file_path, "w") as file:
+            file["dataset"] = randint(iinfo(int32).max, size=(12, 10, 10))
+        utime(file_path, ns=(0, 0))
+        grown = SimpleHdf5.shared([file_path], H5Key("dataset"), Dim(2))
+        assert first is not grown
+        assert 12 == len(grown)
+
+
+def test_open_file_releases_unreferenced_handles():
+    with TemporaryDirectory() as tmpdir:
+        file_path = H5Path(Path(tmpdir).joinpath("testfile.h5"))
+        with File(file_path, "w") as file:
+            file["dataset"] = randint(iinfo(int32).max, size=(10, 10, 10))
+        file = open_file(file_path)
+        assert file is open_file(H5Path(Path(tmpdir).joinpath(".", "testfile.h5")))
+        del file
+        gc.collect()
+        assert not any(signature[0] == file_path.resolve() for signature in hdf5._files)
+
+
+def test_simple_hdf5_close_releases_and_reopens_files():
+    data = randint(iinfo(int32).max, size=(10, 10, 10))
+    with TemporaryDirectory() as tmpdir:
+        file_path = Path(tmpdir).joinpath("testfile.h5")
+        with File(file_path, "w") as file:
+            file["dataset"] = data
+        dataset = SimpleHdf5([file_path], H5Key("dataset"), Dim(2))
+        dataset[0]
+        dataset.close()
+        assert [None] == dataset._datasets
+        assert (from_numpy(data[1]) == dataset[1]).all()
+
+
+def test_simple_hdf5_opens_files_once_read():
+    data = randint(iinfo(int32).max, size=(10, 10, 10))
+    with TemporaryDirectory() as tmpdir:
+        file_path = Path(tmpdir).joinpath("testfile.h5")
+        with File(file_path, "w") as file:
+            file["dataset"] = data
+        dataset = SimpleHdf5([file_path], H5Key("dataset"), Dim(2))
+        gc.collect()
+        assert 10 == len(dataset)
+        assert [None] == dataset._datasets
+        assert not any(signature[0] == file_path.resolve() for signature in hdf5._files)
+        assert (from_numpy(data[3]) == dataset[3]).all()
+
+
+def test_simple_hdf5_shares_file_handles():
+    with TemporaryDirectory() as tmpdir:
+        file_path = Path(tmpdir).joinpath("testfile.h5")
+        with File(file_path, "w") as file:
+            file["frames"] = randint(iinfo(int32).max, size=(10, 10, 10))
+            file["times"] = randint(iinfo(int32).max, size=(10,))
+        frames = SimpleHdf5([file_path], H5Key("frames"), Dim(2))
+        times = SimpleHdf5([file_path], H5Key("times"), Dim(0))
+        assert frames.datasets[0].file == times.datasets[0].file
+
+
+def test_simple_hdf5_cache_returns_same_tensor():
+    data = randint(iinfo(int32).max, size=(10, 10, 10))
+    with TemporaryDirectory() as tmpdir:
+        file_path = Path(tmpdir).joinpath("testfile.h5")
+        with File(file_path, "w") as file:
+            file["dataset"] = data
+        dataset = SimpleHdf5([file_path], H5Key("dataset"), Dim(2), cache_size=1)
+        frame = dataset[3]
+        assert frame is dataset[3]
+        dataset[4]
+        assert frame is not dataset[3]
+
+
+def test_simple_hdf5_produces_frames_from_index():
+    data = randint(iinfo(int32).max, size=(20, 10, 10))
+    data1, data2 = split(data, (8,))
+    with TemporaryDirectory() as tmpdir:
+        file_path1 = Path(tmpdir).joinpath("testfile1.h5")
+        with File(file_path1, "w") as file1:
+            file1["dataset"] = data1
+        file_path2 = Path(tmpdir).joinpath("testfile2.h5")
+        with File(file_path2, "w") as file2:
+            file2["dataset"] = data2
+        index_path = Path(tmpdir).joinpath("index.json")
+        dataset = SimpleHdf5(
+            [H5Path(file_path1), H5Path(file_path2)],
+            H5Key("dataset"),
+            Dim(2),
+            index=index_path,
+        )
+        assert index_path.exists()
+        assert 20 == len(dataset)
+        for idx, (frame,) in enumerate(dataset):
+            assert (from_numpy(data[idx]) == frame).all()
+
+
+def test_simple_hdf5_getitems_matches_getitem():
+    data = randint(iinfo(int32).max, size=(20, 10, 10))
+    data1, data2 = split(data, (8,))
+    with TemporaryDirectory() as tmpdir:
+        file_path1 = Path(tmpdir).joinpath("testfile1.h5")
+        with File(file_path1, "w") as file1:
+            file1["dataset"] = data1
+        file_path2 = Path(tmpdir).joinpath("testfile2.h5")
+        with File(file_path2, "w") as file2:
+            file2["dataset"] = data2
+        dataset = SimpleHdf5([file_path1, file_path2], H5Key("dataset"), Dim(2))
+        indices = [19, 3, 4, 5, 3, 12, 0]
+        for idx, frame in zip(indices, dataset.__getitems__(indices)):
+            assert (dataset[idx] == frame).all()
@@ -0,0 +1,50 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from h5py import File
+from numpy import iinfo, int32
+from numpy.random import randint
+
+from ad_denoise.datasets.index import Hdf5Index
+
+
+def test_index_records_metadata():
+    with TemporaryDirectory() as tmpdir:
+        file_path = Path(tmpdir).joinpath("testfile.h5")
+        with File(file_path, "w") as file:
+            file.create_dataset(
+                "dataset", data=randint(iinfo(int32).max, size=(6, 4, 5)), chunks=True
+            )
+        (entry,) = Hdf5Index(Path(tmpdir).joinpath("index.json")).scan(
+            [file_path], "dataset"
+        )
+        assert (6, 4, 5) == entry.shape
+        assert 6 == entry.frame_count(2)
+        assert entry.chunks is not None
+
+
+def test_index_is_reused_without_opening_files():
+    with TemporaryDirectory() as tmpdir:
+        file_path = Path(tmpdir).joinpath("testfile.h5")
+        index_path = Path(tmpdir).joinpath("index.json")
+        with File(file_path, "w") as file:
+            file["dataset"] = randint(iinfo(int32).max, size=(6, 4, 5))
+        Hdf5Index(index_path).scan([file_path], "dataset")
+        with patch("ad_denoise.datasets.index.File") as mock_file:
+            (entry,) = Hdf5Index(index_path).scan([file_path], "dataset")
+            mock_file.assert_not_called()
+        assert (6, 4, 5) == entry.shape
+
+
+def test_index_refreshes_modified_files():
+    with TemporaryDirectory() as tmpdir:
+        file_path = Path(tmpdir).joinpath("testfile.h5")
+        index_path = Path(tmpdir).joinpath("index.json")
+        with File(file_path, "w") as file:
+            file["dataset"] = randint(iinfo(int32).max, size=(6, 4, 5))
+        Hdf5Index(index_path).scan([file_path], "dataset")
+        with File(file_path, "w") as file:
+            file["dataset"] = randint(iinfo(int32).max, size=(9, 4, 5))
+        (entry,) = Hdf5Index(index_path).scan([file_path], "dataset")
+        assert (9, 4, 5) == entry.shape
@@ -0,0 +1,92 @@
+from threading import Event, current_thread
+from time import monotonic, sleep
+from typing import Callable
+from unittest.mock import MagicMock
+
+from torch import arange, cat
+
+from ad_denoise.datasets.read_ahead import ReadAheadDataset, ReadAheadSampler
+from ad_denoise.loaders import ThreadedDataLoader
+
+
+def _wait_for(condition: Callable[[], bool], timeout: float = 5.0) -> None:
+    deadline = monotonic() + timeout
+    while not condition() and monotonic() < deadline:
+        sleep(0.01)
+
+
+def test_read_ahead_produces_items_in_schedule():
+    data = arange(20)
+    reads = []
+    mock_dataset = MagicMock(
+        __getitem__=lambda _, idx: reads.append(idx) or data[idx],
+        __len__=MagicMock(return_value=20),
+    )
+    dataset = ReadAheadDataset(mock_dataset, 4)
+    order = [5, 3, 19, 0, 7, 7, 12]
+    for idx in ReadAheadSampler(order, dataset):
+        assert data[idx] == dataset[idx]
+    assert sorted(order) == sorted(reads)
+
+
+def test_read_ahead_is_bounded_by_distance():
+    release = Event()
+    reads = []
+    mock_dataset = MagicMock(
+        __getitem__=lambda _, idx: reads.append(idx) or release.wait(),
+        __len__=MagicMock(return_value=100),
+    )
+    dataset = ReadAheadDataset(mock_dataset, 3, max_workers=8)
+    dataset.schedule(range(100))
+    _wait_for(lambda: len(reads) >= 3)
+    sleep(0.1)
+    assert 3 == len(reads)
+    release.set()
+    dataset[0]
+    _wait_for(lambda: len(reads) >= 4)
+    sleep(0.1)
+    assert 4 == len(reads)
+    dataset.cancel()
+
+
+def test_threaded_loader_reads_ahead():
+    data = arange(50 * 3).reshape(50, 3)
+    loader = ThreadedDataLoader(list(data), batch_size=8, shuffle=True, read_ahead=16)
+    for _ in range(2):
+        items = cat([batch.clone() for batch in loader])
+        assert (data == items[items[:, 0].argsort()]).all()
+
+
+def test_read_ahead_reads_each_item_once_without_leaking_slots():
+    reads = []
+    mock_dataset = MagicMock(
+        __getitem__=lambda _, idx: reads.append((idx, current_thread()))
+        or sleep(0.001)
+        or idx,
+        __len__=MagicMock(return_value=2000),
+    )
+    dataset = ReadAheadDataset(mock_dataset, 16, max_workers=4)
+    for idx in ReadAheadSampler(range(2000), dataset):
+        assert idx == dataset[idx]
+    hits = sum(thread is not current_thread() for _, thread in reads)
+    assert sorted(range(2000)) == sorted(idx for idx, _ in reads)
+    assert hits >= 1900
+    _wait_for(lambda: dataset._slots._value == 16)
+    assert 16 == dataset._slots._value
+
+
+def test_read_ahead_skips_reads_served_on_demand():
+    data = arange(200 * 3).reshape(200, 3)
+    reads = []
+    mock_dataset = MagicMock(
+        __getitem__=lambda _, idx: reads.append(idx) or data[idx],
+        __len__=MagicMock(return_value=200),
+    )
+    loader = ThreadedDataLoader(mock_dataset, batch_size=8, read_ahead=16)
+    for _ in range(2):
+        reads.clear()
+        items = cat([batch.clone() for batch in loader])
+        assert (data == items).all()
+        assert sorted(range(200)) == sorted(reads)
+    _wait_for(lambda: loader.dataset._slots._value == 16)
+    assert 16 == loader.dataset._slots._value
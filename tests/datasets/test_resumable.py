@@ -0,0 +1,83 @@
+from typing import Iterator
+
+from torch.utils.data import Sampler
+
+from ad_denoise.datasets.resumable import ResumableBatchSampler, ResumableSampler
+from ad_denoise.datasets.sharded import ShardedSampler
+
+
+def test_resumable_sampler_shuffles_by_epoch():
+    sampler = ResumableSampler(range(20))
+    first = list(sampler)
+    assert first == list(sampler)
+    assert sorted(first) == list(range(20))
+    sampler.set_epoch(1)
+    assert first != list(sampler)
+
+
+def test_resumable_sampler_resumes_from_consumed():
+    sampler = ResumableSampler(range(20))
+    sampler.set_epoch(3)
+    order = list(sampler)
+    sampler.consumed = 8
+    resumed = ResumableSampler(range(20))
+    resumed.load_state_dict(sampler.state_dict())
+    assert order[8:] == list(resumed)
+    assert order == list(resumed)
+    assert 20 == len(resumed)
+
+
+def test_resumable_sampler_saves_completed_epoch_as_next():
+    sampler = ResumableSampler(range(20), shuffle=False)
+    sampler.set_epoch(2)
+    sampler.consumed = 20
+    assert {"epoch": 3, "consumed": 0} == sampler.state_dict()
+
+
+def test_resumable_sampler_wraps_epoch_dependant_sampler():
+    sharded = ShardedSampler([0, 10, 14, 30], 2, 0)
+    sampler = ResumableSampler(range(30), sampler=sharded)
+    sampler.load_state_dict({"epoch": 2, "consumed": 5})
+    assert 2 == sharded.epoch
+    assert list(sharded)[5:] == list(sampler)
+    assert len(sharded) == len(sampler)
+
+
+class _GrowingSampler(Sampler[int]):
+    def __init__(self) -> None:
+        self.epoch = 0
+
+    def set_epoch(self, epoch: int) -> None:
+        self.epoch = epoch
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(len(self)))
+
+    def __len__(self) -> int:
+        return 4 + self.epoch
+
+
+def test_resumable_sampler_measures_each_epoch():
+    sampler = ResumableSampler(range(8), sampler=_GrowingSampler())
+    sampler.consumed = 4
+    assert 4 == len(sampler)
+    assert {"epoch": 1, "consumed": 0} == sampler.state_dict()
+    sampler.set_epoch(1)
+    assert 5 == len(sampler)
+    assert {"epoch": 1, "consumed": 4} == sampler.state_dict()
+    sampler.load_state_dict({"epoch": 2, "consumed": 5})
+    assert [5] == list(sampler)
+    assert {"epoch": 2, "consumed": 5} == sampler.state_dict()
+
+
+def test_resumable_batch_sampler_counts_consumed_batches():
+    sampler = ResumableSampler(range(7), shuffle=False)
+    batch_sampler = ResumableBatchSampler(sampler, 3, drop_last=False)
+    batches = iter(batch_sampler)
+    assert [[0, 1, 2], [3, 4, 5], [6]] == [next(batches) for _ in range(3)]
+    batch_sampler.consume()
+    assert 3 == sampler.consumed
+    batch_sampler.consume()
+    batch_sampler.consume()
+    assert 7 == sampler.consumed
+    assert {"epoch": 1, "consumed": 0} == sampler.state_dict()
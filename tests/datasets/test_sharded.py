@@ -0,0 +1,142 @@
+from multiprocessing import get_context
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any
+
+import pytest
+from h5py import File
+from numpy import arange
+from torch import distributed
+
+from ad_denoise.datasets.collated import ZippedDatasets
+from ad_denoise.datasets.hdf5 import H5Key, H5Path, SimpleHdf5
+from ad_denoise.datasets.sharded import ShardedSampler, dataset_edges
+from ad_denoise.datasets.utils import Dim
+from ad_denoise.loaders import ProcessDataLoaderConfig, ThreadedDataLoaderConfig
+
+EDGES = [0, 10, 14, 30, 37, 50, 58]
+
+
+def test_sharded_sampler_partitions_files_between_replicas():
+    samplers = [ShardedSampler(EDGES, 3, rank, shuffle=False) for rank in range(3)]
+    shards = [shard for shards in samplers[0].assignment() for shard in shards]
+    assert sorted(shards) == list(zip(EDGES[:-1], EDGES[1:]))
+    drawn = [set(sampler) for sampler in samplers]
+    assert set().union(*drawn) == set(range(58))
+    assert all(not a & b for a in drawn for b in drawn if a is not b)
+
+
+def test_sharded_sampler_balances_frame_counts():
+    sampler = ShardedSampler(EDGES, 3, 0, shuffle=False)
+    loads = [sum(b - a for a, b in shards) for shards in sampler.assignment()]
+    assert max(loads) - min(loads) <= 16
+
+
+def test_sharded_sampler_draws_equal_lengths():
+    samplers = [ShardedSampler(EDGES, 4, rank) for rank in range(4)]
+    lengths = {len(sampler) for sampler in samplers}
+    assert {len(list(sampler)) for sampler in samplers} == lengths
+    assert 1 == len(lengths)
+
+
+def test_sharded_sampler_reassigns_each_epoch():
+    sampler = ShardedSampler([0, *range(8, 129, 8)], 4, 0)
+    assignments = []
+    for epoch in range(4):
+        sampler.set_epoch(epoch)
+        assignments.append(sampler.assignment())
+    assert len({str(assignment) for assignment in assignments}) > 1
+    sampler.set_epoch(0)
+    assert assignments[0] == sampler.assignment()
+
+
+def test_sharded_sampler_splits_files_into_shards():
+    sampler = ShardedSampler([0, 10, 30], 2, 0, shard_frames=8)
+    assert [(0, 8), (8, 10), (10, 18), (18, 26), (26, 30)] == sampler.shards
+
+
+def test_sharded_sampler_splits_frames_of_too_few_shards():
+    samplers = [ShardedSampler([0, 3, 100], 4, rank) for rank in range(4)]
+    assert 4 <= len(samplers[0].shards)
+    indices = [set(sampler) for sampler in samplers]
+    assert set(range(100)) == set.union(*indices)
+    assert 100 == sum(len(ranked) for ranked in indices)
+
+
+def test_sharded_sampler_rejects_too_few_frames():
+    with pytest.raises(ValueError):
+        ShardedSampler([0, 1], 2, 0)
+
+
+def test_dataset_edges_follow_zipped_sources():
+    data = arange(30 * 2 * 2).reshape(30, 2, 2)
+    with TemporaryDirectory() as tmpdir:
+        paths = []
+        for idx, (start, stop) in enumerate([(0, 12), (12, 30)]):
+            paths.append(H5Path(Path(tmpdir).joinpath(f"file{idx}.h5")))
+            with File(paths[-1], "w") as file:
+                file["data"] = data[start:stop]
+        frames = SimpleHdf5(paths, H5Key("data"), Dim(2))
+        assert [0, 12, 30] == dataset_edges(ZippedDatasets(frames, frames))
+        assert [0, 30] == dataset_edges(list(range(30)))
+
+
+def _train_rank(
+    rank: int, init_file: str, paths: list[H5Path], index: Path, loader: Any
+) -> tuple[list[int], list[int]]:
+    distributed.init_process_group(
+        "gloo", init_method=f"file://{init_file}", rank=rank, world_size=2
+    )
+    try:
+        dataset = SimpleHdf5(paths, H5Key("data"), Dim(2), index=index)
+        values = [
+            int(value)
+            for batch in loader(dataset, shuffle=True)
+            for value in batch[:, 0, 0, 0]
+        ]
+        opened = [idx for idx, opened in enumerate(dataset._datasets) if opened]
+        return values, opened
+    finally:
+        distributed.destroy_process_group()
+
+
+def _run_rank(rank: int, queue: Any, *args: Any) -> None:
+    queue.put((rank, _train_rank(rank, *args)))
+
+
+@pytest.mark.parametrize(
+    "loader",
+    [
+        ProcessDataLoaderConfig(batch_size=4, num_workers=0),
+        ThreadedDataLoaderConfig(batch_size=4, num_threads=2, read_ahead=4),
+    ],
+)
+def test_sharded_loaders_open_only_assigned_files(loader: Any):
+    sizes = [10, 6, 12, 8]
+    with TemporaryDirectory() as tmpdir:
+        paths, start = [], 0
+        for idx, size in enumerate(sizes):
+            paths.append(H5Path(Path(tmpdir).joinpath(f"file{idx}.h5")))
+            with File(paths[-1], "w") as file:
+                file["data"] = arange(start, start + size)[:, None, None]
+            start += size
+        index = Path(tmpdir).joinpath("index.json")
+        SimpleHdf5(paths, H5Key("data"), Dim(2), index=index)
+        context = get_context("fork")
+        queue = context.Queue()
+        args = (queue, str(Path(tmpdir).joinpath("init")), paths, index, loader)
+        processes = [
+            context.Process(target=_run_rank, args=(rank, *args)) for rank in range(2)
+        ]
+        for process in processes:
+            process.start()
+        results = dict(queue.get(timeout=60) for _ in processes)
+        for process in processes:
+            process.join(timeout=60)
+            assert 0 == process.exitcode
+    (values0, opened0), (values1, opened1) = results[0], results[1]
+    assert len(values0) == len(values1) == 18
+    assert not set(opened0) & set(opened1)
+    assert set(opened0) | set(opened1) == set(range(len(sizes)))
+    assert set(values0) | set(values1) == set(range(sum(sizes)))
+    assert not set(values0) & set(values1)
@@ -0,0 +1,65 @@
+import subprocess
+import sys
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from h5py import File
+from numpy import arange, concatenate
+
+from ad_denoise.datasets.hdf5 import H5Key, H5Path, SimpleHdf5DatasetConfig
+from ad_denoise.datasets.utils import Dim
+from ad_denoise.datasets.virtual import build_virtual_dataset
+
+
+def test_virtual_dataset_concatenates_frames():
+    data1 = arange(2 * 3 * 4 * 5).reshape(2, 3, 4, 5)
+    data2 = arange(7 * 4 * 5).reshape(7, 4, 5)
+    with TemporaryDirectory() as tmpdir:
+        paths = [Path(tmpdir).joinpath(f"testfile{idx}.h5") for idx in range(2)]
+        for path, data in zip(paths, (data1, data2)):
+            with File(path, "w") as file:
+                file["entry/data"] = data
+        output = Path(tmpdir).joinpath("virtual.h5")
+        build_virtual_dataset(paths, "entry/data", output, 2)
+        with File(output) as file:
+            virtual = file["entry/data"][()]
+        assert (concatenate((data1.reshape(-1, 4, 5), data2)) == virtual).all()
+
+
+def test_simple_hdf5_config_reads_through_virtual_dataset():
+    data1 = arange(3 * 4 * 5).reshape(3, 4, 5)
+    data2 = arange(100, 100 + 5 * 4 * 5).reshape(5, 4, 5)
+    with TemporaryDirectory() as tmpdir:
+        paths = [H5Path(Path(tmpdir).joinpath(f"testfile{idx}.h5")) for idx in range(2)]
+        for path, data in zip(paths, (data1, data2)):
+            with File(path, "w") as file:
+                file["data"] = data
+        virtual = H5Path(Path(tmpdir).joinpath("virtual.h5"))
+        dataset = SimpleHdf5DatasetConfig(
+            paths, H5Key("data"), Dim(2), virtual=virtual
+        )()
+        assert virtual.exists()
+        frames = dataset.__getitems__([7, 1, 2, 5])  # type: ignore
+        expected = concatenate((data1, data2))[[7, 1, 2, 5]]
+        for frame, expected_frame in zip(frames, expected):
+            assert (expected_frame == frame.numpy()).all()
+
+
+def test_cli_vds_builds_virtual_dataset():
+    with TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir).joinpath("testfile.h5")
+        with File(path, "w") as file:
+            file["data"] = arange(2 * 4 * 5).reshape(2, 4, 5)
+        output = Path(tmpdir).joinpath("virtual.h5")
+        cmd = [
+            sys.executable,
+            "-m",
+            "ad_denoise",
+            "vds",
+            str(output),
+            "data",
+            str(path),
+        ]
+        subprocess.check_call(cmd)
+        with File(output) as file:
+            assert (2, 4, 5) == file["data"].shape
@@ -0,0 +1,97 @@
+import pytest
+import torch
+from apischema import deserialize
+from torch import rand
+
+from ad_denoise.lightning_modules.masking import (
+    GridMasking,
+    GridMaskingConfig,
+    MaskingConfig,
+    RandomMasking,
+    RandomMaskingConfig,
+)
+from ad_denoise.lightning_modules.noise2self import Noise2Self, ScaledGaussianConfig
+
+
+def test_grid_masking_masks_one_pixel_per_cell():
+    masking = GridMasking(4)
+    indices = masking(rand(3, 1, 8, 12)).indices
+    assert (3, 6) == indices.shape
+    rows, columns = indices // 12, indices % 12
+    for frame_rows, frame_columns in zip(rows, columns):
+        assert 1 == len(set((frame_rows % 4).tolist()))
+        assert 1 == len(set((frame_columns % 4).tolist()))
+        assert [0, 0, 0, 1, 1, 1] == sorted((frame_rows // 4).tolist())
+
+
+def test_grid_masking_requires_spacing_of_two():
+    with pytest.raises(ValueError):
+        GridMasking(1)
+
+
+def test_random_masking_masks_distinct_pixels():
+    indices = RandomMasking(0.25)(rand(4, 1, 8, 8)).indices
+    assert (4, 16) == indices.shape
+    for frame in indices:
+        assert 16 == len(set(frame.tolist()))
+
+
+def test_masking_replaces_pixels_by_mean_of_neighbours():
+    batch = rand(2, 1, 6, 6)
+    inputs, indices, targets = RandomMasking(0.1)(batch)
+    padded = torch.nn.functional.pad(batch[:, 0], (1, 1, 1, 1))
+    masked = torch.zeros_like(padded, dtype=torch.bool)
+    for frame, frame_indices in enumerate(indices):
+        for index in frame_indices.tolist():
+            masked[frame, index // 6 + 1, index % 6 + 1] = True
+    padded[masked] = 0.0
+    for frame, frame_indices in enumerate(indices):
+        for pixel, index in enumerate(frame_indices.tolist()):
+            y, x = index // 6 + 1, index % 6 + 1
+            expected = (
+                padded[frame, y - 1, x]
+                + padded[frame, y + 1, x]
+                + padded[frame, y, x - 1]
+                + padded[frame, y, x + 1]
+            ) / 4
+            assert torch.isclose(expected, inputs[frame, 0, y - 1, x - 1])
+            assert batch[frame, 0, y - 1, x - 1] == targets[frame, pixel]
+
+
+def test_masked_inputs_are_independent_of_masked_pixels():
+    batch = rand(2, 1, 8, 8)
+    torch.manual_seed(0)
+    inputs, indices, _ = RandomMasking(0.2)(batch)
+    inputs = inputs.clone()
+    altered = batch.clone()
+    altered.view(2, -1).scatter_(1, indices, rand(indices.shape))
+    torch.manual_seed(0)
+    assert (inputs == RandomMasking(0.2)(altered).inputs).all()
+
+
+def test_masking_reuses_buffers():
+    masking = GridMasking(2)
+    first = masking(rand(2, 1, 6, 6))
+    second = masking(rand(2, 1, 6, 6))
+    for before, after in zip(first, second):
+        assert before.data_ptr() == after.data_ptr()
+
+
+def test_masking_config_deserializes():
+    assert isinstance(deserialize(MaskingConfig, {"GridMasking": {}})(), GridMasking)
+    masking = deserialize(MaskingConfig, {"RandomMasking": {"fraction": 0.5}})
+    assert RandomMaskingConfig(0.5) == masking
+    assert GridMaskingConfig(2)().spacing == 2
+
+
+def test_masked_training_step_propagates_gradient(monkeypatch: pytest.MonkeyPatch):
+    network = ScaledGaussianConfig(kernel_half_width=1)()
+    module = Noise2Self(network, [], [], masking=GridMasking(2))  # type: ignore
+    monkeypatch.setattr(module, "log", lambda *args, **kwargs: None)
+    loss = module.training_step(rand(2, 1, 6, 6), 0)
+    loss.backward()
+    assert all(
+        parameter.grad is not None
+        for parameter in module.parameters()
+        if parameter.requires_grad
+    )
@@ -0,0 +1,120 @@
+from pathlib import Path
+
+import pytest
+import torch
+from apischema import deserialize
+from pytorch_lightning import Trainer
+from torch import rand
+
+from ad_denoise.denoise import load_network
+from ad_denoise.lightning_modules import LightningModuleConfig
+from ad_denoise.lightning_modules.masking import GridMasking
+from ad_denoise.lightning_modules.noise2self import ScaledGaussianConfig
+from ad_denoise.lightning_modules.sweep import Noise2SelfSweep, Noise2SelfSweepConfig
+from ad_denoise.loaders import ThreadedDataLoaderConfig
+
+
+def _sweep(**kwargs) -> Noise2SelfSweep:
+    frames = [rand(1, 8, 8) for _ in range(8)]
+    loader = ThreadedDataLoaderConfig(batch_size=4, num_threads=1)
+    return Noise2SelfSweep(
+        {
+            "narrow": ScaledGaussianConfig(kernel_half_width=1)(),
+            "wide": ScaledGaussianConfig(kernel_half_width=2)(),
+        },
+        frames,  # type: ignore
+        [(frame, frame) for frame in frames],  # type: ignore
+        loader,
+        loader,
+        **kwargs,
+    )
+
+
+@pytest.mark.filterwarnings("ignore:.*LeafSpec.*:FutureWarning")
+@pytest.mark.parametrize("masking", [None, GridMasking(2)])
+def test_sweep_trains_each_network_and_logs_losses(
+    tmp_path: Path, masking: GridMasking
+):
+    module = _sweep(masking=masking)
+    before = {name: value.clone() for name, value in module.state_dict().items()}
+    trainer = Trainer(
+        max_epochs=1,
+        accelerator="cpu",
+        default_root_dir=tmp_path,
+        logger=False,
+        enable_checkpointing=False,
+        enable_progress_bar=False,
+        enable_model_summary=False,
+    )
+    trainer.fit(module)
+    for name in ("narrow", "wide"):
+        assert not torch.equal(
+            before[f"networks.{name}.1.stdev"],
+            module.state_dict()[f"networks.{name}.1.stdev"],
+        )
+        assert f"train_loss/{name}" in trainer.callback_metrics
+        assert f"val_loss/{name}" in trainer.callback_metrics
+
+
+@pytest.mark.filterwarnings("ignore:.*LeafSpec.*:FutureWarning")
+def test_sweep_counts_one_step_per_batch(tmp_path: Path):
+    module = _sweep()
+    trainer = Trainer(
+        max_steps=3,
+        accelerator="cpu",
+        default_root_dir=tmp_path,
+        logger=False,
+        enable_checkpointing=False,
+        enable_progress_bar=False,
+        enable_model_summary=False,
+        limit_val_batches=0,
+    )
+    trainer.fit(module)
+    assert 3 == trainer.global_step == trainer.fit_loop.total_batch_idx + 1
+
+
+def test_sweep_requires_networks():
+    with pytest.raises(ValueError):
+        Noise2SelfSweep({}, [], [])  # type: ignore
+
+
+def test_sweep_config_deserializes():
+    dataset = {
+        "data_paths": ["scan.nxs"],
+        "frame_key": "entry/data",
+        "count_times_key": "entry/count_time",
+        "mask_path": "scan.nxs",
+        "mask_key": "entry/mask",
+    }
+    config = deserialize(
+        LightningModuleConfig,
+        {
+            "Noise2SelfSweep": {
+                "networks": {
+                    "narrow": {"Gaussian": {"kernel_half_width": 1}},
+                    "wide": {"Gaussian": {"kernel_half_width": 3}},
+                },
+                "train_dataset": {"Hdf5ADImagesDataset": dataset},
+                "val_dataset": {
+                    "InputTargetDataset": {
+                        "input": {"Hdf5ADImagesDataset": dataset},
+                        "target": {"Hdf5ADImagesDataset": dataset},
+                    }
+                },
+            }
+        },
+    )
+    assert isinstance(config, Noise2SelfSweepConfig)
+    assert ScaledGaussianConfig(3) == config.networks["wide"]
+
+
+def test_load_network_from_sweep_checkpoint(tmp_path: Path):
+    module = _sweep()
+    path = tmp_path.joinpath("sweep.ckpt")
+    torch.save({"state_dict": module.state_dict()}, path)
+    network = load_network(
+        ScaledGaussianConfig(kernel_half_width=2), path, "networks.wide."
+    )
+    assert torch.equal(
+        module.state_dict()["networks.wide.1.stdev"], network.state_dict()["1.stdev"]
+    )
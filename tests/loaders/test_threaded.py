@@ -0,0 +1,54 @@
+from collections import deque
+from time import sleep
+
+from apischema import deserialize
+from torch import Tensor, arange, cat
+
+from ad_denoise.loaders import (
+    DataLoaderConfig,
+    ThreadedDataLoader,
+    ThreadedDataLoaderConfig,
+)
+
+
+def test_threaded_produces_batches_in_order():
+    data = arange(50 * 3).reshape(50, 3)
+    loader = ThreadedDataLoader(list(data), batch_size=8, num_threads=3)
+    batches = [batch.clone() for batch in loader]
+    assert 7 == len(loader) == len(batches)
+    assert (data == cat(batches)).all()
+
+
+def test_threaded_shuffles_all_items():
+    data = arange(50)
+    loader = ThreadedDataLoader(list(data), batch_size=8, shuffle=True)
+    assert (data == cat([batch.clone() for batch in loader]).sort().values).all()
+
+
+def test_threaded_collates_tuples():
+    inputs, targets = arange(20).reshape(10, 2), -arange(20).reshape(10, 2)
+    loader = ThreadedDataLoader(list(zip(inputs, targets)), batch_size=4)
+    for idx, (input, target) in enumerate(loader):
+        assert (inputs[4 * idx : 4 * idx + 4] == input).all()
+        assert (targets[4 * idx : 4 * idx + 4] == target).all()
+
+
+def test_threaded_reuses_buffers_only_once_batches_are_stale():
+    data = arange(64 * 2).reshape(64, 2)
+    prefetch_batches = 4
+    loader = ThreadedDataLoader(
+        list(data), batch_size=2, num_threads=4, prefetch_batches=prefetch_batches
+    )
+    held: deque[tuple[Tensor, Tensor]] = deque(maxlen=prefetch_batches + 2)
+    for batch in loader:
+        held.append((batch, batch.clone()))
+        sleep(0.005)
+        for kept, values in held:
+            assert (kept == values).all()
+
+
+def test_threaded_config_deserializes():
+    config = deserialize(
+        DataLoaderConfig, {"ThreadedDataLoader": {"batch_size": 4, "num_threads": 2}}
+    )
+    assert ThreadedDataLoaderConfig(batch_size=4, num_threads=2) == config
@@ -0,0 +1,49 @@
+import pytest
+import torch
+from apischema import deserialize
+from torch import rand
+
+from ad_denoise.lightning_modules.noise2self import ShiftedBlindSpotConfig
+from ad_denoise.modules.blind_spot import ShiftConv2D, ShiftedBlindSpotNetwork
+from ad_denoise.modules.config import ModuleConfig
+
+
+def _input_gradient(module: torch.nn.Module, shape: tuple[int, int], y: int, x: int):
+    input = rand(1, 1, *shape, dtype=torch.float64, requires_grad=True)
+    module.double()(input)[0, 0, y, x].backward()
+    assert input.grad is not None
+    return input.grad[0, 0]
+
+
+def test_shift_conv_attends_at_or_above():
+    gradient = _input_gradient(ShiftConv2D(1, 1, 2), (9, 9), 4, 4)
+    assert (0 == gradient[5:]).all()
+    assert (0 != gradient[0:5, 2:7]).all()
+
+
+@pytest.mark.parametrize("shape", [(8, 8), (6, 9), (9, 5)])
+def test_blind_spot_network_preserves_shape(shape: tuple[int, int]):
+    network = ShiftedBlindSpotNetwork(channels=4, depth=2)
+    assert (3, 1, *shape) == network(rand(3, 1, *shape)).shape
+
+
+@pytest.mark.parametrize("shape", [(9, 9), (7, 11)])
+def test_blind_spot_network_excludes_centre(shape: tuple[int, int]):
+    torch.manual_seed(0)
+    network = ShiftedBlindSpotNetwork(channels=4, depth=2)
+    y, x = shape[0] // 2, shape[1] // 2
+    gradient = _input_gradient(network, shape, y, x)
+    assert 0 == gradient[y, x]
+    for dy, dx in ((-1, 0), (1, 0), (0, -1), (0, 1), (-2, 2)):
+        assert 0 != gradient[y + dy, x + dx]
+
+
+def test_blind_spot_network_requires_depth():
+    with pytest.raises(ValueError):
+        ShiftedBlindSpotNetwork(depth=0)
+
+
+def test_shifted_blind_spot_config_deserializes():
+    config = deserialize(ModuleConfig, {"ShiftedBlindSpot": {"channels": 8}})
+    assert ShiftedBlindSpotConfig(channels=8) == config
+    assert isinstance(config(), ShiftedBlindSpotNetwork)
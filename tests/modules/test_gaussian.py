@@ -3,7 +3,7 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 from more_itertools import ilen
-from torch import tensor, zeros
+from torch import allclose, no_grad, rand, tensor, zeros
 
 from ad_denoise.modules.gaussian import GaussianKernel2D
 
@@ -36,3 +36,49 @@ def test_gaussian_kernel_generates_random_stdev():
     with patch("ad_denoise.modules.gaussian.rand", mock_rand):
         module = GaussianKernel2D(42)
         assert isclose(3.14, module.stdev.item(), rel_tol=1e-6)
+
+
+@pytest.mark.parametrize(
+    ("stdev", "expected"), [(1.0, 4), (0.1, 1), (2.0, 8), (10.0, 10)]
+)
+def test_gaussian_kernel_truncates_to_tolerance(stdev: float, expected: int):
+    assert expected == GaussianKernel2D(10, stdev, 1e-3).effective_half_width()
+
+
+def test_gaussian_kernel_truncation_preserves_output():
+    input = rand((2, 1, 40, 40))
+    full = GaussianKernel2D(10, 1.5)
+    truncated = GaussianKernel2D(10, 1.5, 1e-6)
+    assert 8 == truncated.effective_half_width()
+    output = truncated(input)
+    assert full(input).shape == output.shape
+    assert allclose(full(input), output, atol=1e-5)
+
+
+def test_gaussian_kernel_caches_truncation():
+    input = rand((1, 1, 30, 30))
+    module = GaussianKernel2D(10, 1.0, 1e-3)
+    with patch.object(
+        GaussianKernel2D,
+        "effective_half_width",
+        autospec=True,
+        side_effect=GaussianKernel2D.effective_half_width,
+    ) as effective_half_width:
+        module(input)
+        with no_grad():
+            module.stdev.fill_(2.0)
+        module(input)
+        assert 1 == effective_half_width.call_count
+        module.eval()
+        module(input)
+        module(input)
+        assert 2 == effective_half_width.call_count
+        with no_grad():
+            module.stdev.fill_(1.0)
+        module(input)
+        assert 3 == effective_half_width.call_count
+
+
+def test_gaussian_kernel_rejects_invalid_tolerance():
+    with pytest.raises(ValueError):
+        GaussianKernel2D(3, 1.0, 1.5)
@@ -1,9 +1,9 @@
 from typing import Iterable
 
 import pytest
-from torch import Tensor
+from torch import Tensor, arange, equal, rand, roll
 
-from ad_denoise.modules.shift import Shift
+from ad_denoise.modules.shift import MultiShift, Shift
 
 
 @pytest.mark.parametrize(
@@ -34,3 +34,45 @@ from ad_denoise.modules.shift import Shift
 def test_shift(input: Tensor, dim_shifts: Iterable[tuple[int, int]], expected: Tensor):
     shift_module = Shift(dim_shifts)
     assert (expected == shift_module.forward(input)).all()
+
+
+@pytest.mark.parametrize(
+    "dim_shifts",
+    [[(2, 3)], [(3, -2)], [(2, 3), (3, -2)], [(-1, 1), (-2, -1)], [(2, 7)], [(3, -9)]],
+)
+def test_shift_matches_roll(dim_shifts: list[tuple[int, int]]):
+    input = rand(2, 1, 6, 5)
+    expected = roll(
+        input, [shift for _, shift in dim_shifts], [d for d, _ in dim_shifts]
+    )
+    for dim, shift in dim_shifts:
+        index = arange(input.shape[dim]) - shift
+        valid = (index >= 0) & (index < input.shape[dim])
+        shape = [1] * input.dim()
+        shape[dim] = -1
+        expected = expected * valid.reshape(shape)
+    assert equal(expected, Shift(dim_shifts)(input))
+
+
+def test_shift_does_not_modify_input():
+    input = rand(1, 1, 4, 4)
+    original = input.clone()
+    Shift([(2, 1), (3, -1)])(input)
+    assert equal(original, input)
+
+
+def test_shift_propagates_gradient():
+    input = rand(1, 1, 4, 4, requires_grad=True)
+    Shift([(2, 1)])(input).sum().backward()
+    assert input.grad is not None
+    assert equal(Tensor([1, 1, 1, 0]).expand(4, 4).T, input.grad[0, 0])
+
+
+@pytest.mark.parametrize("dim", [0, 2, -1])
+def test_multi_shift_stacks_shifts(dim: int):
+    input = rand(2, 1, 5, 5)
+    dim_shifts = [[(2, 1)], [(3, -1)], [(2, -2), (3, 2)]]
+    output = MultiShift(dim_shifts, dim)(input)
+    assert 3 == output.shape[dim]
+    for idx, shifts in enumerate(dim_shifts):
+        assert equal(Shift(shifts)(input), output.select(dim, idx))
@@ -1,6 +1,8 @@
 import subprocess
 import sys
 
+import pytest
+
 from ad_denoise import __version__
 
 
@@ -27,3 +29,27 @@ def test_cli_noargs_shows_help():
         .strip()
         .startswith("Usage: python -m ad_denoise")
     )
+
+
+#: Modules which are slow to import and must not be imported by lightweight commands.
+HEAVY_MODULES = ("torch", "pytorch_lightning", "h5py", "hdf5plugin")
+
+
+def _import_times(*args: str) -> dict[str, int]:
+    cmd = [sys.executable, "-X", "importtime", "-m", "ad_denoise", *args]
+    stderr = subprocess.run(cmd, capture_output=True, check=True).stderr.decode()
+    return {
+        line.split("|")[2].strip(): int(line.split("|")[1])
+        for line in stderr.splitlines()
+        if line.startswith("import time:") and line.split("|")[1].strip().isdigit()
+    }
+
+
+@pytest.mark.parametrize("args", [("--version",), ("--help",), ("train", "--help")])
+def test_cli_does_not_import_heavy_modules(args: tuple[str, ...]):
+    import_times = _import_times(*args)
+    assert not set(HEAVY_MODULES).intersection(import_times)
+
+
+def test_cli_import_time_within_budget():
+    assert _import_times("--version")["ad_denoise.cli"] < 1_000_000
@@ -0,0 +1,66 @@
+from pathlib import Path
+
+import pytest
+from h5py import File
+from numpy import float32, ones, zeros
+from numpy.random import randint
+
+from ad_denoise.bench import bench, with_loader
+from ad_denoise.datasets.area_detector import Hdf5ADImagesDatasetConfig
+from ad_denoise.datasets.collated import InputTargetDatasetConfig
+from ad_denoise.datasets.hdf5 import H5Key, H5Path
+from ad_denoise.lightning_modules.noise2self import (
+    Noise2SelfConfig,
+    ScaledGaussianConfig,
+)
+from ad_denoise.loaders import ProcessDataLoaderConfig, ThreadedDataLoaderConfig
+from ad_denoise.train import TrainConfig
+
+
+def _train_config(path: H5Path) -> TrainConfig:
+    with File(path, "w") as file:
+        file["entry/data"] = randint(100, size=(8, 8, 8))
+        file["entry/count_time"] = ones((8,), dtype=float32)
+        file["entry/mask"] = zeros((8, 8), dtype=float32)
+    dataset = Hdf5ADImagesDatasetConfig(
+        [path],
+        H5Key("entry/data"),
+        H5Key("entry/count_time"),
+        path,
+        H5Key("entry/mask"),
+    )
+    return TrainConfig(
+        "bench",
+        Noise2SelfConfig(
+            ScaledGaussianConfig(1),
+            dataset,
+            InputTargetDatasetConfig(dataset, dataset),
+            train_loader=ThreadedDataLoaderConfig(batch_size=4, num_threads=1),
+        ),
+        1,
+    )
+
+
+@pytest.mark.filterwarnings("ignore:.*LeafSpec.*:FutureWarning")
+def test_bench_times_steps(tmp_path: Path):
+    config = _train_config(H5Path(tmp_path.joinpath("scan.nxs")))
+    result = bench(config, steps=3, warmup=1, batch_size=2)
+    assert 3 == result.steps
+    assert 6 == result.samples
+    assert 6 * 8 * 8 == result.pixels
+    assert result.compute_seconds > 0
+    assert result.peak_rss_bytes > 0
+
+
+def test_with_loader_replaces_batch_size_and_workers(tmp_path: Path):
+    config = _train_config(H5Path(tmp_path.joinpath("scan.nxs")))
+    config.model.train_loader = ProcessDataLoaderConfig()  # type: ignore
+    swept = with_loader(config, 16, 3)
+    assert ProcessDataLoaderConfig(16, 3) == swept.model.train_loader  # type: ignore
+    assert ProcessDataLoaderConfig() == config.model.train_loader  # type: ignore
+
+
+def test_with_loader_requires_train_loader():
+    config = TrainConfig("bench", object(), 1)  # type: ignore
+    with pytest.raises(ValueError):
+        with_loader(config, 16, None)
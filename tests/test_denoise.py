@@ -0,0 +1,137 @@
+from os import utime
+from pathlib import Path
+
+import pytest
+import torch
+from h5py import File
+from numpy import float32, ones, zeros
+from numpy.random import rand
+from numpy.testing import assert_allclose
+from torch import inference_mode
+
+from ad_denoise.datasets.chunks import ZSTD_ID
+from ad_denoise.datasets.hdf5 import H5Key, H5Path, SimpleHdf5DatasetConfig
+from ad_denoise.datasets.utils import Dim
+from ad_denoise.denoise import DenoiseConfig, denoise, load_network
+from ad_denoise.lightning_modules.noise2self import ScaledGaussianConfig
+
+
+def _denoise_config(tmp_path: Path) -> DenoiseConfig:
+    paths = []
+    for idx, frames in enumerate((7, 5)):
+        paths.append(H5Path(tmp_path.joinpath(f"scan{idx}.h5")))
+        with File(paths[-1], "w") as file:
+            file["data"] = rand(frames, 6, 6).astype(float32)
+    network = ScaledGaussianConfig(kernel_half_width=1)
+    state = network().state_dict()
+    state["2.scalar"].fill_(2.0)
+    checkpoint = tmp_path.joinpath("model.ckpt")
+    torch.save(
+        {"state_dict": {f"network.{name}": value for name, value in state.items()}},
+        checkpoint,
+    )
+    return DenoiseConfig(
+        network=network,
+        checkpoint=checkpoint,
+        dataset=SimpleHdf5DatasetConfig(paths, H5Key("data"), Dim(2)),
+        output=tmp_path.joinpath("denoised.h5"),
+        shard_frames=4,
+        batch_size=3,
+    )
+
+
+def test_load_network_restores_parameters(tmp_path: Path):
+    config = _denoise_config(tmp_path)
+    network = load_network(config.network, config.checkpoint)
+    assert 2.0 == network.state_dict()["2.scalar"].item()
+
+
+def test_denoise_stitches_shards(tmp_path: Path):
+    config = _denoise_config(tmp_path)
+    paths = denoise(config, processes=2)
+    assert 4 == len(paths)
+    network = load_network(config.network, config.checkpoint)
+    with File(config.output) as output:
+        assert output["data"].is_virtual
+        denoised = output["data"][()]
+    frames = config.dataset()
+    with inference_mode():
+        for idx, result in enumerate(denoised):
+            expected = network(frames[idx][None])[0, 0].numpy()
+            assert_allclose(expected, result, rtol=1e-6)
+
+
+def test_denoise_resumes_from_existing_shards(tmp_path: Path):
+    config = _denoise_config(tmp_path)
+    paths = denoise(config, processes=1)
+    paths[1].unlink()
+    completed: list[Path] = []
+    assert paths == denoise(config, processes=1, on_shard=completed.append)
+    assert [paths[1]] == completed
+    with File(config.output) as output:
+        assert (12, 6, 6) == output["data"].shape
+
+
+def test_denoise_repeats_shards_of_changed_configuration(tmp_path: Path):
+    config = _denoise_config(tmp_path)
+    paths = denoise(config, processes=1)
+    completed: list[Path] = []
+    config.batch_size = 2
+    denoise(config, processes=1, on_shard=completed.append)
+    assert [] == completed
+    utime(config.checkpoint, ns=(0, 0))
+    denoise(config, processes=1, on_shard=completed.append)
+    assert sorted(paths) == sorted(completed)
+    completed.clear()
+    config.scale = 1e-3
+    denoise(config, processes=1, on_shard=completed.append)
+    assert sorted(paths) == sorted(completed)
+
+
+def test_denoise_repeats_shards_of_replaced_frames(tmp_path: Path):
+    config = _denoise_config(tmp_path)
+    paths = denoise(config, processes=1)
+    source = config.dataset.paths[1]  # type: ignore
+    with File(source, "w") as file:
+        file["data"] = rand(5, 6, 6).astype(float32)
+    utime(source, ns=(0, 0))
+    completed: list[Path] = []
+    denoise(config, processes=1, on_shard=completed.append)
+    assert sorted(paths) == sorted(completed)
+
+
+def test_denoise_rejects_empty_dataset(tmp_path: Path):
+    config = _denoise_config(tmp_path)
+    source = H5Path(tmp_path.joinpath("empty.h5"))
+    with File(source, "w") as file:
+        file["data"] = zeros((0, 6, 6), dtype=float32)
+    config.dataset = SimpleHdf5DatasetConfig([source], H5Key("data"), Dim(2))
+    with pytest.raises(ValueError, match="no frames"):
+        denoise(config, processes=1)
+
+
+def test_denoise_compresses_scaled_frames_into_structure(tmp_path: Path):
+    config = _denoise_config(tmp_path)
+    structure = H5Path(tmp_path.joinpath("scan.nxs"))
+    with File(structure, "w") as file:
+        file["entry/data"] = zeros((12, 6, 6), dtype=float32)
+        file["entry/count_time"] = ones((12,), dtype=float32)
+        file["entry"].attrs["NX_class"] = "NXentry"
+    config.key = H5Key("entry/data")
+    config.compression = "zstd"
+    config.scale = 1e-3
+    config.structure = structure
+    paths = denoise(config, processes=1)
+    with File(paths[0]) as shard:
+        assert str(ZSTD_ID) in shard["entry/data"]._filters
+    network = load_network(config.network, config.checkpoint)
+    frames = config.dataset()
+    with File(config.output) as output:
+        assert "NXentry" == output["entry"].attrs["NX_class"]
+        assert (12,) == output["entry/count_time"].shape
+        scale = output["entry/data"].attrs["scale_factor"]
+        denoised = scale * output["entry/data"][()]
+    with inference_mode():
+        for idx, result in enumerate(denoised):
+            expected = network(frames[idx][None])[0, 0].numpy()
+            assert_allclose(expected, result, atol=scale)
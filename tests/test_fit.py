@@ -0,0 +1,121 @@
+from math import isclose
+from pathlib import Path
+
+import pytest
+import torch
+from h5py import File
+from numpy import float32, ones, zeros
+from numpy.random import poisson
+from torch import rand
+from torch.nn.functional import conv2d, mse_loss, pad
+
+from ad_denoise.datasets.area_detector import Hdf5ADImagesDatasetConfig
+from ad_denoise.datasets.hdf5 import H5Key, H5Path
+from ad_denoise.denoise import load_network
+from ad_denoise.fit import (
+    AutocorrelationStatistics,
+    accumulate,
+    fit,
+    fit_gaussian,
+    golden_section,
+)
+from ad_denoise.lightning_modules.noise2self import (
+    Noise2SelfConfig,
+    ScaledGaussianConfig,
+)
+from ad_denoise.loaders import ThreadedDataLoaderConfig
+from ad_denoise.modules.gaussian import BlindGaussianKernel2D
+from ad_denoise.train import TrainConfig
+
+
+def test_autocorrelation_statistics_match_direct_sums():
+    frames = rand(3, 1, 7, 9, dtype=torch.float64)
+    statistics = accumulate([frames[:2], frames[2:]], 2)
+    padded = pad(frames[:, 0], (2, 2, 2, 2))
+    for dy in range(-2, 3):
+        for dx in range(-2, 3):
+            shifted = padded[:, 2 + dy : 9 + dy, 2 + dx : 11 + dx]
+            expected = (frames[:, 0] * shifted).sum()
+            assert isclose(expected, statistics.sums[2 + dy, 2 + dx], rel_tol=1e-9)
+    assert 3 * 7 * 9 == statistics.pixels
+
+
+def test_autocorrelation_statistics_give_mean_squared_error():
+    frames = torch.zeros((4, 1, 16, 16), dtype=torch.float64)
+    frames[:, :, 4:-4, 4:-4] = rand(4, 1, 8, 8, dtype=torch.float64)
+    statistics = AutocorrelationStatistics(4)
+    statistics.update(frames)
+    kernel = BlindGaussianKernel2D(2, 0.8)._build_kernel().detach().double()
+    scalar, loss = statistics(kernel)
+    outputs = scalar * conv2d(pad(frames, (2, 2, 2, 2)), kernel)
+    assert isclose(mse_loss(outputs, frames).item(), loss, rel_tol=1e-9)
+
+
+def test_golden_section_finds_minimum():
+    assert isclose(1.3, golden_section(lambda x: (x - 1.3) ** 2, -5, 5, 1e-8))
+
+
+def test_fit_gaussian_minimises_loss():
+    frames = rand(8, 1, 32, 32, dtype=torch.float64)
+    statistics = accumulate([frames], 4)
+    result = fit_gaussian(statistics, 2)
+    module = BlindGaussianKernel2D(2, 1.0)
+    for stdev in (0.9 * result.stdev, 1.1 * result.stdev):
+        with torch.no_grad():
+            module.stdev.fill_(stdev)
+            assert result.loss <= statistics(module._build_kernel())[1]
+
+
+def test_fit_gaussian_truncates_kernel_to_tolerance():
+    frames = rand(8, 1, 32, 32, dtype=torch.float64)
+    statistics = accumulate([frames], 8)
+    result = fit_gaussian(statistics, 4, tolerance=0.1)
+    module = BlindGaussianKernel2D(4, result.stdev, 0.1)
+    assert 4 > module.effective_half_width()
+    with torch.no_grad():
+        kernel = module._build_kernel(module.effective_half_width())
+        assert isclose(result.loss, statistics(kernel)[1])
+
+
+def test_fit_gaussian_requires_twice_half_width():
+    with pytest.raises(ValueError):
+        fit_gaussian(AutocorrelationStatistics(3), 2)
+
+
+def test_fit_saves_loadable_checkpoint(tmp_path: Path):
+    path = H5Path(tmp_path.joinpath("scan.h5"))
+    with File(path, "w") as file:
+        file["entry/data"] = poisson(10.0, size=(6, 16, 16))
+        file["entry/count_time"] = ones((6,), dtype=float32)
+        file["entry/mask"] = zeros((16, 16), dtype=float32)
+    dataset = Hdf5ADImagesDatasetConfig(
+        data_paths=[path],
+        frame_key=H5Key("entry/data"),
+        count_times_key=H5Key("entry/count_time"),
+        mask_path=path,
+        mask_key=H5Key("entry/mask"),
+    )
+    network = ScaledGaussianConfig(kernel_half_width=2, blind=True)
+    config = TrainConfig(
+        name="fit",
+        model=Noise2SelfConfig(
+            network=network,
+            train_dataset=dataset,
+            val_dataset=dataset,  # type: ignore
+            train_loader=ThreadedDataLoaderConfig(batch_size=4, num_threads=1),
+        ),
+        max_epochs=1,
+    )
+    output = tmp_path.joinpath("fit", "fit.ckpt")
+    result = fit(config, output)
+    module = load_network(network, output)
+    assert isclose(result.stdev, module.state_dict()["1.stdev"].item(), rel_tol=1e-6)
+    assert isclose(result.scalar, module.state_dict()["2.scalar"].item(), rel_tol=1e-6)
+    items = dataset()
+    frames = torch.stack([items[idx] for idx in range(len(items))])
+    kernel = BlindGaussianKernel2D(2, result.stdev)._build_kernel().detach()
+    expected = result.scalar * conv2d(pad(frames, (2, 2, 2, 2)), kernel)
+    with torch.no_grad():
+        outputs = module(frames)
+    assert torch.allclose(expected, outputs, rtol=1e-4, atol=1e-6)
+    assert isclose(frames.mean().item(), outputs.mean().item(), rel_tol=0.2)
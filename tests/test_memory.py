@@ -0,0 +1,96 @@
+from multiprocessing import get_context
+from pathlib import Path
+from threading import Thread
+from typing import Iterator
+
+import pytest
+from h5py import File
+from numpy import float32, ones, zeros
+from numpy.random import randint
+from torch import rand
+from torch.nn import Conv2d, ReLU, Sequential
+
+from ad_denoise import memory
+from ad_denoise.datasets.area_detector import Hdf5ADImagesDataset
+from ad_denoise.datasets.hdf5 import H5Key, H5Path, SimpleHdf5
+from ad_denoise.memory import (
+    ActivationTracker,
+    Component,
+    dataset_memory,
+    disable_memory_tracking,
+    enable_memory_tracking,
+    nbytes,
+    read_memory,
+    report_memory,
+)
+
+
+@pytest.fixture
+def tracking() -> Iterator[None]:
+    enable_memory_tracking(3)
+    yield
+    disable_memory_tracking()
+
+
+def test_nbytes_counts_shared_tensors_once():
+    tensor = rand((4, 4))
+    assert 64 == nbytes([tensor, (tensor, {"a": tensor})])
+
+
+def test_dataset_memory_accounts_frame_cache_and_mask(tmp_path: Path):
+    path = H5Path(tmp_path.joinpath("scan.nxs"))
+    with File(path, "w") as file:
+        file.create_dataset("entry/data", data=randint(100, size=(4, 8, 8)))
+        file["entry/count_time"] = ones((4,), dtype=float32)
+        file["entry/mask"] = zeros((8, 8), dtype=float32)
+    SimpleHdf5._shared.clear()
+    dataset = Hdf5ADImagesDataset(
+        [path],
+        H5Key("entry/data"),
+        H5Key("entry/count_time"),
+        path,
+        H5Key("entry/mask"),
+    )
+    dataset[0]
+    usage = dataset_memory(dataset, dataset)
+    assert 8 * 8 * 4 == usage[Component.MASK]
+    assert 0 == usage[Component.FRAME_CACHE]
+
+
+def _report_worker() -> None:
+    report_memory(2, {Component.RSS: 7, Component.BATCH: 3})
+
+
+def test_reports_aggregate_across_forked_processes(tracking: None):
+    report_memory(0, {Component.RSS: 5})
+    process = get_context("fork").Process(target=_report_worker)
+    process.start()
+    process.join()
+    usage = read_memory()
+    assert [0, 2] == sorted(usage)
+    assert 5 == usage[0][Component.RSS]
+    assert 3 == usage[2][Component.BATCH]
+
+
+def test_reports_beyond_slots_are_discarded(tracking: None):
+    report_memory(3, {Component.RSS: 5})
+    assert {} == read_memory()
+
+
+def test_activation_tracker_records_leaf_outputs():
+    network = Sequential(Conv2d(1, 2, 3), ReLU())
+    tracker = ActivationTracker(network)
+    network(rand((1, 1, 10, 10)))
+    assert {"0": 2 * 8 * 8 * 4, "1": 2 * 8 * 8 * 4} == tracker.usage
+    tracker.remove()
+    network(rand((1, 1, 20, 20)))
+    assert 2 * 2 * 8 * 8 * 4 == tracker.total
+
+
+def test_periodic_reports_stop_once_tracking_is_disabled(tracking: None):
+    stop = memory._stop
+    thread = Thread(target=memory._report_periodically, args=(1, None, 0.01, stop))
+    thread.start()
+    disable_memory_tracking()
+    thread.join(timeout=5)
+    assert not thread.is_alive()
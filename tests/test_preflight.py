@@ -0,0 +1,78 @@
+from pathlib import Path
+
+import pytest
+from h5py import File
+from numpy import float32, ones, uint16, zeros
+from numpy.random import randint
+
+from ad_denoise.datasets.area_detector import Hdf5ADImagesDatasetConfig
+from ad_denoise.datasets.collated import InputTargetDatasetConfig
+from ad_denoise.datasets.hdf5 import H5Key, H5Path
+from ad_denoise.lightning_modules.noise2self import (
+    Noise2SelfConfig,
+    ScaledGaussianConfig,
+)
+from ad_denoise.loaders import ProcessDataLoaderConfig, ThreadedDataLoaderConfig
+from ad_denoise.preflight import estimate_memory, peak_processes
+from ad_denoise.train import TrainConfig
+
+
+def test_estimate_memory_scales_with_workers_and_batch(tmp_path: Path):
+    path = H5Path(tmp_path.joinpath("scan.nxs"))
+    with File(path, "w") as file:
+        file.create_dataset(
+            "entry/data",
+            data=randint(100, size=(4, 16, 16)).astype(uint16),
+            chunks=(1, 16, 16),
+        )
+        file["entry/count_time"] = ones((4,), dtype=float32)
+        file["entry/mask"] = zeros((16, 16), dtype=float32)
+    dataset = Hdf5ADImagesDatasetConfig(
+        [path],
+        H5Key("entry/data"),
+        H5Key("entry/count_time"),
+        path,
+        H5Key("entry/mask"),
+        direct=True,
+    )
+    estimate = estimate_memory(
+        TrainConfig(
+            "preflight",
+            Noise2SelfConfig(
+                ScaledGaussianConfig(1),
+                dataset,
+                InputTargetDatasetConfig(dataset, dataset),
+                ProcessDataLoaderConfig(batch_size=4, num_workers=3),
+                ThreadedDataLoaderConfig(batch_size=2, prefetch_batches=1),
+            ),
+            1,
+        )
+    )
+    frame = 16 * 16 * 4
+    assert 4 == estimate.processes
+    assert 4 * frame == estimate.components["masks"]
+    assert 4 * 16 * 16 * 2 == estimate.components["hdf5_chunk_caches"]
+    assert 4 * 16 * 16 * 16 * 2 == estimate.components["direct_chunk_caches"]
+    assert (4 * 7 + 2 * 2 * 3) * frame == estimate.components["batches"]
+    assert 4 * (18 * 18 + 2 * 16 * 16) * 4 == estimate.components["activations"]
+    assert estimate.total == sum(estimate.components.values())
+
+
+def test_estimate_memory_requires_area_detector_dataset():
+    with pytest.raises(ValueError):
+        estimate_memory(TrainConfig("preflight", object(), 1))  # type: ignore
+
+
+@pytest.mark.parametrize("persistent, processes", [(False, 4), (True, 6)])
+def test_peak_processes_counts_persistent_workers_at_once(
+    persistent: bool, processes: int
+):
+    model = Noise2SelfConfig(
+        ScaledGaussianConfig(1),
+        None,  # type: ignore
+        None,  # type: ignore
+        ProcessDataLoaderConfig(num_workers=3, persistent_workers=persistent),
+        ProcessDataLoaderConfig(num_workers=2),
+    )
+    assert processes == peak_processes(model)
+    assert 1 == peak_processes(object())
@@ -0,0 +1,118 @@
+from pathlib import Path
+
+import pytest
+import torch
+from h5py import File
+from numpy import float32, ones, zeros
+from numpy.random import poisson
+from torch import inference_mode, rand
+from torch.nn import Conv2d, ReLU, Sequential, ZeroPad2d
+
+from ad_denoise.datasets.area_detector import Hdf5ADImagesDatasetConfig
+from ad_denoise.datasets.collated import InputTargetDatasetConfig
+from ad_denoise.datasets.hdf5 import H5Key, H5Path
+from ad_denoise.lightning_modules.noise2self import (
+    Noise2SelfConfig,
+    ScaledGaussianConfig,
+)
+from ad_denoise.loaders import ThreadedDataLoaderConfig
+from ad_denoise.modules import GaussianKernel2D, ScalarMultiply
+from ad_denoise.modules.blind_conv import BlindConv2D
+from ad_denoise.modules.blind_spot import ShiftedBlindSpotNetwork
+from ad_denoise.modules.gaussian import BlindGaussianKernel2D
+from ad_denoise.quantize import (
+    compare_networks,
+    fold_network,
+    quantize,
+    quantize_network,
+)
+from ad_denoise.train import TrainConfig
+
+# Eager mode quantization and TorchScript are deprecated in favour of torchao, which is
+# not a dependency
+pytestmark = pytest.mark.filterwarnings(
+    "ignore::DeprecationWarning", "ignore::FutureWarning", "ignore::UserWarning"
+)
+
+
+@pytest.mark.parametrize(
+    "network",
+    [
+        Sequential(ZeroPad2d(3), GaussianKernel2D(3, 0.8), ScalarMultiply(1.5)),
+        Sequential(ZeroPad2d(5), GaussianKernel2D(5, 0.8, tolerance=1e-2)),
+        Sequential(GaussianKernel2D(4, 0.7, tolerance=1e-2), ScalarMultiply(0.5)),
+        Sequential(ZeroPad2d(2), BlindGaussianKernel2D(2, 1.2)),
+        Sequential(ZeroPad2d(1), BlindConv2D(1, 2, 1), ReLU(), Conv2d(2, 1, 3)),
+    ],
+)
+def test_fold_network_is_equivalent(network: torch.nn.Module):
+    frames = rand(2, 1, 16, 16)
+    with inference_mode():
+        expected = network(frames)
+        folded = fold_network(network)(frames)
+    assert expected.shape == folded.shape
+    assert torch.allclose(expected, folded, atol=1e-6)
+
+
+def test_fold_network_rejects_unsupported_modules():
+    with pytest.raises(ValueError):
+        fold_network(ShiftedBlindSpotNetwork(channels=2, depth=1))
+
+
+def test_quantized_network_approximates_float():
+    network = Sequential(ZeroPad2d(2), GaussianKernel2D(2, 1.0), ScalarMultiply(2.0))
+    frames = 10 * rand(4, 1, 32, 32)
+    quantized = quantize_network(network, [frames[:2]])
+    report = compare_networks(network, quantized, [(frames[2:], frames[2:])])
+    assert report.max_error < 0.1 * network(frames[2:]).max().item()
+    assert report.psnr > 30
+    assert report.quantized_loss == pytest.approx(report.float_loss, rel=0.1)
+
+
+def test_compare_networks_requires_batches():
+    network = Sequential(GaussianKernel2D(1, 1.0))
+    with pytest.raises(ValueError):
+        compare_networks(network, network, [])
+
+
+def test_quantize_saves_torchscript(tmp_path: Path):
+    path = H5Path(tmp_path.joinpath("scan.h5"))
+    with File(path, "w") as file:
+        file["entry/data"] = poisson(10.0, size=(12, 16, 16))
+        file["entry/count_time"] = ones((12,), dtype=float32)
+        file["entry/mask"] = zeros((16, 16), dtype=float32)
+    dataset = Hdf5ADImagesDatasetConfig(
+        [path],
+        H5Key("entry/data"),
+        H5Key("entry/count_time"),
+        path,
+        H5Key("entry/mask"),
+    )
+    network = ScaledGaussianConfig(kernel_half_width=2)
+    config = TrainConfig(
+        "quantize",
+        Noise2SelfConfig(
+            network,
+            dataset,
+            InputTargetDatasetConfig(dataset, dataset),
+            train_loader=ThreadedDataLoaderConfig(batch_size=4, num_threads=1),
+        ),
+        1,
+    )
+    checkpoint = tmp_path.joinpath("model.ckpt")
+    torch.save(
+        {
+            "state_dict": {
+                f"network.{name}": value
+                for name, value in network().state_dict().items()
+            }
+        },
+        checkpoint,
+    )
+    output = tmp_path.joinpath("model.int8.pt")
+    report = quantize(config, checkpoint, output, frames=8, batch_size=4)
+    assert report.psnr > 30
+    loaded = torch.jit.load(str(output))
+    frames = config.model.train_dataset()[0][None]  # type: ignore
+    with inference_mode():
+        assert (1, 1, 16, 16) == loaded(frames).shape
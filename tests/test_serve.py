@@ -0,0 +1,162 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from threading import Thread
+from typing import Iterator
+
+import pytest
+import torch
+from numpy import float32, uint32
+from numpy.random import rand, randint
+from numpy.testing import assert_allclose
+from torch import Tensor, from_numpy, inference_mode
+
+from ad_denoise.denoise import load_network
+from ad_denoise.lightning_modules.noise2self import ScaledGaussianConfig
+from ad_denoise.serve import (
+    DenoiseClient,
+    DenoiseServer,
+    DynamicBatcher,
+    ServeConfig,
+    create_server,
+    decode_frame,
+)
+
+
+@pytest.fixture
+def config(tmp_path: Path) -> ServeConfig:
+    network = ScaledGaussianConfig(kernel_half_width=1)
+    checkpoint = tmp_path.joinpath("model.ckpt")
+    torch.save(
+        {
+            "state_dict": {
+                f"network.{name}": value
+                for name, value in network().state_dict().items()
+            }
+        },
+        checkpoint,
+    )
+    return ServeConfig(network, checkpoint, port=0, max_delay_ms=200.0)
+
+
+@pytest.fixture
+def server(config: ServeConfig) -> Iterator[DenoiseServer]:
+    server = create_server(config)
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    server.batcher.close()
+
+
+def test_decode_frame_shares_float_bytes():
+    frame = rand(4, 6).astype(float32)
+    body = bytearray(frame.tobytes())
+    tensor = decode_frame(body, "4,6", "<f4")
+    body[:4] = bytearray(4)
+    assert 0.0 == tensor[0, 0].item()
+    assert (from_numpy(frame[1:]) == tensor[1:]).all()
+
+
+def test_decode_frame_rejects_mismatched_length():
+    with pytest.raises(ValueError):
+        decode_frame(bytearray(8), "4,6", "<f4")
+
+
+def test_dynamic_batcher_batches_concurrent_frames(config: ServeConfig):
+    network = load_network(config.network, config.checkpoint)
+    batcher = DynamicBatcher(network, max_batch_size=4, max_delay=1.0)
+    frames = [from_numpy(rand(5, 5).astype(float32)) for _ in range(8)]
+    futures = [batcher.submit(frame) for frame in frames]
+    with inference_mode():
+        for frame, future in zip(frames, futures):
+            expected = network(frame[None, None])[0, 0]
+            assert_allclose(expected.numpy(), future.result().numpy(), rtol=1e-6)
+    batcher.close()
+    assert {"requests": 8, "batches": 2} == {
+        name: value
+        for name, value in batcher.metrics.snapshot().items()
+        if name in ("requests", "batches")
+    }
+
+
+def test_dynamic_batcher_separates_shapes(config: ServeConfig):
+    network = load_network(config.network, config.checkpoint)
+    batcher = DynamicBatcher(network, max_batch_size=4, max_delay=0.1)
+    futures = [batcher.submit(torch.rand(size, size)) for size in (4, 5, 4, 5)]
+    assert [(4, 4), (5, 5), (4, 4), (5, 5)] == [
+        tuple(future.result().shape) for future in futures
+    ]
+    batcher.close()
+    assert 2 == batcher.metrics.batches
+
+
+def test_server_denoises_concurrent_requests(server: DenoiseServer):
+    host, port = server.server_address[:2]
+    frames = [randint(1000, size=(8, 8)).astype(uint32) for _ in range(6)]
+
+    def request(frame):
+        client = DenoiseClient(str(host), port, timeout=30)
+        try:
+            return client(frame)
+        finally:
+            client.close()
+
+    with ThreadPoolExecutor(len(frames)) as executor:
+        outputs = list(executor.map(request, frames))
+    with inference_mode():
+        for frame, output in zip(frames, outputs):
+            tensor = from_numpy(frame.astype(float32))[None, None]
+            expected = server.batcher.network(tensor)[0, 0].numpy()
+            assert_allclose(expected, output, rtol=1e-6)
+    client = DenoiseClient(str(host), port, timeout=30)
+    metrics = client.metrics()
+    client.close()
+    assert 6 == metrics["requests"]
+    assert metrics["batches"] < 6
+
+
+def test_server_rejects_missing_headers(server: DenoiseServer):
+    host, port = server.server_address[:2]
+    client = DenoiseClient(str(host), port, timeout=30)
+    client.connection.request("POST", "/denoise", b"1234")
+    response = client.connection.getresponse()
+    response.read()
+    client.close()
+    assert 400 == response.status
+
+
+@pytest.mark.parametrize(
+    "shape, dtype, body",
+    [
+        ("2,2,2", "<f4", bytes(32)),
+        ("2,2", "<U1", bytes(16)),
+        ("2,x", "<f4", bytes(16)),
+        ("2,2", "<f4", bytes(15)),
+    ],
+    ids=["three_dimensional", "string_dtype", "invalid_shape", "short_body"],
+)
+def test_server_rejects_malformed_frames(
+    server: DenoiseServer, shape: str, dtype: str, body: bytes
+):
+    host, port = server.server_address[:2]
+    client = DenoiseClient(str(host), port, timeout=30)
+    client.connection.request(
+        "POST", "/denoise", body, {"X-Shape": shape, "X-Dtype": dtype}
+    )
+    response = client.connection.getresponse()
+    response.read()
+    client.close()
+    assert 400 == response.status
+
+
+def test_server_reports_failure_to_denoise(server: DenoiseServer):
+    def fail(batch: Tensor) -> Tensor:
+        raise RuntimeError("Broken network")
+
+    server.batcher.network = fail  # type: ignore
+    host, port = server.server_address[:2]
+    client = DenoiseClient(str(host), port, timeout=30)
+    with pytest.raises(RuntimeError, match="Broken network"):
+        client(rand(4, 4).astype(float32))
+    client.close()
@@ -0,0 +1,88 @@
+from pathlib import Path
+
+import pytest
+import torch
+from h5py import File
+from numpy import concatenate, float32, full, int64
+from numpy.random import rand
+from numpy.testing import assert_allclose, assert_array_equal
+
+from ad_denoise.datasets.hdf5 import H5Key, H5Path, SimpleHdf5DatasetConfig
+from ad_denoise.datasets.utils import Dim
+from ad_denoise.stats import DatasetStatistics, StatsConfig, compute_statistics
+
+
+def test_merged_statistics_match_whole():
+    frames = torch.rand(10, 4, 5, dtype=torch.float64) * 10
+    whole = DatasetStatistics(0.0, 8.0, 16)
+    whole.update(frames)
+    parts = [DatasetStatistics(0.0, 8.0, 16) for _ in range(3)]
+    parts[0].update(frames[:3])
+    parts[1].update(frames[3:4])
+    parts[1].update(frames[4:7])
+    parts[2].update(frames[7:])
+    merged = parts[2].merge(parts[0]).merge(DatasetStatistics(0.0, 8.0, 16))
+    merged.merge(parts[1])
+    assert 10 == merged.frames
+    assert whole.mean is not None and merged.mean is not None
+    assert torch.allclose(frames.mean(dim=0), merged.mean)
+    assert torch.allclose(frames.var(dim=0, unbiased=False), merged.variance)
+    assert torch.equal(whole.histogram, merged.histogram)
+    assert frames.max().item() == merged.maximum
+    assert int((frames > 8.0).sum()) == merged.overflow
+
+
+def test_count_times_are_counted_by_value():
+    statistics = DatasetStatistics(0.0, 1.0, 4)
+    statistics.update(torch.rand(4, 2, 2), torch.tensor([0.1, 0.2, 0.1, 0.1]))
+    other = DatasetStatistics(0.0, 1.0, 4)
+    other.update(torch.rand(2, 2, 2), torch.tensor([0.5, 0.2]))
+    statistics.merge(other)
+    assert [0.1, 0.2, 0.5] == pytest.approx(statistics.count_times.tolist())
+    assert [3, 2, 1] == statistics.count_time_frames.tolist()
+
+
+def test_statistics_require_histogram_range():
+    with pytest.raises(ValueError):
+        DatasetStatistics(1.0, 1.0, 4)
+
+
+def test_statistics_require_matching_histograms():
+    with pytest.raises(ValueError):
+        DatasetStatistics(0.0, 1.0, 4).merge(DatasetStatistics(0.0, 1.0, 8))
+
+
+def test_compute_statistics_writes_output(tmp_path: Path):
+    paths, frames, times = [], [], []
+    for idx, count in enumerate((5, 6)):
+        paths.append(H5Path(tmp_path.joinpath(f"scan{idx}.h5")))
+        frames.append(100 * rand(count, 3, 4).astype(float32))
+        times.append(full(count, 0.1 * (idx + 1), dtype=float32))
+        with File(paths[-1], "w") as file:
+            file["data"] = frames[-1]
+            file["count_time"] = times[-1]
+    config = StatsConfig(
+        dataset=SimpleHdf5DatasetConfig(paths, H5Key("data"), Dim(2)),
+        output=tmp_path.joinpath("stats", "stats.h5"),
+        count_times=SimpleHdf5DatasetConfig(paths, H5Key("count_time"), Dim(0)),
+        histogram_max=50.0,
+        bins=10,
+        shard_frames=2,
+        batch_size=3,
+    )
+    completed: list[tuple[int, int]] = []
+    compute_statistics(config, processes=2, on_shard=completed.append)
+    assert 6 == len(completed)
+    expected = torch.from_numpy(concatenate(frames).astype("float64"))[:, None]
+    with File(config.output) as file:
+        assert 11 == file.attrs["frames"]
+        assert_allclose(expected.mean(dim=0).numpy(), file["mean"][()])
+        assert_allclose(
+            expected.var(dim=0, unbiased=False).numpy(), file["variance"][()]
+        )
+        assert_allclose(expected.flatten(1).mean(dim=1).numpy(), file["frame_mean"])
+        assert (
+            11 * 12
+            == file["histogram/counts"][()].sum() + file["histogram"].attrs["overflow"]
+        )
+        assert_array_equal([5, 6], file["count_times/frames"][()].astype(int64))
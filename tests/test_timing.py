@@ -0,0 +1,66 @@
+from multiprocessing import get_context
+from typing import Iterator
+
+import pytest
+
+from ad_denoise.datasets.computed import ComputedFramesDataset
+from ad_denoise.timing import (
+    Stage,
+    disable_timing,
+    enable_timing,
+    read_timings,
+    record,
+    timed,
+)
+
+
+@pytest.fixture
+def timing() -> Iterator[None]:
+    enable_timing()
+    yield
+    disable_timing()
+
+
+def test_timed_is_shared_no_op_when_disabled():
+    assert timed(Stage.HDF5_READ) is timed(Stage.COMPUTE)
+    with timed(Stage.HDF5_READ):
+        pass
+    assert {} == read_timings()
+
+
+def test_timed_records_stage(timing: None):
+    with timed(Stage.HDF5_READ):
+        pass
+    with timed(Stage.HDF5_READ):
+        pass
+    seconds, count = read_timings()[Stage.HDF5_READ]
+    assert 2 == count
+    assert seconds >= 0
+    assert (0.0, 0) == read_timings()[Stage.COMPUTE]
+
+
+def test_read_timings_resets(timing: None):
+    record(Stage.DATA_WAIT, 1.5)
+    assert (1.5, 1) == read_timings(reset=True)[Stage.DATA_WAIT]
+    assert (0.0, 0) == read_timings()[Stage.DATA_WAIT]
+
+
+def _record_decompress() -> None:
+    record(Stage.DECOMPRESS, 0.25)
+
+
+def test_timings_aggregate_across_forked_processes(timing: None):
+    processes = [
+        get_context("fork").Process(target=_record_decompress) for _ in range(2)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert (0.5, 2) == read_timings()[Stage.DECOMPRESS]
+
+
+def test_computed_frames_dataset_records_compute(timing: None):
+    dataset = ComputedFramesDataset([1, 2, 3], lambda item: 2 * item)  # type: ignore
+    assert [2, 6] == dataset.__getitems__([0, 2])
+    assert 2 == read_timings()[Stage.COMPUTE][1]
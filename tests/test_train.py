@@ -0,0 +1,100 @@
+from pathlib import Path
+from typing import Any
+
+import pytest
+import torch
+from pytorch_lightning import Callback, LightningModule, Trainer
+from pytorch_lightning.callbacks import ModelCheckpoint
+from torch import Tensor, arange, rand, zeros
+from torch.nn import Parameter
+from torch.optim import SGD
+
+from ad_denoise.loaders import (
+    DataLoaderConfig,
+    ProcessDataLoaderConfig,
+    ThreadedDataLoaderConfig,
+)
+from ad_denoise.train import ResumeCallback
+
+
+class _Recorder(LightningModule):
+    def __init__(self, loader: DataLoaderConfig) -> None:
+        super().__init__()
+        self.weight = Parameter(zeros(1))
+        self.loader = loader
+        self.seen: list[tuple[list[int], float]] = []
+
+    def training_step(self, batch: Tensor, batch_idx: int) -> Tensor:
+        self.seen.append((batch.tolist(), rand(1).item()))
+        return (self.weight * batch).sum()
+
+    def train_dataloader(self) -> Any:
+        return self.loader(list(arange(10.0)), shuffle=True)  # type: ignore
+
+    def configure_optimizers(self) -> SGD:
+        return SGD(self.parameters(), 0.1)
+
+
+class _Preempt(Callback):
+    def __init__(self, step: int) -> None:
+        self.step = step
+
+    def on_train_batch_end(self, trainer: Trainer, *args: Any) -> None:
+        if trainer.global_step == self.step:
+            raise RuntimeError("Preempted")
+
+
+def _fit(
+    module: _Recorder, directory: Path, steps: int, *callbacks: Callback, **kwargs
+) -> None:
+    trainer = Trainer(
+        max_epochs=2,
+        accelerator="cpu",
+        logger=False,
+        enable_progress_bar=False,
+        enable_model_summary=False,
+        callbacks=[
+            ResumeCallback(),
+            ModelCheckpoint(
+                directory,
+                every_n_train_steps=steps,
+                save_top_k=0,
+                save_last=True,
+            ),
+            *callbacks,
+        ],
+    )
+    trainer.fit(module, **kwargs)
+
+
+@pytest.mark.filterwarnings("ignore:.*LeafSpec.*:FutureWarning")
+@pytest.mark.filterwarnings("ignore:.*does not have many workers.*")
+@pytest.mark.parametrize(
+    "loader",
+    [
+        ProcessDataLoaderConfig(batch_size=2, num_workers=0),
+        ThreadedDataLoaderConfig(batch_size=2, num_threads=2, prefetch_batches=3),
+    ],
+)
+@pytest.mark.parametrize("steps", [3, 5], ids=["mid_epoch", "epoch_end"])
+def test_training_resumes_at_next_batch(
+    tmp_path: Path, loader: DataLoaderConfig, steps: int
+):
+    torch.manual_seed(0)
+    uninterrupted = _Recorder(loader)
+    _fit(uninterrupted, tmp_path.joinpath("uninterrupted"), steps)
+    assert 10 == len(uninterrupted.seen)
+
+    torch.manual_seed(0)
+    interrupted = _Recorder(loader)
+    with pytest.raises(RuntimeError, match="Preempted"):
+        _fit(interrupted, tmp_path.joinpath("interrupted"), steps, _Preempt(8))
+    resumed = _Recorder(loader)
+    _fit(
+        resumed,
+        tmp_path.joinpath("interrupted"),
+        steps,
+        ckpt_path=tmp_path.joinpath("interrupted", "last.ckpt"),
+    )
+    assert uninterrupted.seen[:8] == interrupted.seen
+    assert uninterrupted.seen[8 // steps * steps :] == resumed.seen
@@ -0,0 +1,58 @@
+from dataclasses import dataclass
+from pathlib import Path
+
+from apischema import deserialize, serialize
+
+from ad_denoise.utils import (
+    TaggedUnionBase,
+    as_tagged_union,
+    config_deserializer,
+    load_config,
+)
+
+
+@as_tagged_union
+class BaseConfig(TaggedUnionBase):
+    pass
+
+
+@dataclass
+class FirstConfig(BaseConfig):
+    __alias__ = "First"
+    value: int = 0
+
+
+def test_tagged_union_deserializes_by_alias():
+    assert FirstConfig(3) == deserialize(BaseConfig, {"First": {"value": 3}})
+
+
+def test_tagged_union_includes_subclasses_defined_after_use():
+    deserialize(BaseConfig, {"First": {}})
+
+    @dataclass
+    class LateConfig(BaseConfig):
+        __alias__ = "Late"
+        value: int = 0
+
+    assert LateConfig(5) == deserialize(BaseConfig, {"Late": {"value": 5}})
+    assert {"LateConfig": {"value": 5}} == serialize(BaseConfig, LateConfig(5))
+
+
+def test_config_deserializer_is_memoized():
+    assert config_deserializer(BaseConfig) is config_deserializer(BaseConfig)
+
+
+def test_config_deserializer_includes_subclasses_defined_after_use():
+    config_deserializer(BaseConfig)({"First": {}})
+
+    @dataclass
+    class LaterConfig(BaseConfig):
+        __alias__ = "Later"
+
+    assert LaterConfig() == config_deserializer(BaseConfig)({"Later": {}})
+
+
+def test_load_config_reads_yaml(tmp_path: Path):
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text("First:\n  value: 7\n")
+    assert FirstConfig(7) == load_config(config_path, BaseConfig)
@@ -0,0 +1,112 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator, Optional
+
+import pytest
+from h5py import ExternalLink, File, SoftLink
+from numpy import arange, float32, int16, uint16
+from numpy.random import rand
+from numpy.testing import assert_allclose, assert_array_equal
+
+from ad_denoise.datasets.hdf5 import H5Key, H5Path
+from ad_denoise.writer import DirectChunkWriter, copy_structure
+
+
+@pytest.fixture
+def executor() -> Iterator[ThreadPoolExecutor]:
+    with ThreadPoolExecutor(2) as executor:
+        yield executor
+
+
+@pytest.mark.parametrize("compression", [None, "deflate", "bitshuffle", "zstd"])
+@pytest.mark.parametrize("chunk_frames", [1, 3])
+def test_direct_chunk_writer_round_trips(
+    tmp_path: Path,
+    executor: ThreadPoolExecutor,
+    compression: Optional[str],
+    chunk_frames: int,
+):
+    frames = rand(7, 5, 6).astype(float32)
+    with File(tmp_path.joinpath("out.h5"), "w") as file:
+        writer = DirectChunkWriter(
+            file,
+            H5Key("entry/data"),
+            frames.shape,
+            float32,
+            executor,
+            compression,
+            chunk_frames,
+            max_pending=1,
+        )
+        for start, stop in ((0, 2), (2, 3), (3, 7)):
+            writer.write(frames[start:stop])
+        writer.close()
+    with File(tmp_path.joinpath("out.h5"), "r") as file:
+        assert (chunk_frames, 5, 6) == file["entry/data"].chunks
+        assert_array_equal(frames, file["entry/data"][()])
+
+
+def test_direct_chunk_writer_scales_to_integers(
+    tmp_path: Path, executor: ThreadPoolExecutor
+):
+    frames = 100 * rand(4, 3, 3).astype(float32)
+    frames[0, 0, 0] = -1.0
+    with File(tmp_path.joinpath("out.h5"), "w") as file:
+        writer = DirectChunkWriter(
+            file, H5Key("data"), frames.shape, uint16, executor, scale=0.01
+        )
+        writer.write(frames)
+        writer.close()
+    with File(tmp_path.joinpath("out.h5"), "r") as file:
+        stored = file["data"][()]
+        assert uint16 == stored.dtype
+        assert 0.01 == file["data"].attrs["scale_factor"]
+    frames[0, 0, 0] = 0.0
+    assert_allclose(frames, 0.01 * stored, atol=0.005 + 1e-6)
+
+
+def test_direct_chunk_writer_rejects_scaled_floats(
+    tmp_path: Path, executor: ThreadPoolExecutor
+):
+    with File(tmp_path.joinpath("out.h5"), "w") as file, pytest.raises(ValueError):
+        DirectChunkWriter(file, H5Key("data"), (1, 2), float32, executor, scale=0.5)
+
+
+def test_direct_chunk_writer_rejects_unknown_compression(
+    tmp_path: Path, executor: ThreadPoolExecutor
+):
+    with File(tmp_path.joinpath("out.h5"), "w") as file, pytest.raises(ValueError):
+        DirectChunkWriter(file, H5Key("data"), (1, 2), float32, executor, "lzma")
+
+
+def test_direct_chunk_writer_rejects_overrun(
+    tmp_path: Path, executor: ThreadPoolExecutor
+):
+    with File(tmp_path.joinpath("out.h5"), "w") as file:
+        writer = DirectChunkWriter(file, H5Key("data"), (2, 2), int16, executor)
+        with pytest.raises(ValueError):
+            writer.write(arange(6, dtype=int16).reshape(3, 2))
+
+
+def test_copy_structure_excludes_dataset(tmp_path: Path):
+    source = H5Path(tmp_path.joinpath("scan.nxs"))
+    with File(source, "w") as file:
+        entry = file.create_group("entry")
+        entry.attrs["NX_class"] = "NXentry"
+        file["entry/instrument/detector/data"] = arange(8).reshape(2, 2, 2)
+        file["entry/instrument/detector/count_time"] = [0.1, 0.1]
+        file["entry/instrument/detector"].attrs["NX_class"] = "NXdetector"
+        file["entry/data"] = SoftLink("/entry/instrument/detector/data")
+        file["entry/mask"] = ExternalLink("mask.h5", "mask")
+    with File(tmp_path.joinpath("out.h5"), "w") as file:
+        file["entry/instrument/detector/data"] = arange(8, 16).reshape(2, 2, 2)
+        copy_structure(source, file, H5Key("entry/instrument/detector/data"))
+    with File(tmp_path.joinpath("out.h5"), "r") as file:
+        assert "NXentry" == file["entry"].attrs["NX_class"]
+        assert "NXdetector" == file["entry/instrument/detector"].attrs["NX_class"]
+        assert_array_equal([0.1, 0.1], file["entry/instrument/detector/count_time"])
+        assert_array_equal(
+            arange(8, 16).reshape(2, 2, 2), file["entry/instrument/detector/data"]
+        )
+        assert isinstance(file["entry"].get("data", getlink=True), SoftLink)
+        assert isinstance(file["entry"].get("mask", getlink=True), ExternalLink)